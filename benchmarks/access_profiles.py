@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# -----------------------------------------------------------------------------
+# :author:    Pete R. Jemian
+# :email:     prjemian@gmail.com
+# :copyright: (c) 2014-2022, Pete R. Jemian
+#
+# Distributed under the terms of the Creative Commons Attribution 4.0 International Public License.
+#
+# The full license is in the file LICENSE.txt, distributed with this software.
+# -----------------------------------------------------------------------------
+
+"""
+Time to validate & show the tree of data files with each access profile.
+
+Each HDF5 data file (default: the files in ``punx/data``) is validated
+and its tree structure is rendered, with each access profile (see
+:mod:`punx.access_profiles`).  The best time of ``--repeat`` runs is
+reported.  For profiles that read in blocks, the number of reads from
+the data file are reported too.
+
+On a local disk, the operating system caches the files so the profiles
+differ little.  Run on the parallel or network file system of interest
+(with cold caches) to see the difference.
+
+USAGE::
+
+    python benchmarks/access_profiles.py
+    python benchmarks/access_profiles.py --repeat 5 --profiles default network /path/to/*.nxs
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import pyRestTable  # noqa: E402
+
+from punx import access_profiles  # noqa: E402
+from punx import h5tree  # noqa: E402
+from punx import validate  # noqa: E402
+
+DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "punx", "data"))
+
+
+def data_files():
+    """Return the names of the HDF5 data files in ``punx/data``."""
+    names = []
+    for pattern in ("*.h5", "*.hdf5", "*.nxs", "*.nx5"):
+        names += glob.glob(os.path.join(DATA_DIR, pattern))
+    return sorted(names)
+
+
+class Counting_Profile(access_profiles.Access_Profile):
+    """Copy of an access profile that keeps its Block_Cache_File objects (to count reads)."""
+
+    def __init__(self, profile):
+        super().__init__(
+            profile.name,
+            profile.description,
+            profile.file_options,
+            profile.mdc_nbytes,
+            profile.sieve_nbytes,
+            profile.block_size,
+            profile.max_blocks,
+        )
+        self.block_files = []
+
+    def _block_file(self, fname):
+        f = super()._block_file(fname)
+        self.block_files.append(f)
+        return f
+
+
+def measure(fname, profile):
+    """Validate & render the tree of ``fname``, return the time (s) and reads (or None)."""
+    profile = Counting_Profile(profile)
+    t0 = time.time()
+    validator = validate.Data_File_Validator(access_profile=profile)
+    try:
+        validator.validate(fname)
+    finally:
+        validator.close()
+    try:
+        h5tree.Hdf5TreeView(fname, access_profile=profile).report()
+    except Exception:
+        pass  # some files cannot be rendered
+    elapsed = time.time() - t0
+    if profile.block_size is None:
+        return elapsed, None
+    return elapsed, sum(f.reads for f in profile.block_files)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("files", nargs="*", default=data_files(), help="HDF5 data files")
+    parser.add_argument(
+        "--profiles",
+        nargs="*",
+        default=list(access_profiles.PROFILES),
+        help="names of access profiles (default: all)",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="runs of each (best time)")
+    args = parser.parse_args()
+
+    validate.Data_File_Validator()  # load the NXDL definitions before timing
+
+    table = pyRestTable.Table()
+    table.labels = ["file"] + args.profiles
+    totals = {name: 0.0 for name in args.profiles}
+    for fname in args.files:
+        row = [os.path.basename(fname)]
+        for name in args.profiles:
+            profile = access_profiles.get_profile(name)
+            try:
+                results = [measure(fname, profile) for _i in range(args.repeat)]
+            except Exception as exc:
+                row.append(exc.__class__.__name__)
+                continue
+            best, reads = min(results)
+            totals[name] += best
+            text = f"{best * 1000:.1f} ms"
+            if reads is not None:
+                text += f" ({reads} reads)"
+            row.append(text)
+        table.addRow(row)
+    table.addRow(["total"] + [f"{totals[name] * 1000:.1f} ms" for name in args.profiles])
+    print(table)
+    for name in args.profiles:
+        print(f"{name}: {access_profiles.get_profile(name).description}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# -----------------------------------------------------------------------------
+# :author:    Pete R. Jemian
+# :email:     prjemian@gmail.com
+# :copyright: (c) 2014-2022, Pete R. Jemian
+#
+# Distributed under the terms of the Creative Commons Attribution 4.0 International Public License.
+#
+# The full license is in the file LICENSE.txt, distributed with this software.
+# -----------------------------------------------------------------------------
+
+"""
+Memory used by the address catalog of a (synthetic) NeXus data file.
+
+A data file is written with ``--entries`` NXentry groups, each with an
+NXdata group of ``--fields`` fields (each field has a ``@units``
+attribute).  Then the address catalog of the file is built.
+Memory is measured with :mod:`tracemalloc` so only memory allocated
+by Python is counted.
+
+USAGE::
+
+    python benchmarks/catalog_memory.py
+    python benchmarks/catalog_memory.py --entries 100 --fields 1000
+"""
+
+import argparse
+import gc
+import h5py
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from punx import validate  # noqa: E402
+
+
+def write_data_file(fname, entries, fields):
+    """Write a NeXus data file with ``entries`` x ``fields`` fields."""
+    with h5py.File(fname, "w") as root:
+        root.attrs["default"] = "entry_0"
+        for i in range(entries):
+            entry = root.create_group(f"entry_{i}")
+            entry.attrs["NX_class"] = "NXentry"
+            entry.attrs["default"] = "data"
+            data = entry.create_group("data")
+            data.attrs["NX_class"] = "NXdata"
+            data.attrs["signal"] = "field_0"
+            for j in range(fields):
+                ds = data.create_dataset(f"field_{j}", data=[i, j])
+                ds.attrs["units"] = "counts"
+
+
+def measure(fname):
+    """Build the address catalog of ``fname``, return validator & measurements."""
+    validator = validate.Data_File_Validator()
+    validator.h5 = h5py.File(fname, "r")
+    validator.__init_local__()
+    gc.collect()
+    tracemalloc.start()
+    t0 = time.time()
+    validator.build_address_catalog()
+    elapsed = time.time() - t0
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return validator, current, peak, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--entries", type=int, default=20, help="number of NXentry groups")
+    parser.add_argument("--fields", type=int, default=1000, help="number of fields in each NXdata")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tempdir:
+        fname = os.path.join(tempdir, "catalog.h5")
+        write_data_file(fname, args.entries, args.fields)
+        validator, current, peak, elapsed = measure(fname)
+        total = len(validator.addresses)
+        validator.close()
+
+    print(f"entries: {args.entries}, fields per entry: {args.fields}")
+    print(f"cataloged items: {total}")
+    print(f"time: {elapsed:.3f} s")
+    print(f"memory: {current / 2**20:.2f} MiB (peak {peak / 2**20:.2f} MiB)")
+    print(f"memory per cataloged item: {current / total:.0f} bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# -----------------------------------------------------------------------------
+# :author:    Pete R. Jemian
+# :email:     prjemian@gmail.com
+# :copyright: (c) 2014-2022, Pete R. Jemian
+#
+# Distributed under the terms of the Creative Commons Attribution 4.0 International Public License.
+#
+# The full license is in the file LICENSE.txt, distributed with this software.
+# -----------------------------------------------------------------------------
+
+"""
+Memory used by the NXDL structures of several NXDL file sets in one process.
+
+All NXDL classes of each file set are loaded (from the snapshot, unless
+``--no-snapshot``).  Memory is measured with :mod:`tracemalloc` so only
+memory allocated by Python is counted.
+
+To show the reduction, the loaded NXDL structures are copied twice (in
+the same run): as they are now (``__slots__``, shared ``xml_attributes``
+tables) and in the previous layout (attributes in a ``__dict__``, each
+with its own ``xml_attributes`` dictionary).  The memory of each copy
+is compared.  (Values such as names are shared by both copies, as by
+the structures.)
+
+USAGE::
+
+    python benchmarks/nxdl_memory.py
+    python benchmarks/nxdl_memory.py v3.3 v2018.5 --no-snapshot
+"""
+
+import argparse
+import collections
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from punx import cache_manager  # noqa: E402
+from punx import nxdl_manager  # noqa: E402
+
+
+def count_nxdl_objects(manager):
+    """Return the number of each type of NXDL structure in ``manager``."""
+    counts = collections.Counter()
+
+    def walk(obj):
+        counts[type(obj).__name__] += 1
+        for k in "attributes fields groups links".split():
+            for item in getattr(obj, k, {}).values():
+                if isinstance(item, nxdl_manager.NXDL__base):
+                    walk(item)
+        dimensions = getattr(obj, "dimensions", None)
+        if dimensions is not None:
+            walk(dimensions)
+            for dim in dimensions.dims.values():
+                walk(dim)
+
+    for definition in manager.classes.values():
+        walk(definition)
+    return counts
+
+
+class Dict_Backed(object):
+
+    """An NXDL structure in the previous layout: attributes in a ``__dict__``"""
+
+
+def attribute_names(obj):
+    """Return the names of the attributes of NXDL structure ``obj``."""
+    names = []
+    for cls in type(obj).__mro__:
+        names += [k for k in getattr(cls, "__slots__", ()) if k not in names]
+    names += [k for k in getattr(obj, "__dict__", {}) if k not in names]
+    return names
+
+
+def copy_structure(obj, dict_backed):
+    """Return a copy of NXDL structure ``obj`` (and of the structures in it)."""
+
+    def copy_value(v):
+        if isinstance(v, nxdl_manager.NXDL__base):
+            return copy_structure(v, dict_backed)
+        return v
+
+    new = Dict_Backed() if dict_backed else object.__new__(type(obj))
+    for k in attribute_names(obj):
+        if not hasattr(obj, k):
+            continue
+        v = getattr(obj, k)
+        if k in ("nxdl_definition", "nxdl_manager"):
+            pass  # a reference (not copied)
+        elif k == "xml_attributes":
+            v = dict(v) if dict_backed else v  # its own table, or the shared one
+        elif isinstance(v, dict):
+            v = {key: copy_value(item) for key, item in v.items()}
+        elif isinstance(v, list):
+            v = [copy_value(item) for item in v]
+        else:
+            v = copy_value(v)
+        setattr(new, k, v)
+    return new
+
+
+def measure_copies(managers, dict_backed):
+    """Return the memory (bytes) of a copy of all loaded NXDL structures."""
+    gc.collect()
+    tracemalloc.start()
+    copies = [
+        copy_structure(definition, dict_backed)
+        for manager in managers
+        for definition in manager.classes.values()
+    ]
+    gc.collect()
+    current = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del copies
+    return current
+
+
+def measure(refs, use_snapshot):
+    """Load all NXDL classes of each file set, return the managers & measurements."""
+    gc.collect()
+    tracemalloc.start()
+    t0 = time.time()
+    managers = []
+    for ref in refs:
+        file_set = cache_manager.CacheManager().NXDL_file_sets[ref]
+        manager = nxdl_manager.NXDL_Manager(file_set, use_snapshot=use_snapshot)
+        manager.classes.load_all()
+        managers.append(manager)
+    elapsed = time.time() - t0
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return managers, current, peak, elapsed
+
+
+def main():
+    cm = cache_manager.CacheManager()
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "file_sets",
+        nargs="*",
+        default=sorted(cm.NXDL_file_sets),
+        help="names of NXDL file sets (default: all)",
+    )
+    parser.add_argument(
+        "--no-snapshot",
+        action="store_true",
+        help="parse the NXDL files (do not load the snapshots)",
+    )
+    args = parser.parse_args()
+
+    managers, current, peak, elapsed = measure(args.file_sets, not args.no_snapshot)
+
+    counts = collections.Counter()
+    for manager in managers:
+        counts.update(count_nxdl_objects(manager))
+    total = sum(counts.values())
+
+    print(f"file sets: {', '.join(args.file_sets)}")
+    print(f"load: {'snapshot' if not args.no_snapshot else 'parse NXDL files'}")
+    print(f"time: {elapsed:.3f} s")
+    for k, v in sorted(counts.items()):
+        print(f"  {k}: {v}")
+    print(f"NXDL structures: {total}")
+    print(f"memory: {current / 2**20:.2f} MiB (peak {peak / 2**20:.2f} MiB)")
+    print(f"memory per NXDL structure: {current / total:.0f} bytes")
+
+    compact = measure_copies(managers, False)
+    previous = measure_copies(managers, True)
+    print(f"NXDL structures, as now: {compact / 2**20:.2f} MiB ({compact / total:.0f} bytes each)")
+    print(
+        "NXDL structures, previous layout (__dict__, own xml_attributes):"
+        f" {previous / 2**20:.2f} MiB ({previous / total:.0f} bytes each)"
+    )
+    print(f"reduction: {previous / compact:.2f}x less memory")
+
+
+if __name__ == "__main__":
+    main()
@@ -125,6 +125,10 @@ class CannotUpdateFromGithubNow(IOError):
     """custom exception"""
 
 
+class ValueNotInspected(ValueError):
+    """custom exception: value of a dataset was not read (the reason)"""
+
+
 from ._version import get_versions
 
 __version__ = get_versions()["version"]
@@ -0,0 +1,339 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# -----------------------------------------------------------------------------
+# :author:    Pete R. Jemian
+# :email:     prjemian@gmail.com
+# :copyright: (c) 2014-2022, Pete R. Jemian
+#
+# Distributed under the terms of the Creative Commons Attribution 4.0 International Public License.
+#
+# The full license is in the file LICENSE.txt, distributed with this software.
+# -----------------------------------------------------------------------------
+
+"""
+named settings (profiles) to open HDF5 files for reading
+
+Reading the structure of an HDF5 file takes many small metadata reads.
+On parallel (Lustre, GPFS) and network (NFS) file systems, each read
+is slow.  A profile sets how the file is opened to read it with fewer
+(and larger) reads.
+
+.. autosummary::
+
+   ~Access_Profile
+   ~Block_Cache_File
+   ~get_profile
+   ~open_file
+   ~register_profile
+
+Profiles (see ``PROFILES``):
+
+=========  ==============================================================
+name       settings
+=========  ==============================================================
+default    as ``h5py.File(fname, "r")``
+nolock     no HDF5 file locking (file systems without ``flock()``)
+parallel   large metadata & chunk caches, large sieve buffer, no locking
+paged      large page buffer (files written with paged aggregation)
+network    read in large blocks (kept in a cache), no locking
+=========  ==============================================================
+
+EXAMPLE::
+
+    with punx.access_profiles.open_file(fname, "network") as root:
+        ...
+"""
+
+import collections
+import h5py
+import io
+import logging
+import os
+
+
+DEFAULT_PROFILE = "default"
+DEFAULT_BLOCK_SIZE = 2**22  # bytes read at once by Block_Cache_File
+DEFAULT_MAX_BLOCKS = 64  # blocks kept by Block_Cache_File
+logger = logging.getLogger(__name__)
+
+
+class Block_Cache_File(io.RawIOBase):
+
+    """
+    Read-only file, read in large blocks that are kept in a cache
+
+    Each read is served from whole blocks of ``block_size`` bytes.
+    A block is read once (reading ahead of what was asked for) and the
+    most recently used blocks are kept, at most ``max_blocks``.
+    So many small (metadata) reads become a few large reads.
+
+    Use with ``h5py.File(Block_Cache_File(fname), "r")``.
+
+    PARAMETERS
+
+    fname str :
+        name of the file
+    block_size int :
+        bytes in each block
+    max_blocks int :
+        Keep at most this many blocks (at least 1).
+
+    Attributes
+
+    reads int :
+        number of reads from the file
+    bytes_read int :
+        bytes read from the file
+    """
+
+    def __init__(self, fname, block_size=DEFAULT_BLOCK_SIZE, max_blocks=DEFAULT_MAX_BLOCKS):
+        super().__init__()
+        self.name = fname
+        self.block_size = max(1, block_size)
+        self.max_blocks = max(1, max_blocks)
+        self._raw = open(fname, "rb", buffering=0)
+        self._size = os.fstat(self._raw.fileno()).st_size
+        self._pos = 0
+        self._blocks = collections.OrderedDict()
+        self.reads = 0
+        self.bytes_read = 0
+
+    def __repr__(self):
+        return self.name  # h5py reports this as the file name
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += self._size
+        self._pos = max(0, offset)
+        return self._pos
+
+    def tell(self):
+        return self._pos
+
+    def _block(self, i):
+        """internal: return block ``i`` (read it, if not in the cache)"""
+        block = self._blocks.get(i)
+        if block is None:
+            self._raw.seek(i * self.block_size)
+            block = self._raw.read(self.block_size)
+            self.reads += 1
+            self.bytes_read += len(block)
+            self._blocks[i] = block
+            while len(self._blocks) > self.max_blocks:
+                self._blocks.popitem(last=False)
+        else:
+            self._blocks.move_to_end(i)
+        return block
+
+    def readinto(self, b):
+        out = memoryview(b).cast("B")
+        end = min(self._pos + len(out), self._size)
+        n = 0
+        while self._pos < end:
+            i, start = divmod(self._pos, self.block_size)
+            chunk = self._block(i)[start:start + end - self._pos]
+            if len(chunk) == 0:
+                break  # file is shorter than when opened
+            out[n:n + len(chunk)] = chunk
+            n += len(chunk)
+            self._pos += len(chunk)
+        return n
+
+    def close(self):
+        if not self.closed:
+            self._raw.close()
+            self._blocks.clear()
+        super().close()
+
+
+class Access_Profile(object):
+
+    """
+    Named settings to open HDF5 files for reading
+
+    PARAMETERS
+
+    name str :
+        name of this profile
+    description str :
+        one line about this profile
+    file_options dict :
+        keyword arguments for ``h5py.File``
+        (such as ``locking``, ``rdcc_nbytes``, ``page_buf_size``)
+    mdc_nbytes int :
+        initial (and at least twice that as maximum) size of the
+        HDF5 metadata cache, in bytes (default: as HDF5)
+    sieve_nbytes int :
+        size of the HDF5 data sieve buffer, in bytes (default: as HDF5)
+    block_size int :
+        If set, read the file through :class:`Block_Cache_File`
+        with blocks of this many bytes.
+    max_blocks int :
+        blocks kept by :class:`Block_Cache_File`
+
+    .. autosummary::
+
+       ~open
+    """
+
+    def __init__(
+        self,
+        name,
+        description="",
+        file_options=None,
+        mdc_nbytes=None,
+        sieve_nbytes=None,
+        block_size=None,
+        max_blocks=DEFAULT_MAX_BLOCKS,
+    ):
+        self.name = name
+        self.description = description
+        self.file_options = dict(file_options or {})
+        self.mdc_nbytes = mdc_nbytes
+        self.sieve_nbytes = sieve_nbytes
+        self.block_size = block_size
+        self.max_blocks = max_blocks
+
+    def __str__(self):
+        return "Access_Profile(%s)" % self.name
+
+    def open(self, fname, swmr=False):
+        """
+        Return the h5py File ``fname``, open (read-only) with this profile.
+
+        If ``swmr``, open as a reader of a file written in SWMR
+        (single writer, multiple reader) mode.  Such a file is read
+        without :class:`Block_Cache_File` (its blocks would not show
+        what the writer adds).
+        """
+        options = dict(self.file_options)
+        try:
+            return self._open(fname, options, swmr)
+        except OSError:
+            if "page_buf_size" not in options:
+                raise
+            # older HDF5: a page buffer only for files with paged aggregation
+            options.pop("page_buf_size")
+            logger.debug("%s: opened without page buffer: %s", self, fname)
+            return self._open(fname, options, swmr)
+
+    def _open(self, fname, options, swmr=False):
+        """internal: open the file with these h5py.File ``options``"""
+        source = fname
+        if self.block_size is not None and not swmr:
+            source = self._block_file(fname)
+        try:
+            if self.mdc_nbytes is None and self.sieve_nbytes is None:
+                return h5py.File(source, "r", swmr=swmr, **options)
+            return self._open_with_fapl(source, options, swmr)
+        except Exception:
+            if source is not fname:
+                source.close()
+            raise
+
+    def _block_file(self, fname):
+        """internal: return the :class:`Block_Cache_File` to read ``fname``"""
+        return Block_Cache_File(fname, self.block_size, self.max_blocks)
+
+    def _open_with_fapl(self, source, options, swmr=False):
+        """internal: open with a file access property list (for cache sizes)"""
+        # h5py.File has no options for these, make its property list & change it
+        from h5py._hl.files import make_fapl
+
+        driver = options.pop("driver", None)
+        if isinstance(source, io.IOBase):
+            driver = "fileobj"
+            options["fileobj"] = source
+            name = repr(source)
+        else:
+            name = source
+        fapl = make_fapl(driver, **options)
+        if self.mdc_nbytes is not None:
+            config = fapl.get_mdc_config()
+            config.set_initial_size = True
+            config.initial_size = self.mdc_nbytes
+            config.max_size = max(config.max_size, 2 * self.mdc_nbytes)
+            fapl.set_mdc_config(config)
+        if self.sieve_nbytes is not None:
+            fapl.set_sieve_buf_size(self.sieve_nbytes)
+        flags = h5py.h5f.ACC_RDONLY
+        if swmr:
+            flags |= h5py.h5f.ACC_SWMR_READ
+        fid = h5py.h5f.open(os.fsencode(name), flags, fapl=fapl)
+        return h5py.File(fid)
+
+
+PROFILES = collections.OrderedDict()
+
+
+def register_profile(profile):
+    """Add (or replace) an :class:`Access_Profile` by its name."""
+    PROFILES[profile.name] = profile
+    return profile
+
+
+def get_profile(profile=None):
+    """
+    Return the :class:`Access_Profile` named ``profile``.
+
+    ``profile`` may be a name, an :class:`Access_Profile`
+    (returned as is), or None (the default profile).
+    """
+    if profile is None:
+        profile = DEFAULT_PROFILE
+    if isinstance(profile, Access_Profile):
+        return profile
+    if profile not in PROFILES:
+        raise KeyError(
+            f"unknown access profile: '{profile}'"
+            f", use one of these: {', '.join(PROFILES)}"
+        )
+    return PROFILES[profile]
+
+
+def open_file(fname, profile=None):
+    """Return the h5py File ``fname``, open (read-only) with ``profile``."""
+    return get_profile(profile).open(fname)
+
+
+register_profile(Access_Profile(DEFAULT_PROFILE, "as h5py.File(fname, 'r')"))
+register_profile(
+    Access_Profile(
+        "nolock",
+        "no HDF5 file locking",
+        file_options=dict(locking=False),
+    )
+)
+register_profile(
+    Access_Profile(
+        "parallel",
+        "parallel file systems: large caches, no locking",
+        file_options=dict(locking=False, rdcc_nbytes=2**26),
+        mdc_nbytes=2**25,
+        sieve_nbytes=2**22,
+    )
+)
+register_profile(
+    Access_Profile(
+        "paged",
+        "files written with paged aggregation: large page buffer",
+        file_options=dict(page_buf_size=2**24),
+    )
+)
+register_profile(
+    Access_Profile(
+        "network",
+        "network file systems: read in large blocks, no locking",
+        file_options=dict(locking=False),
+        block_size=DEFAULT_BLOCK_SIZE,
+    )
+)
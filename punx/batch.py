@@ -0,0 +1,621 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# -----------------------------------------------------------------------------
+# :author:    Pete R. Jemian
+# :email:     prjemian@gmail.com
+# :copyright: (c) 2014-2022, Pete R. Jemian
+#
+# Distributed under the terms of the Creative Commons Attribution 4.0 International Public License.
+#
+# The full license is in the file LICENSE.txt, distributed with this software.
+# -----------------------------------------------------------------------------
+
+"""
+validate many data files, with a pool of worker processes
+
+.. autosummary::
+
+   ~Batch_Validation
+   ~File_Result
+   ~expand_inputs
+   ~is_batch
+   ~results_file_name
+
+The inputs are file names, directories (searched for HDF5 files,
+see ``HDF5_EXTENSIONS``), glob patterns (such as ``data/**/*.h5``)
+and ``@FILELIST`` (a text file with one input on each line, blank
+lines and lines starting with ``#`` are ignored).
+
+The files are validated by a pool of worker processes.  Each worker
+makes one validator, when it starts, and validates many files with
+it, so the NeXus definitions are loaded (parsed or from the snapshot)
+once for each worker.  (Where processes are forked, the workers
+start with the definitions already loaded by the parent process.)
+
+The files are validated in one of these orders (see ``ORDERS``):
+
+===========  ==========================================================
+order        files are validated
+===========  ==========================================================
+``largest``  largest file first, so the batch ends soon after the
+             last (and smallest) files are started
+``stream``   in order of the inputs, starting before all inputs are
+             known (such as a long ``@FILELIST``)
+===========  ==========================================================
+
+The result of each file (a :class:`File_Result`) is returned as
+each file is validated (in any order).  The report (with a row
+for each file, in order of the inputs) adds them up.  Only the
+summary of each file is kept by the batch.  Its findings are
+returned only if asked (``keep_findings``) and written (as JSON,
+by the worker process) only to an ``output_dir``.
+
+EXAMPLE::
+
+    validator = punx.validate.Data_File_Validator()
+    batch = punx.batch.Batch_Validation(validator, processes=8, output_dir="results")
+    for result in batch.run(["data/", "@more_files.txt"]):
+        print(result)
+    print(batch.report())
+    batch.write_results()
+"""
+
+import collections
+import concurrent.futures
+import copy
+import glob
+import hashlib
+import json
+import logging
+import os
+import time
+
+import pyRestTable
+
+from . import FileNotFound
+from . import HDF5_Open_Error
+from . import SchemaNotFound
+from . import finding
+
+
+HDF5_EXTENSIONS = (".h5", ".hdf5", ".hdf", ".nxs", ".nx5", ".nexus")
+ORDERS = ("largest", "stream")
+REPORT_FILE = "batch_report.json"  # in the output directory
+TASKS_PER_PROCESS = 2  # files given to each worker at once (order: stream)
+logger = logging.getLogger(__name__)
+
+_worker = None  # validates the files given to this worker process
+
+
+def is_batch(inputs):
+    """
+    Are ``inputs`` (list of str) more than one data file?
+
+    More than one input, a directory, a glob pattern
+    (not the name of a file) or an ``@FILELIST``.
+    """
+    if len(inputs) != 1:
+        return True
+    name = inputs[0]
+    if name.startswith("@") or os.path.isdir(name):
+        return True
+    return glob.escape(name) != name and not os.path.exists(name)
+
+
+def expand_inputs(inputs, extensions=HDF5_EXTENSIONS):
+    """
+    Yield the file names of ``inputs``, each once, in order.
+
+    A directory is searched (with its subdirectories) for files
+    with one of the ``extensions``.  A glob pattern (``**``
+    matches subdirectories) is expanded.  Each line of an
+    ``@FILELIST`` is an input (such as a file name, relative to
+    the current directory).  Any other input is a file name
+    (reported when validated if not found).
+    """
+    known = set()
+    for fname in _expand(inputs, extensions):
+        key = os.path.abspath(fname)
+        if key not in known:
+            known.add(key)
+            yield fname
+
+
+def _expand(inputs, extensions):
+    """internal: yield the file names of ``inputs`` (maybe repeated)"""
+    for item in inputs:
+        if item.startswith("@"):
+            yield from _expand(_read_file_list(item[1:]), extensions)
+        elif os.path.isdir(item):
+            for root, dirs, files in os.walk(item):
+                dirs.sort()
+                for name in sorted(files):
+                    if name.lower().endswith(extensions):
+                        yield os.path.join(root, name)
+        elif glob.escape(item) != item and not os.path.exists(item):
+            for name in sorted(glob.glob(item, recursive=True)):
+                if os.path.isdir(name):
+                    yield from _expand([name], extensions)
+                else:
+                    yield name
+        else:
+            yield item
+
+
+def _read_file_list(file_list):
+    """internal: yield the inputs listed in the file ``file_list``"""
+    if not os.path.exists(file_list):
+        raise FileNotFound(file_list)
+    with open(file_list, "r") as fp:
+        for line in fp:
+            line = line.strip()
+            if len(line) > 0 and not line.startswith("#"):
+                yield line
+
+
+def _file_size(fname):
+    """internal: size of ``fname`` (0 if not found)"""
+    try:
+        return os.path.getsize(fname)
+    except OSError:
+        return 0
+
+
+class File_Result(object):
+
+    """
+    The findings of one file of a batch
+
+    Attributes
+
+    index int :
+        position of the file in the inputs
+    fname str :
+        name of the file
+    size int :
+        bytes in the file
+    findings list :
+        each finding, as ``(h5_address, test_name, status, comment)``
+        (the status by its name, such as ``"OK"``), or ``None``
+        if not kept (see :class:`Batch_Validation`)
+    summary dict :
+        count of findings, by status name
+    score tuple :
+        ``(total, count, average)`` (see
+        :meth:`~punx.validate.Data_File_Validator.finding_score`)
+    seconds float :
+        time to validate the file
+    cached bool :
+        Are the findings from the result cache (see :mod:`punx.result_cache`)?
+    error str :
+        why the file was not validated (or ``None``)
+    results_file str :
+        name of the JSON file with the findings, in the output
+        directory (or ``None``, not written)
+    """
+
+    def __init__(self, index, fname, size=0):
+        self.index = index
+        self.fname = fname
+        self.size = size
+        self.findings = []
+        self.summary = collections.OrderedDict((str(s), 0) for s in finding.VALID_STATUS_LIST)
+        self.score = (0, 0, 0)
+        self.seconds = 0
+        self.cached = False
+        self.error = None
+        self.results_file = None
+
+    def __str__(self):
+        if self.error is not None:
+            return "File_Result(%s, error=%s)" % (self.fname, self.error)
+        return "File_Result(%s, findings=%d, score=%f)" % (
+            self.fname,
+            sum(self.summary.values()),
+            self.score[2],
+        )
+
+    def as_dict(self, findings=True):
+        """Return the content (for JSON), with (or without) the findings."""
+        content = dict(
+            file=self.fname,
+            size=self.size,
+            seconds=self.seconds,
+            cached=self.cached,
+            error=self.error,
+            summary=self.summary,
+            score=dict(zip("total count average".split(), self.score)),
+        )
+        if findings and self.findings is not None:
+            content["findings"] = [
+                dict(zip("address status test comment".split(), (a, s, t, c)))
+                for a, t, s, c in self.findings
+            ]
+        return content
+
+
+class _Batch_Worker(object):
+
+    """internal: validate files with one validator (in a process of the pool)"""
+
+    def __init__(
+        self,
+        validator,
+        use_cache=True,
+        refresh=False,
+        cache_directory=None,
+        output_dir=None,
+        keep_findings=False,
+    ):
+        self.validator = validator
+        self.cache = None
+        self.refresh = refresh
+        self.output_dir = output_dir
+        self.keep_findings = keep_findings
+        if use_cache:
+            from . import result_cache
+
+            self.cache = result_cache.Validation_Result_Cache(cache_directory)
+
+    @classmethod
+    def from_settings(cls, settings):
+        """
+        Make a worker (and its validator) with the settings of a batch.
+
+        Raise ``ValueError`` if the NXDL file set (its path and sha)
+        or the rules checked are not those of the batch.
+        """
+        from . import validate
+
+        validator = validate.Data_File_Validator(
+            cls._file_set(settings), access_profile=settings["access_profile"]
+        )
+        validator.read_virtual_datasets = settings["read_virtual_datasets"]
+        validator.read_budget.max_read_bytes = settings["max_read_bytes"]
+        validator.read_budget.max_file_bytes = settings["max_file_bytes"]
+        validator.disable_rules(*settings["disabled_rule_families"])
+        rules = [rule.name for rule in validator.enabled_rules()]
+        if rules != settings["rules"]:
+            raise ValueError(
+                "rules of the worker (%s) are not the rules of the batch (%s)"
+                % (", ".join(rules), ", ".join(settings["rules"]))
+            )
+        return cls(
+            validator,
+            use_cache=settings["use_cache"],
+            refresh=settings["refresh"],
+            cache_directory=settings["cache_directory"],
+            output_dir=settings["output_dir"],
+            keep_findings=settings["keep_findings"],
+        )
+
+    @staticmethod
+    def _file_set(settings):
+        """internal: the NXDL file set of a batch (the same path & sha)"""
+        from .cache_manager import NXDL_File_Set
+
+        file_set = NXDL_File_Set()
+        if settings["nxdl_info"] is None:
+            file_set.ref = settings["ref"]
+            file_set.sha = settings["nxdl_sha"]
+            file_set.path = settings["nxdl_path"]
+        else:
+            file_set.read_info_file(settings["nxdl_info"])  # not found again by name
+        if (file_set.path, file_set.sha) != (settings["nxdl_path"], settings["nxdl_sha"]):
+            raise ValueError(
+                "NXDL file set of the worker (%s, sha=%s) is not the file set of the batch (%s, sha=%s)"
+                % (file_set.path, file_set.sha, settings["nxdl_path"], settings["nxdl_sha"])
+            )
+        return file_set
+
+    def validate(self, index, fname):
+        """Validate one file, return its :class:`File_Result`."""
+        validator = self.validator
+        result = File_Result(index, fname, _file_size(fname))
+        t0 = time.time()
+        try:
+            if not os.path.exists(fname):
+                raise FileNotFound(fname)
+            if self.cache is None:
+                validator.validate(fname)
+            else:
+                result.cached = self.cache.validate(validator, fname, self.refresh)
+        except FileNotFound:
+            result.error = "file not found"
+        except HDF5_Open_Error:
+            result.error = "could not open as HDF5"
+        except SchemaNotFound as exc:
+            result.error = str(exc)
+        except Exception as exc:  # report it, validate the other files
+            logger.debug("%s: %s", fname, exc, exc_info=True)
+            result.error = "%s: %s" % (type(exc).__name__, exc)
+        else:
+            if self.keep_findings or self.output_dir is not None:
+                result.findings = [
+                    (f.h5_address, f.test_name, str(f.status), f.comment)
+                    for f in validator.validations
+                ]
+            for status, count in validator.finding_summary().items():
+                result.summary[str(status)] = count
+            result.score = validator.finding_score()
+        finally:
+            validator.close()
+            validator.__init_local__()  # release the catalog of this file
+        result.seconds = time.time() - t0
+        if self.output_dir is not None:
+            result.results_file = results_file_name(result.fname)
+            with open(os.path.join(self.output_dir, result.results_file), "w") as fp:
+                json.dump(result.as_dict(), fp, indent=2)
+        if not self.keep_findings:
+            result.findings = None  # not sent back from the worker process
+        return result
+
+
+def results_file_name(fname):
+    """
+    Name of the JSON file with the findings of data file ``fname``.
+
+    ``<file name>.<digest>.json`` (the digest of its absolute path
+    keeps the names distinct)
+    """
+    digest = hashlib.sha1(os.path.abspath(fname).encode("utf8"))
+    return "%s.%s.json" % (os.path.basename(fname), digest.hexdigest()[:10])
+
+
+def _init_batch_worker(settings):
+    """internal: prepare a process of the pool used by Batch_Validation.run()"""
+    global _worker
+
+    _worker = _Batch_Worker.from_settings(settings)
+
+
+def _batch_worker(index, fname):
+    """internal: validate one file in a worker process"""
+    return _worker.validate(index, fname)
+
+
+class Batch_Validation(object):
+
+    """
+    Validate many data files, with a pool of worker processes
+
+    PARAMETERS
+
+    validator obj :
+        a :class:`~punx.validate.Data_File_Validator`, with the settings
+        for all files (NeXus definitions, access profile, read budget,
+        rule families disabled)
+    processes int :
+        number of worker processes (default: 1, validate with
+        ``validator`` in this process)
+    order str :
+        order of validation, one of ``ORDERS`` (see :mod:`punx.batch`)
+    use_cache bool :
+        Use (and keep) the findings of unchanged files in the
+        result cache (see :mod:`punx.result_cache`)?
+    refresh bool :
+        Validate files even if their findings are in the result cache?
+    cache_directory str :
+        directory of the result cache (default: in the user cache)
+    output_dir str :
+        directory to write the findings of each file (as it is
+        validated), see :meth:`write_results` (default: not written)
+    keep_findings bool :
+        Return the findings of each file (``File_Result.findings``)
+        from :meth:`run`, such as to write them as a report?
+        (Either way, ``results`` keeps only their summary.)
+
+    Workers (``processes`` more than 1) make their own validators,
+    with the settings of ``validator``: the same NXDL file set (by its
+    path, checked by its sha) and the default rules (see
+    :func:`punx.rules.default_registry`).  So ``validator`` must use
+    the default rules (``ValueError`` if not).  A worker whose rules
+    (such as from entry points) are not those of ``validator`` stops.
+
+    Attributes
+
+    results dict :
+        :class:`File_Result` of each file validated, by position in the inputs
+
+    .. autosummary::
+
+       ~run
+       ~totals
+       ~score
+       ~report
+       ~write_results
+    """
+
+    def __init__(
+        self,
+        validator,
+        processes=1,
+        order="largest",
+        use_cache=True,
+        refresh=False,
+        cache_directory=None,
+        output_dir=None,
+        keep_findings=False,
+    ):
+        from . import rules
+
+        if order not in ORDERS:
+            raise ValueError(f"unknown order: '{order}', use one of these: {', '.join(ORDERS)}")
+        self.validator = validator
+        self.processes = max(1, processes or 1)
+        if self.processes > 1 and validator.rules is not rules.default_registry():
+            raise ValueError("workers check the default rules only: use processes=1 with other rules")
+        self.order = order
+        self.use_cache = use_cache
+        self.refresh = refresh
+        self.cache_directory = cache_directory
+        self.output_dir = output_dir
+        self.keep_findings = keep_findings
+        self.results = {}
+        self.seconds = 0
+
+    def __str__(self):
+        return "Batch_Validation(processes=%d, order=%s)" % (self.processes, self.order)
+
+    def settings(self):
+        """Return the settings of a worker (to make its validator)."""
+        validator = self.validator
+        file_set = validator.manager.nxdl_file_set
+        return dict(
+            ref=file_set.ref,
+            nxdl_path=file_set.path,
+            nxdl_sha=file_set.sha,
+            nxdl_info=file_set.info,
+            access_profile=validator.access_profile.name,
+            read_virtual_datasets=validator.read_virtual_datasets,
+            max_read_bytes=validator.read_budget.max_read_bytes,
+            max_file_bytes=validator.read_budget.max_file_bytes,
+            disabled_rule_families=sorted(validator.disabled_rule_families),
+            rules=[rule.name for rule in validator.enabled_rules()],
+            use_cache=self.use_cache,
+            refresh=self.refresh,
+            cache_directory=self.cache_directory,
+            output_dir=self.output_dir,
+            keep_findings=self.keep_findings,
+        )
+
+    def _tasks(self, inputs):
+        """internal: yield (index, file name) of each file, in order of validation"""
+        tasks = enumerate(expand_inputs(inputs))
+        if self.order == "largest":
+            tasks = sorted(tasks, key=lambda task: (-_file_size(task[1]), task[0]))
+        return tasks
+
+    def run(self, inputs):
+        """
+        Validate the files of ``inputs`` (see :func:`expand_inputs`).
+
+        Yield the :class:`File_Result` of each file, as it is validated.
+        """
+        self.results = {}
+        t0 = time.time()
+        if self.output_dir is not None:
+            os.makedirs(self.output_dir, exist_ok=True)
+        if self.processes == 1:
+            worker = _Batch_Worker(
+                self.validator,
+                use_cache=self.use_cache,
+                refresh=self.refresh,
+                cache_directory=self.cache_directory,
+                output_dir=self.output_dir,
+                keep_findings=self.keep_findings,
+            )
+            for index, fname in self._tasks(inputs):
+                yield self._add(worker.validate(index, fname))
+        else:
+            yield from self._run_pool(inputs)
+        if self.use_cache:
+            from . import result_cache
+
+            result_cache.Validation_Result_Cache(self.cache_directory).evict()
+        self.seconds = time.time() - t0
+
+    def _run_pool(self, inputs):
+        """internal: validate the files with a pool of worker processes"""
+        max_pending = TASKS_PER_PROCESS * self.processes
+        logger.debug("%s: starting", self)
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=self.processes,
+            initializer=_init_batch_worker,
+            initargs=(self.settings(),),
+        ) as executor:
+            pending = set()
+            for index, fname in self._tasks(inputs):
+                if len(pending) >= max_pending:
+                    done, pending = concurrent.futures.wait(
+                        pending, return_when=concurrent.futures.FIRST_COMPLETED
+                    )
+                    for future in done:
+                        yield self._add(future.result())
+                pending.add(executor.submit(_batch_worker, index, fname))
+            for future in concurrent.futures.as_completed(pending):
+                yield self._add(future.result())
+
+    def _add(self, result):
+        """internal: keep the result of a file (its summary, not its findings)"""
+        kept = result
+        if result.findings is not None:
+            kept = copy.copy(result)
+            kept.findings = None
+        self.results[result.index] = kept
+        return result
+
+    def totals(self):
+        """Return the count of findings (of all files), by status name."""
+        totals = collections.OrderedDict((str(s), 0) for s in finding.VALID_STATUS_LIST)
+        for result in self.results.values():
+            for status, count in result.summary.items():
+                totals[status] += count
+        return totals
+
+    def score(self):
+        """Return ``(total, count, average)`` of the findings of all files."""
+        total = sum(result.score[0] for result in self.results.values())
+        count = sum(result.score[1] for result in self.results.values())
+        if count == 0:
+            return total, count, 0
+        return total, count, float(total) / count
+
+    def report(self, statuses=None):
+        """
+        Return the report (str): a row for each file, then the totals.
+
+        ``statuses`` : names of the statuses to count (default: all)
+        """
+        statuses = statuses or [str(s) for s in finding.VALID_STATUS_LIST]
+        t = pyRestTable.Table()
+        for label in ["file"] + list(statuses) + ["<finding>", "seconds", "note"]:
+            t.addLabel(label)
+        for index in sorted(self.results):
+            result = self.results[index]
+            note = result.error or ("cached" if result.cached else "")
+            row = [result.fname]
+            row += [result.summary[s] for s in statuses]
+            row += ["%f" % result.score[2], "%.3f" % result.seconds, note]
+            t.addRow(row)
+        totals = self.totals()
+        errors = sum(1 for result in self.results.values() if result.error is not None)
+        row = ["TOTAL (%d files)" % len(self.results)]
+        row += [totals[s] for s in statuses]
+        row += ["%f" % self.score()[2], "%.3f" % self.seconds]
+        row += ["%d not validated" % errors if errors > 0 else ""]
+        t.addRow(row)
+        return str(t)
+
+    def write_results(self):
+        """
+        Write the report (as JSON) in ``output_dir``.
+
+        The findings of each file were written there by :meth:`run`
+        (see :func:`results_file_name`), the report (without findings)
+        is in ``REPORT_FILE``.  Return the name of the report file.
+        """
+        if self.output_dir is None:
+            raise ValueError("no output directory")
+        files = []
+        for index in sorted(self.results):
+            result = self.results[index]
+            content = result.as_dict(findings=False)
+            content["results"] = result.results_file
+            files.append(content)
+
+        file_set = self.validator.manager.nxdl_file_set
+        report = dict(
+            nxdl_file_set=dict(ref=file_set.ref, sha=file_set.sha),
+            processes=self.processes,
+            order=self.order,
+            seconds=self.seconds,
+            summary=self.totals(),
+            score=dict(zip("total count average".split(), self.score())),
+            files=files,
+        )
+        path = os.path.join(self.output_dir, REPORT_FILE)
+        with open(path, "w") as fp:
+            json.dump(report, fp, indent=2)
+        return path
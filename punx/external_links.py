@@ -0,0 +1,301 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# -----------------------------------------------------------------------------
+# :author:    Pete R. Jemian
+# :email:     prjemian@gmail.com
+# :copyright: (c) 2014-2022, Pete R. Jemian
+#
+# Distributed under the terms of the Creative Commons Attribution 4.0 International Public License.
+#
+# The full license is in the file LICENSE.txt, distributed with this software.
+# -----------------------------------------------------------------------------
+
+"""
+find and open the target files of HDF5 external links
+
+.. autosummary::
+
+   ~External_Link_Resolver
+   ~Virtual_Sources
+
+The target file of an external link is searched as the HDF5 library
+does it [#]_:
+
+#. If the file name is an absolute path, that file.
+   (If not found, continue with only the base name of the file.)
+#. Each directory in the ``HDF5_EXT_PREFIX`` environment variable
+   (separated by ``:``, ``;`` on Windows).
+   ``${ORIGIN}`` in a directory is the directory of the parent file.
+#. The directory of the parent file (the file with the link).
+#. The current working directory.
+
+The source files of virtual datasets (VDS) are searched the same way,
+with the ``HDF5_VDS_PREFIX`` environment variable.  Only the mapping
+of a virtual dataset is read (from its creation property list), never
+its values, so no source file is opened.
+
+.. [#] https://docs.hdfgroup.org/hdf5/develop/group___h5_l.html
+   (see ``H5Lcreate_external``)
+"""
+
+import collections
+import h5py
+import logging
+import os
+
+from . import access_profiles
+
+
+DEFAULT_MAX_FILES = 16  # target files of external links kept open
+EXT_PREFIX_ENVIRONMENT_VARIABLE = "HDF5_EXT_PREFIX"
+VDS_PREFIX_ENVIRONMENT_VARIABLE = "HDF5_VDS_PREFIX"
+ORIGIN = "${ORIGIN}"
+VDS_SAME_FILE = "."  # source file name of a mapping within the same file
+logger = logging.getLogger(__name__)
+
+
+class Virtual_Sources(object):
+
+    """
+    Mapping of a virtual dataset (VDS) to its source files
+
+    As from :meth:`External_Link_Resolver.virtual_sources`.
+
+    PARAMETERS
+
+    mappings int :
+        number of source mappings
+    files tuple :
+        names of the source files (in order of first use)
+    missing tuple :
+        names of the source files that are not found
+        (names with a ``printf``-style pattern are not checked)
+    paths tuple :
+        absolute paths of the source files that are found
+        (not the file of the virtual dataset itself)
+    """
+
+    __slots__ = ("mappings", "files", "missing", "paths")
+
+    def __init__(self, mappings, files, missing, paths=()):
+        self.mappings = mappings
+        self.files = files
+        self.missing = missing
+        self.paths = paths
+
+    def __str__(self):
+        s = "%d mapping(s) from %d source file(s)" % (self.mappings, len(self.files))
+        if len(self.missing) > 0:
+            s += ", %d not found: %s" % (len(self.missing), ", ".join(self.missing[:5]))
+            if len(self.missing) > 5:
+                s += ", ..."
+        return s
+
+
+class External_Link_Resolver(object):
+
+    """
+    Find and open the target files of HDF5 external links
+
+    Each target file is found once (the existence of each candidate
+    file is checked once) and opened (read-only) once.  The most
+    recently used target files are kept open, at most ``max_files``.
+    The others are discarded (and so closed, once nothing else refers
+    to them).
+
+    PARAMETERS
+
+    max_files int :
+        Keep at most this many target files open (at least 1).
+    prefix str :
+        directories to search first, separated by ``os.pathsep``
+        (default: the ``HDF5_EXT_PREFIX`` environment variable)
+    vds_prefix str :
+        directories to search first for the source files of virtual
+        datasets (default: the ``HDF5_VDS_PREFIX`` environment variable)
+    access_profile obj :
+        name (or instance) of the :class:`~punx.access_profiles.Access_Profile`
+        to open the target files (default: the default profile)
+
+    .. autosummary::
+
+       ~search_path
+       ~exists
+       ~resolve
+       ~open
+       ~get
+       ~get_member
+       ~virtual_sources
+       ~set_max_files
+       ~clear
+    """
+
+    def __init__(self, max_files=DEFAULT_MAX_FILES, prefix=None, vds_prefix=None, access_profile=None):
+        if prefix is None:
+            prefix = os.environ.get(EXT_PREFIX_ENVIRONMENT_VARIABLE, "")
+        if vds_prefix is None:
+            vds_prefix = os.environ.get(VDS_PREFIX_ENVIRONMENT_VARIABLE, "")
+        self.prefixes = [p for p in prefix.split(os.pathsep) if len(p) > 0]
+        self.vds_prefixes = [p for p in vds_prefix.split(os.pathsep) if len(p) > 0]
+        self.max_files = max(1, max_files)
+        self.access_profile = access_profiles.get_profile(access_profile)
+        self._files = collections.OrderedDict()  # open target files, by absolute path
+        self._exists = {}  # existence of each candidate file, by path
+        self._resolved = {}  # target file (or None), by (file name, parent directory, VDS?)
+
+    def __len__(self):
+        return len(self._files)
+
+    def _discard_extra_files(self):
+        """internal: discard least recently used files over the limit"""
+        while len(self._files) > self.max_files:
+            path, _f = self._files.popitem(last=False)
+            logger.debug("external link file discarded: %s", path)
+
+    def search_path(self, filename, parent_filename=None, virtual=False):
+        """
+        Return the candidate paths for ``filename``, in search order.
+
+        If ``virtual``, ``filename`` is a source file of a virtual dataset.
+        """
+        parent_dir = os.path.dirname(os.path.abspath(parent_filename or ""))
+        candidates = []
+        if os.path.isabs(filename):
+            candidates.append(filename)
+            filename = os.path.basename(filename)
+        for prefix in self.vds_prefixes if virtual else self.prefixes:
+            candidates.append(os.path.join(prefix.replace(ORIGIN, parent_dir), filename))
+        if parent_filename is not None:
+            candidates.append(os.path.join(parent_dir, filename))
+        candidates.append(filename)
+        return candidates
+
+    def exists(self, path):
+        """Does file ``path`` exist?  (Checked once.)"""
+        found = self._exists.get(path)
+        if found is None:
+            found = os.path.isfile(path)
+            self._exists[path] = found
+        return found
+
+    def resolve(self, filename, parent_filename=None, virtual=False):
+        """
+        Return the absolute path of the target file, None if not found.
+
+        PARAMETERS
+
+        filename str :
+            file name of the external link
+        parent_filename str :
+            name of the file with the external link
+        virtual bool :
+            ``filename`` is a source file of a virtual dataset?
+        """
+        key = (filename, os.path.dirname(os.path.abspath(parent_filename or "")), virtual)
+        if key not in self._resolved:
+            path = None
+            for candidate in self.search_path(filename, parent_filename, virtual):
+                if self.exists(candidate):
+                    path = os.path.abspath(candidate)
+                    break
+            if path is None:
+                logger.debug("FileNotFound: external file=%s", filename)
+            self._resolved[key] = path
+        return self._resolved[key]
+
+    def open(self, path):
+        """Return the open (read-only) h5py File of target file ``path``."""
+        f = self._files.get(path)
+        if f is None:
+            f = self.access_profile.open(path)
+            self._files[path] = f
+            self._discard_extra_files()
+        else:
+            self._files.move_to_end(path)
+        return f
+
+    def get(self, filename, path, parent_filename=None):
+        """
+        Return the target object of an external link, None if not found.
+
+        PARAMETERS
+
+        filename str :
+            file name of the external link
+        path str :
+            HDF5 address of the object in the target file
+        parent_filename str :
+            name of the file with the external link
+        """
+        fname = self.resolve(filename, parent_filename)
+        if fname is None:
+            return None
+        try:
+            return self.open(fname)[path]
+        except (KeyError, OSError) as exc:
+            logger.debug("external link %s:%s not available: %s", filename, path, exc)
+            return None
+
+    def get_member(self, group, name):
+        """
+        Return member ``name`` of h5py ``group``, None if not found.
+
+        An external link is followed with :meth:`get`.
+        """
+        if isinstance(name, str):
+            name = name.encode("utf8")
+        try:
+            link_type = group.id.links.get_info(name).type
+        except KeyError:
+            return None
+        if link_type == h5py.h5l.TYPE_EXTERNAL:
+            filename, path = group.id.links.get_val(name)
+            return self.get(os.fsdecode(filename), path.decode("utf8"), group.file.filename)
+        try:
+            return group[name]
+        except KeyError:
+            return None  # such as a dangling soft link
+
+    def virtual_sources(self, dset):
+        """
+        Return the :class:`Virtual_Sources` of h5py ``dset``, None if not a virtual dataset.
+
+        Only the creation property list of ``dset`` is read.
+        A virtual dataset has no storage of its own, so the (costly)
+        creation property list is read only for datasets with no storage.
+        """
+        if not isinstance(dset, h5py.Dataset) or dset.id.get_storage_size() > 0:
+            return None  # has data: not virtual
+        dcpl = dset.id.get_create_plist()
+        if dcpl.get_layout() != h5py.h5d.VIRTUAL:
+            return None
+        mappings = dcpl.get_virtual_count()
+        files = []
+        for i in range(mappings):
+            name = dcpl.get_virtual_filename(i)
+            if name not in files:
+                files.append(name)
+        parent_filename = dset.file.filename
+        missing = []
+        paths = []
+        for name in files:
+            if name == VDS_SAME_FILE or "%b" in name:  # pattern: not checked
+                continue
+            path = self.resolve(name, parent_filename, virtual=True)
+            if path is None:
+                missing.append(name)
+            elif path not in paths:
+                paths.append(path)
+        return Virtual_Sources(mappings, tuple(files), tuple(missing), tuple(paths))
+
+    def set_max_files(self, max_files):
+        """Change the limit on the number of open target files."""
+        self.max_files = max(1, max_files)
+        self._discard_extra_files()
+
+    def clear(self):
+        """Discard all open files and forget all file checks."""
+        self._files.clear()
+        self._exists.clear()
+        self._resolved.clear()
@@ -14,11 +14,14 @@ document each item during validation
 .. autosummary::
 
    ~Finding
+   ~Finding_Store
    ~VALID_STATUS_DICT
 
 """
 
 
+import array
+import collections
 import hashlib
 
 
@@ -40,6 +43,9 @@ class ValidationResultStatus(object):
     def __str__(self, *args, **kwargs):
         return self.key
 
+    def __reduce__(self):
+        return self.key  # pickled as the status of this module with this name
+
 
 VERY_BAD = -10000000
 OK = ValidationResultStatus("OK", 100, "green", "meets NeXus specification")
@@ -67,6 +73,18 @@ VALID_STATUS_DICT = {str(f): f for f in VALID_STATUS_LIST}
 
 TF_RESULT = {True: OK, False: ERROR}
 
+STATUS_CODES = {status: code for code, status in enumerate(VALID_STATUS_LIST)}
+"""code (index in VALID_STATUS_LIST) of each status, as kept by Finding_Store"""
+
+# rank of each status in a report, for findings of the same address
+# (in the order of the text key "%3d description" % -value, used before)
+_REPORT_STATUS_RANK = {
+    STATUS_CODES[status]: rank
+    for rank, status in enumerate(
+        sorted(VALID_STATUS_LIST, key=lambda s: " %3d %s" % (-s.value, s.description))
+    )
+}
+
 # SHOW_ALL = VALID_STATUS_LIST
 # SHOW_ERRORS = (ERROR, WARN)
 # SHOW_NOT_OK = (WARN, ERROR, TODO, UNUSED)
@@ -79,18 +97,34 @@ class Finding(object):
     :param str h5_address: address of h5py item
     :param str test_name: short description of the test
     :param obj status: one of: OK NOTE WARN ERROR TODO COMMENT OPTIONAL UNUSED
-    :param str comment: description
+    :param str comment: description (a ``%`` template, if ``args``)
+    :param args: values of the template, formatted when ``comment`` is used
     """
 
-    def __init__(self, h5_address, test_name, status, comment):
-        if status not in VALID_STATUS_LIST:
+    __slots__ = ("h5_address", "test_name", "status", "_comment", "_args")
+
+    def __init__(self, h5_address, test_name, status, comment, *args):
+        if status not in STATUS_CODES:
             raise ValueError(f"unknown status value: {status}")
 
         self.test_name = str(test_name)
         self.h5_address = h5_address
         self.status = status
-        self.comment = comment
-        self.key = self.make_md5
+        self._comment = comment
+        self._args = args
+
+    @property
+    def comment(self):
+        """description (formatted when first used)"""
+        if len(self._args) > 0:
+            self._comment = self._comment % self._args
+            self._args = ()
+        return self._comment
+
+    @comment.setter
+    def comment(self, comment):
+        self._comment = comment
+        self._args = ()
 
     def __str__(self, *args, **kwargs):
         try:
@@ -111,3 +145,156 @@ class Finding(object):
         h.update(b"\n")
         h.update(bytes(self.test_name, "utf8"))
         return h.hexdigest()
+
+    key = make_md5  # computed only when called
+
+
+class Finding_Store(object):
+    """
+    findings of a validation, kept by column
+
+    Each finding is a row: the id of its HDF5 address and of its
+    test name (each different address and test name is kept once),
+    the code of its status (see ``STATUS_CODES``) and its comment.
+    A comment given as a template (with arguments) is formatted
+    only when used.  The count of findings of each status, and the
+    score, are kept as findings are recorded.
+
+    Use it as a list of :class:`Finding` (made when used)::
+
+        for f in validator.validations:
+            print(f.h5_address, f.status, f.comment)
+
+    :param findings: (optional) :class:`Finding` objects to record
+
+    .. autosummary::
+
+       ~record
+       ~append
+       ~extend
+       ~comment
+       ~summary
+       ~score
+       ~report_order
+    """
+
+    def __init__(self, findings=None):
+        self.address_ids = array.array("l")
+        self.test_ids = array.array("l")
+        self.status_codes = array.array("b")
+        self.comments = []  # comment (or template) of each row
+        self.arguments = {}  # arguments of comment templates, by row
+        self.addresses = []  # each different HDF5 address
+        self.test_names = []  # each different test name
+        self._address_ids = {}
+        self._test_ids = {}
+        self.counts = [0] * len(VALID_STATUS_LIST)  # by status code
+        self.total = 0  # sum of the (non-zero) status values
+        self.scored = 0  # count of findings with a non-zero status value
+        if findings is not None:
+            self.extend(findings)
+
+    def __len__(self):
+        return len(self.status_codes)
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield self.finding(row)
+
+    def __getitem__(self, row):
+        if isinstance(row, slice):
+            return [self.finding(i) for i in range(len(self))[row]]
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError("finding index out of range")
+        return self.finding(row)
+
+    def record(self, h5_address, test_name, status, comment, *args):
+        """Record a finding, return its row."""
+        code = STATUS_CODES.get(status)
+        if code is None:
+            raise ValueError(f"unknown status value: {status}")
+        address_id = self._address_ids.get(h5_address)
+        if address_id is None:
+            address_id = self._address_ids[h5_address] = len(self.addresses)
+            self.addresses.append(h5_address)
+        test_id = self._test_ids.get(test_name)
+        if test_id is None:
+            test_id = self._test_ids[test_name] = len(self.test_names)
+            self.test_names.append(str(test_name))
+
+        row = len(self.status_codes)
+        self.address_ids.append(address_id)
+        self.test_ids.append(test_id)
+        self.status_codes.append(code)
+        self.comments.append(comment)
+        if len(args) > 0:
+            self.arguments[row] = args
+        self.counts[code] += 1
+        if status.value != 0:
+            self.total += status.value
+            self.scored += 1
+        return row
+
+    def append(self, f):
+        """Record a :class:`Finding`."""
+        self.record(f.h5_address, f.test_name, f.status, f._comment, *f._args)
+
+    def extend(self, findings):
+        """Record each of ``findings`` (:class:`Finding` objects)."""
+        for f in findings:
+            self.append(f)
+
+    def comment(self, row):
+        """Return the comment of ``row`` (formatted now, if a template)."""
+        args = self.arguments.get(row)
+        if args is None:
+            return self.comments[row]
+        return self.comments[row] % args
+
+    def finding(self, row):
+        """Return the :class:`Finding` of ``row``."""
+        return Finding(
+            self.addresses[self.address_ids[row]],
+            self.test_names[self.test_ids[row]],
+            VALID_STATUS_LIST[self.status_codes[row]],
+            self.comments[row],
+            *self.arguments.get(row, ()),
+        )
+
+    def summary(self, statuses=None):
+        """Return the count of findings (dictionary) of each of ``statuses`` (default: all)."""
+        statuses = statuses or VALID_STATUS_LIST
+        return collections.OrderedDict(
+            (status, self.counts[STATUS_CODES[status]]) for status in statuses
+        )
+
+    def score(self):
+        """Return ``(total, count, average)`` of the non-zero status values."""
+        if self.scored == 0:
+            return self.total, self.scored, 0
+        return self.total, self.scored, float(self.total) / self.scored
+
+    def report_order(self):
+        """
+        Return the rows, in the order of a report.
+
+        By HDF5 address (the attributes of an item after the item),
+        then by status.  Each row is sorted by a number (from
+        the rank of its address and of its status).
+        """
+        addresses = sorted(
+            range(len(self.addresses)),
+            key=lambda i: (self.addresses[i] or "").replace("@", " @"),
+        )
+        address_rank = array.array("l", [0]) * len(addresses)
+        for rank, address_id in enumerate(addresses):
+            address_rank[address_id] = rank
+        n = len(VALID_STATUS_LIST)
+        rank = _REPORT_STATUS_RANK
+        keys = [
+            address_rank[a] * n + rank[s]
+            for a, s in zip(self.address_ids, self.status_codes)
+        ]
+        return sorted(range(len(keys)), key=keys.__getitem__)
@@ -24,7 +24,9 @@ import os
 import h5py
 import numpy
 
+from . import access_profiles
 from . import utils
+from .external_links import External_Link_Resolver
 
 
 logger = logging.getLogger(__name__)
@@ -40,20 +42,40 @@ class Hdf5TreeView(object):
         mc.array_items_shown = 5
         show_attributes = False
         txt = mc.report(show_attributes)
+
+    The values of virtual datasets are not shown (reading them opens
+    all their source files), only their mapping to source files.
+    To show the values too::
+
+        mc.read_virtual_datasets = True
     """
 
     requested_filename = None
     isNeXus = False
     array_items_shown = 5
+    read_virtual_datasets = False
 
-    def __init__(self, filename):
-        """store filename and test if file is NeXus HDF5"""
+    def __init__(self, filename, resolver=None, access_profile=None):
+        """
+        store filename and test if file is NeXus HDF5
+
+        ``resolver`` (an instance of
+        :class:`~punx.external_links.External_Link_Resolver`) finds and
+        opens the files of external links (default: a new one).
+        ``access_profile`` (name or instance of
+        :class:`~punx.access_profiles.Access_Profile`) sets how files
+        are opened (default: the default profile).
+        """
         self.requested_filename = filename
         self.filename = None
         self.show_attributes = True
+        self.access_profile = access_profiles.get_profile(access_profile)
+        if resolver is None:
+            resolver = External_Link_Resolver(access_profile=self.access_profile)
+        self.resolver = resolver
         if os.path.exists(filename):
             self.filename = filename
-            self.isNeXus = utils.isNeXusFile(filename)
+            self.isNeXus = utils.isNeXusFile(filename, self.access_profile)
 
     def report(self, show_attributes=True):
         """
@@ -80,11 +102,14 @@ class Hdf5TreeView(object):
         if self.filename is None:
             return None
         self.show_attributes = show_attributes
-        with h5py.File(self.filename, "r") as f:
+        with self.access_profile.open(self.filename) as f:
             txt = self.filename
             if self.isNeXus:
                 txt += " : NeXus data file"
-            tree_string_list = self._renderGroup(f, txt, indentation="")
+            try:
+                tree_string_list = self._renderGroup(f, txt, indentation="")
+            finally:
+                self.resolver.clear()  # close external files
         return tree_string_list
 
     def _renderGroup(self, obj, name, indentation="  ", md=None):
@@ -119,17 +144,21 @@ class Hdf5TreeView(object):
         groups = []
         for itemname in sorted(obj):
             link_info = obj.get(itemname, getlink=True)
-            # prevent fails of obj.get(itemname, getclass=True)
-            # for external links if file is not available
-            if (
-                isinstance(link_info, h5py.ExternalLink)
-                and not os.path.exists(link_info.filename)
-            ):
-                classref = None
-                logger.debug(
-                    "FileNotFound: external file=%s  external HDF5 addr=%s",
-                    link_info.filename, link_info.path
+            value = None
+            if isinstance(link_info, h5py.ExternalLink):
+                # find the external file as HDF5 does (not just in the
+                # current directory) and keep it open for other links to it
+                value = self.resolver.get(
+                    link_info.filename, link_info.path, obj.file.filename
                 )
+                if value is None:
+                    classref = None
+                    logger.debug(
+                        "FileNotFound: external file=%s  external HDF5 addr=%s",
+                        link_info.filename, link_info.path
+                    )
+                else:
+                    classref = type(value)
             elif isinstance(link_info, h5py.SoftLink):
                 classref = None
                 logger.debug("SoftLink: HDF5 addr=%s", link_info.path)
@@ -147,7 +176,8 @@ class Hdf5TreeView(object):
                             if v is not None:
                                 s += [self._renderSingleAttribute(indentation + "  ", nm, v)]
             else:
-                value = obj.get(itemname)
+                if value is None:
+                    value = obj.get(itemname)
                 if utils.isNeXusLink(value):
                     s += self._renderLinkedObject(value, itemname, indentation + "  ")
                 elif utils.isHdf5Group(value) or utils.isHdf5FileObject(value):
@@ -211,6 +241,10 @@ class Hdf5TreeView(object):
                 target_addr = utils.decode_byte_string(dset.attrs["target"])
                 if target_addr != dset.name:
                     return self._renderLinkedObject(dset, name, indentation)
+        if not self.read_virtual_datasets:
+            sources = self.resolver.virtual_sources(dset)
+            if sources is not None:
+                return self._renderVirtualDataset(dset, name, sources, indentation)
         txType = self._renderDsType(dset)
         txShape = self._renderDsShape(dset)
         s = []
@@ -264,12 +298,20 @@ class Hdf5TreeView(object):
             s += self._renderAttributes(dset, indentation)
         return s
 
-    def _renderDsType(self, obj):
+    def _renderVirtualDataset(self, dset, name, sources, indentation="  "):
+        """return a [formatted_string] with the structure (not the values) of a virtual dataset"""
+        txType = self._renderDsType(dset, read_values=False)
+        txShape = self._renderDsShape(dset)
+        s = ["%s%s:%s%s = [ virtual: %s ]" % (indentation, name, txType, txShape, sources)]
+        s += self._renderAttributes(dset, indentation)
+        return s
+
+    def _renderDsType(self, obj, read_values=True):
         """get the storage (data) type of the dataset"""
         t = str(obj.dtype)
         # dset.dtype.kind == 'S', nchar = dset.dtype.itemsize
         if obj.dtype.kind == "S":  # fixed-length string
-            if len(obj.shape):
+            if len(obj.shape) and read_values:
                 t = "char[%s]" % ",".join([str(o.dtype.itemsize) for o in obj])
             else:
                 t = "CHAR"
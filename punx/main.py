@@ -53,6 +53,9 @@ main user interface file
    ~func_install
    ~func_tree
    ~func_validate
+   ~validate_batch
+   ~validate_with_result_cache
+   ~watch_validation
 
 """
 
@@ -135,6 +138,14 @@ def func_demo(args):
     print("console> punx validate " + args.infile)
     args.report = ",".join(sorted(finding.VALID_STATUS_DICT.keys()))
     args.file_set_name = cache_manager.GITHUB_NXDL_BRANCH
+    args.read_virtual = False
+    args.access_profile = None
+    args.watch = None
+    args.incremental = False
+    args.no_cache = True
+    args.refresh = False
+    args.disable_rules = None
+    args.format = "table"
     func_validate(args)
     del args.report
 
@@ -175,10 +186,13 @@ def func_tree(args):
         from . import h5tree
 
         try:
-            mc = h5tree.Hdf5TreeView(os.path.abspath(args.infile))
+            mc = h5tree.Hdf5TreeView(
+                os.path.abspath(args.infile), access_profile=args.access_profile
+            )
         except FileNotFound:
             exit_message("File not found: " + args.infile)
         mc.array_items_shown = args.max_array_items
+        mc.read_virtual_datasets = args.read_virtual
         try:
             report = mc.report(args.show_attributes)
         except HDF5_Open_Error:
@@ -194,10 +208,12 @@ def func_validate(args):
 
     cm = cache_manager.CacheManager()
 
-    if args.infile.endswith(".nxdl.xml"):
-        result = validate.validate_xml(args.infile)
+    inputs = args.infile if isinstance(args.infile, list) else [args.infile]
+    infile = inputs[0]
+    if len(inputs) == 1 and infile.endswith(".nxdl.xml"):
+        result = validate.validate_xml(infile)
         if result is None:
-            print(args.infile, " validates")
+            print(infile, " validates")
         return
 
     file_sets = list(cm.all_file_sets.keys())
@@ -207,7 +223,15 @@ def func_validate(args):
             f"  Either install it or use one of these: {', '.join(file_sets)}"
         )
 
-    validator = validate.Data_File_Validator(args.file_set_name)
+    validator = validate.Data_File_Validator(
+        args.file_set_name, access_profile=args.access_profile
+    )
+    validator.read_virtual_datasets = args.read_virtual
+    if args.disable_rules is not None:
+        try:
+            validator.disable_rules(*args.disable_rules.split(","))
+        except ValueError as exc:
+            exit_message(str(exc))
 
     # determine which findings are to be reported
     report_choices, trouble = [], []
@@ -223,21 +247,146 @@ def func_validate(args):
             f"\t available choices: {choices}"
         )
 
+    from . import batch
+
+    if batch.is_batch(inputs):
+        if args.watch is not None or args.incremental:
+            exit_message("--watch and --incremental validate only one file")
+        validate_batch(validator, inputs, args, report_choices)
+        return
+
+    if args.watch is not None:
+        watch_validation(validator, infile, args.watch, report_choices)
+        return
+
     try:
         # run the validation
-        validator.validate(args.infile)
+        if args.incremental:
+            from . import watch
+
+            watch_pass = watch.validate_incremental(validator, infile)
+            # with --format jsonl|csv|tsv, stdout is only the report
+            print(watch_pass, file=sys.stdout if args.format == "table" else sys.stderr)
+        elif args.no_cache:
+            validator.validate(infile)
+        else:
+            validate_with_result_cache(validator, infile, args.refresh)
     except FileNotFound:
-        exit_message("File not found: " + args.infile)
+        exit_message("File not found: " + infile)
     except HDF5_Open_Error:
-        exit_message("Could not open as HDF5: " + args.infile)
+        exit_message("Could not open as HDF5: " + infile)
     except SchemaNotFound as _exc:
         exit_message(str(_exc))
 
     # report the findings from the validation
-    validator.print_report(statuses=report_choices)
+    if args.format == "table":
+        validator.print_report(statuses=report_choices)
+        print(f"NeXus definitions version: {args.file_set_name}")
+    else:
+        from . import report
+
+        with report.open_output(args.output) as fp:
+            validator.write_report(fp, args.format, report_choices)
+
+
+def validate_with_result_cache(validator, infile, refresh=False):
+    """
+    validate a data file, or use its findings from the result cache
+
+    See :mod:`punx.result_cache`.
+    """
+    from . import result_cache
+
+    if not os.path.exists(infile):
+        raise FileNotFound(infile)
+    cache = result_cache.Validation_Result_Cache()
+    if cache.validate(validator, infile, refresh):
+        # not on stdout: it would be mixed with a --format jsonl|csv|tsv report
+        print(f"findings from the result cache (file unchanged): {cache.directory}", file=sys.stderr)
+    cache.evict()
+
+
+def validate_batch(validator, inputs, args, report_choices):
+    """
+    validate many data files (with a pool of worker processes)
+
+    Prints the report (a row for each file), writes the findings
+    of each file (if ``--output-dir``).  See :mod:`punx.batch`.
+    With ``--format`` (not ``table``), writes the findings of each
+    file (as it is validated) instead, see :mod:`punx.report`.
+    """
+    from . import batch
+    from . import report
+
+    runner = batch.Batch_Validation(
+        validator,
+        processes=args.processes,
+        order=args.order,
+        use_cache=not args.no_cache,
+        refresh=args.refresh,
+        output_dir=args.output_dir,
+        keep_findings=args.format != "table",
+    )
+    with report.open_output(None if args.format == "table" else args.output) as fp:
+        writer = None
+        if args.format != "table":
+            writer = report.get_writer(args.format, fp, ("file",) + report.COLUMNS)
+        try:
+            for result in runner.run(inputs):
+                logger.debug(str(result))
+                if writer is not None:
+                    report.write_file_result(writer, result, report_choices)
+        except FileNotFound as exc:
+            exit_message("File not found: " + str(exc))
+        except SchemaNotFound as _exc:
+            exit_message(str(_exc))
+        if writer is not None:
+            summary = {finding.VALID_STATUS_DICT[k]: v for k, v in runner.totals().items()}
+            writer.write_summary(summary, runner.score())
+    if len(runner.results) == 0:
+        exit_message("No files to validate: " + " ".join(inputs))
+    if writer is not None:
+        if args.output_dir is not None:
+            runner.write_results()
+        return
+
+    print(runner.report(statuses=report_choices))
+    total, count, average = runner.score()
+    print("<finding>=%f of %d items reviewed" % (average, count))
+    if args.output_dir is not None:
+        runner.write_results()
+        print(f"findings of each file: {args.output_dir}")
     print(f"NeXus definitions version: {args.file_set_name}")
 
 
+def watch_validation(validator, infile, interval, report_choices):
+    """
+    validate a data file while it is written, until interrupted (^C)
+
+    Prints the findings of each pass, then the report of the whole file.
+    """
+    from . import watch
+
+    if not os.path.exists(infile):
+        exit_message("File not found: " + infile)
+    watcher = watch.Validation_Watcher(validator, infile)
+    try:
+        for watch_pass in watcher.watch(interval):
+            if watch_pass.new_items == 0 and watch_pass.removed_items == 0:
+                continue
+            print(watch_pass)
+            for f in watch_pass.findings:
+                if str(f.status) in report_choices:
+                    print(f"  {f.h5_address}  {f.status}  {f.test_name}  {f.comment}")
+    except HDF5_Open_Error:
+        exit_message("Could not open as HDF5: " + infile)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+    validator.print_report(statuses=report_choices)
+
+
 def func_install(args):
     """
     Install or update the named versions of the NeXus definitions.
@@ -261,6 +410,15 @@ def func_install(args):
     print(cm.table_of_caches())
     print(f"default file set: {cm.default_file_set.ref}")
 
+    # parse all NXDL files now to prepare the NXDL_Manager snapshot
+    from . import nxdl_manager
+
+    for file_set_name in args.file_set_name:
+        file_set = cm.NXDL_file_sets.get(file_set_name)
+        if file_set is not None:
+            print(f"Preparing NXDL snapshot for file set '{file_set_name}' ...")
+            nxdl_manager.NXDL_Manager(file_set, processes=args.processes)
+
 
 class MyArgumentParser(argparse.ArgumentParser):
     """
@@ -312,6 +470,34 @@ class MyArgumentParser(argparse.ArgumentParser):
         return argparse.ArgumentParser.parse_args(self, args, namespace)
 
 
+def add_read_virtual_argument(parser):
+    """add the option to read the values of virtual datasets"""
+    parser.add_argument(
+        "--read-virtual",
+        action="store_true",
+        default=False,
+        dest="read_virtual",
+        help="read the values of virtual datasets (opens all their source files)",
+    )
+
+
+def add_access_profile_argument(parser):
+    """add the option to choose how HDF5 files are opened"""
+    from . import access_profiles
+
+    choices = list(access_profiles.PROFILES)
+    parser.add_argument(
+        "--access-profile",
+        default=access_profiles.DEFAULT_PROFILE,
+        choices=choices,
+        dest="access_profile",
+        help=(
+            "how to open HDF5 files, such as on parallel or network file systems"
+            f" -- default={access_profiles.DEFAULT_PROFILE}"
+        ),
+    )
+
+
 def parse_command_line_arguments():
     """process command line"""
     from . import cache_manager
@@ -379,6 +565,14 @@ def parse_command_line_arguments():
         help="force existing file set to update from NeXus repository on GitHub",
     )
 
+    p_sub.add_argument(
+        "-p",
+        "--processes",
+        default=None,
+        type=int,
+        help="number of processes to parse the NXDL files (default: 1)",
+    )
+
     # TODO: add_logging_argument(p_sub)
 
     # --- subcommand: tree
@@ -402,11 +596,20 @@ def parse_command_line_arguments():
         # choices=range(1,51),
         help=help_text,
     )
+    add_read_virtual_argument(p_sub)
+    add_access_profile_argument(p_sub)
     # TODO: add_logging_argument(p_sub)
 
     # --- subcommand: validate
     p_sub = subcommand.add_parser("validate", help="validate a NeXus file")
-    p_sub.add_argument("infile", help="HDF5 or NXDL file name")
+    p_sub.add_argument(
+        "infile",
+        nargs="+",
+        help=(
+            "HDF5 or NXDL file name; to validate many HDF5 files:"
+            " file names, directories, glob patterns, or @FILELIST"
+        ),
+    )
     p_sub.set_defaults(func=func_validate)
 
     help_text = "NeXus NXDL file set (definitions) name for validation"
@@ -426,13 +629,90 @@ def parse_command_line_arguments():
         " (separate with comma if more than one, do not use white space)"
     )
     p_sub.add_argument("--report", default=reporting_choices, help=help_text)
+    p_sub.add_argument(
+        "--watch",
+        default=None,
+        type=float,
+        metavar="SECONDS",
+        help=(
+            "validate again every SECONDS, while the file is written"
+            " (such as in SWMR mode), until interrupted (^C)"
+        ),
+    )
+    p_sub.add_argument(
+        "--incremental",
+        action="store_true",
+        default=False,
+        help="validate only what changed since this file was last validated with --incremental",
+    )
+    p_sub.add_argument(
+        "--no-cache",
+        action="store_true",
+        default=False,
+        help="do not use (or keep) the findings of unchanged files in the result cache",
+    )
+    p_sub.add_argument(
+        "--refresh",
+        action="store_true",
+        default=False,
+        help="validate even if the file is unchanged, keep the new findings in the result cache",
+    )
+    p_sub.add_argument(
+        "--disable-rules",
+        default=None,
+        metavar="FAMILIES",
+        help=(
+            "do not check the rules of these families (separate with comma),"
+            " such as: 'application definitions,default plot'"
+        ),
+    )
+    from . import report
+
+    p_sub.add_argument(
+        "--format",
+        default="table",
+        choices=["table"] + list(report.WRITERS),
+        help=(
+            "report format: table (default), or write each finding as it comes:"
+            " fixed-width text, JSON Lines, CSV, or TSV"
+        ),
+    )
+    p_sub.add_argument(
+        "-o",
+        "--output",
+        default=None,
+        metavar="FILE",
+        help="write the report (--format other than table) to FILE (default: standard output)",
+    )
+    p_sub.add_argument(
+        "-p",
+        "--processes",
+        default=None,
+        type=int,
+        help="number of processes to validate many files (default: 1)",
+    )
+    p_sub.add_argument(
+        "--order",
+        default="largest",
+        choices=("largest", "stream"),
+        help="validate many files: largest first, or in order (streamed) -- default=largest",
+    )
+    p_sub.add_argument(
+        "--output-dir",
+        default=None,
+        metavar="DIR",
+        help="validate many files: write the findings of each file (and the report) to DIR",
+    )
+    add_read_virtual_argument(p_sub)
+    add_access_profile_argument(p_sub)
     # TODO: add_logging_argument(p_sub)
 
     return p.parse_args()
 
 
 def main():
-    print("\n!!! WARNING: this program is not ready for distribution.\n")
+    # on stderr: stdout may be a report (validate --format jsonl|csv|tsv)
+    print("\n!!! WARNING: this program is not ready for distribution.\n", file=sys.stderr)
     args = parse_command_line_arguments()
     if not hasattr(args, "func"):
         print("ERROR: must specify a subcommand -- for help, type:")
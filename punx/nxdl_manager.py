@@ -24,22 +24,38 @@ and XML Schema files that comprise a version of the NeXus definitions standard.
 It is identified by a name (release name, tag name, short commit hash, or branch
 name).
 
+Each :class:`NXDL_Manager` may be shared (read-only) by all users of the
+same file set, see :func:`get_shared_manager()`.
+
 """
 
 from __future__ import print_function
 
 import collections
+import copy
+import functools
+import hashlib
+import io
 import lxml.etree
 import os
+import pickle
+import re
+import tempfile
+import threading
 
-from .__init__ import FileNotFound, InvalidNxdlFile
+from .__init__ import __version__, FileNotFound, InvalidNxdlFile
 from . import nxdl_schema
 from . import cache_manager
+from . import schema_manager
 from . import utils
 
 
 logger = utils.setup_logger(__name__)
 
+SNAPSHOT_FILE_NAME = "__nxdl_manager__.pickle"
+SNAPSHOT_FORMAT = 4  # increment when the pickled NXDL structure changes
+VALID_NXDL_FILE_NAME = "__nxdl_valid__.json"
+
 
 class NXDL_Manager(object):
 
@@ -53,6 +69,8 @@ class NXDL_Manager(object):
         is the NeXus class name and the value is an instance of the
         :class:`~punx.nxdl_manager.NXDL__definition()` class (defined below)
         which describes the NXDL structure.
+        An instance of :class:`~punx.nxdl_manager.NXDL_Class_Dict()`:
+        each NXDL class is loaded when first accessed.
 
     nxdl_file_set str :
         Absolute path to a directory which contains a complete set of the
@@ -67,20 +85,45 @@ class NXDL_Manager(object):
     nxdl_defaults obj :
         Instance of :class:`punx.nxdl_schema.NXDL_Summary()` or ``None``.
         If not ``None``, default values for all NXDL as defined by the ``nxdl.xsd``.
+        (The ``simpleType`` patterns, such as *validItemName*, are found here.)
+
+    from_snapshot bool :
+        ``True`` if ``classes`` and ``nxdl_defaults`` are loaded from
+        the snapshot file (``SNAPSHOT_FILE_NAME``) in the file set directory.
+
+    xml_schema obj :
+        The compiled ``nxdl.xsd`` of this file set (``lxml.etree.XMLSchema``),
+        used to validate each NXDL file.
+        Each NXDL file proven valid is recorded (by its content digest) in
+        file ``VALID_NXDL_FILE_NAME`` in the file set directory.
+        A recorded file is not validated again unless it (or the
+        XML Schema) changes.
+
+    PARAMETERS
+
+    file_set obj or str :
+        Instance of :class:`~punx.cache_manager.NXDL_File_Set()`,
+        name of a file set, or ``None`` (for the default file set).
+    use_snapshot bool :
+        If ``True`` (default), load from (or save to) a snapshot of this
+        manager that is kept next to the ``__github_info__.json`` file.
+        The snapshot is rebuilt when the file set ``sha``, the punx version,
+        or any of the NXDL or XML Schema files change.
+        Building the snapshot parses all the NXDL files once.
+        Without a snapshot, each NXDL file is parsed when first used.
+    processes int :
+        Number of worker processes to parse NXDL files when all of them
+        must be parsed (such as when building the snapshot).
+        ``None`` (default) or ``1``: parse in this process, one at a time.
+        The result is the same either way.
     """
 
     nxdl_file_set = None
     nxdl_defaults = None
+    from_snapshot = False
 
-    def __init__(self, file_set=None):
-        if file_set is None:
-            cm = cache_manager.CacheManager()
-            file_set = cm.default_file_set
-        elif isinstance(file_set, str):
-            cm = cache_manager.CacheManager()
-            cm.select_NXDL_file_set(file_set)
-            file_set = cm.default_file_set
-        assert isinstance(file_set, cache_manager.NXDL_File_Set)
+    def __init__(self, file_set=None, use_snapshot=True, processes=None):
+        file_set = get_file_set(file_set)
 
         if file_set.path is None or not os.path.exists(file_set.path):
             msg = "NXDL directory: " + str(file_set.path)
@@ -88,32 +131,32 @@ class NXDL_Manager(object):
             raise FileNotFound(msg)
 
         self.nxdl_file_set = file_set
+        self.processes = processes
+        self._schema_objects = None
+        self._snapshot_index = None
+        self._valid_nxdl = None
+        self._valid_nxdl_changed = False
+        self._xml_attribute_tables = {}
+        self._xml_attribute_keys = {}
+        self._class_specs = {}
+        self._name_classifiers = {}
+        self.classes = NXDL_Class_Dict(self, get_NXDL_file_list(file_set.path))
+        if use_snapshot and self.load_snapshot():
+            return
+
         self.nxdl_defaults = self.get_nxdl_defaults()
-        self.classes = collections.OrderedDict()
-
-        for nxdl_file_name in get_NXDL_file_list(file_set.path):
-            logger.debug("reading NXDL file: " + nxdl_file_name)
-            definition = NXDL__definition(nxdl_manager=self)  # the default
-            definition.set_file(nxdl_file_name)  # defines definition.title
-            self.classes[definition.title] = definition
-            definition.parse_nxdl_xml()
-
-            logger.debug(definition)
-            for j in "attributes groups fields links".split():
-                dd = definition.__getattribute__(j)
-                for k in sorted(dd.keys()):
-                    logger.debug(dd[k])
-            for v in sorted(definition.symbols):
-                logger.debug("symbol: " + v)
-            logger.debug("-" * 50)
+        if use_snapshot and os.access(file_set.path, os.W_OK):
+            if self.save_snapshot():
+                # keep only what is used: read the classes again from the snapshot
+                self.classes.unload_all()
 
     def __str__(self, *args, **kwargs):
         s = "NXDL_Manager("
         count = {}
-        for v in self.classes.values():
-            if v.category not in count:
-                count[v.category] = 0
-            count[v.category] += 1
+        for category in self.classes.categories.values():
+            if category not in count:
+                count[category] = 0
+            count[category] += 1
         args = [k + ":%d" % v for k, v in sorted(count.items())]
         s += ", ".join(args)
         s += ")"
@@ -127,6 +170,1022 @@ class NXDL_Manager(object):
         if os.path.exists(schema_file):
             return nxdl_schema.NXDL_Summary(schema_file)
 
+    def load_definition(self, title):
+        """
+        Return the :class:`NXDL__definition` of the NXDL class ``title``.
+
+        Called by ``classes`` the first time ``title`` is requested.
+        Use the snapshot, if available, otherwise parse the NXDL file.
+        """
+        definition = self._load_definition_from_snapshot(title)
+        if definition is not None:
+            return definition
+        return self.parse_definition(self.classes.file_names[title])
+
+    def parse_definition(self, nxdl_file_name):
+        """Return the :class:`NXDL__definition` parsed from ``nxdl_file_name``."""
+        logger.debug("reading NXDL file: " + nxdl_file_name)
+        definition = NXDL__definition(nxdl_manager=self)  # the default
+        definition.set_file(nxdl_file_name)  # defines definition.title
+        definition.parse_nxdl_xml()
+
+        logger.debug(definition)
+        for j in "attributes groups fields links".split():
+            dd = definition.__getattribute__(j)
+            for k in sorted(dd.keys()):
+                logger.debug(dd[k])
+        for v in sorted(definition.symbols):
+            logger.debug("symbol: " + v)
+        logger.debug("-" * 50)
+        return definition
+
+    def parse_definitions_parallel(self, titles, processes):
+        """
+        Parse the NXDL files of ``titles`` using a pool of worker processes.
+
+        Each worker builds its own (snapshot-free) manager for this file set
+        and returns each parsed :class:`NXDL__definition` pickled by
+        :meth:`dumps_definition()`.  Return an ``OrderedDict`` in the order
+        of ``titles``.
+        """
+        import concurrent.futures
+
+        file_names = [self.classes.file_names[title] for title in titles]
+        logger.debug("parsing %d NXDL files with %d processes", len(titles), processes)
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=processes,
+            initializer=_init_parse_worker,
+            initargs=(self.nxdl_file_set.info,),
+        ) as executor:
+            results = list(executor.map(_parse_worker, file_names))
+
+        definitions = collections.OrderedDict()
+        for title, fname, (blob, digest) in zip(titles, file_names, results):
+            definitions[title] = self.loads_definition(blob)
+            self.record_valid_nxdl(fname, digest)
+        return definitions
+
+    @property
+    def xml_schema(self):
+        """The compiled XML Schema (``nxdl.xsd``) of this file set."""
+        return schema_manager.get_xml_schema(
+            os.path.join(self.nxdl_file_set.path, nxdl_schema.NXDL_XSD_NAME)
+        )
+
+    def validate_nxdl_xml(self, nxdl_file_name, xml_tree, digest):
+        """
+        Validate the NXDL file against the XML Schema of this file set.
+
+        Skip the validation if the file (identified by ``digest``,
+        a digest of its content) has been proven valid before.
+        Raise :class:`~punx.InvalidNxdlFile` if not valid.
+        """
+        if self.is_valid_nxdl(nxdl_file_name, digest):
+            return
+        validate_xml_tree(xml_tree, schema=self.xml_schema)
+        self.record_valid_nxdl(nxdl_file_name, digest)
+
+    @property
+    def valid_nxdl_file(self):
+        """Full path of the file that records the NXDL files proven valid."""
+        return os.path.join(self.nxdl_file_set.path, VALID_NXDL_FILE_NAME)
+
+    def get_valid_nxdl(self):
+        """
+        Return the record of NXDL files proven valid (read when first needed).
+
+        The record is a dictionary with the digest of the XML Schema
+        (``schema``) and the digest of each valid NXDL file (``files``,
+        keyed by name relative to the file set directory).
+        A record made with a different XML Schema is discarded.
+        """
+        if self._valid_nxdl is None:
+            schema_digest = get_schema_digest(self.nxdl_file_set.path)
+            record = None
+            fname = self.valid_nxdl_file
+            if os.path.exists(fname):
+                try:
+                    record = cache_manager.read_json_file(fname)
+                except Exception as exc:
+                    logger.debug("could not read %s: %s", fname, exc)
+            if not isinstance(record, dict) or record.get("schema") != schema_digest:
+                record = dict(schema=schema_digest, files={})
+            self._valid_nxdl = record
+        return self._valid_nxdl
+
+    def is_valid_nxdl(self, nxdl_file_name, digest):
+        """Has this content of ``nxdl_file_name`` been proven valid?"""
+        key = os.path.relpath(nxdl_file_name, self.nxdl_file_set.path)
+        return self.get_valid_nxdl()["files"].get(key) == digest
+
+    def record_valid_nxdl(self, nxdl_file_name, digest):
+        """Remember that this content of ``nxdl_file_name`` is valid."""
+        if digest is None or self.is_valid_nxdl(nxdl_file_name, digest):
+            return
+        key = os.path.relpath(nxdl_file_name, self.nxdl_file_set.path)
+        self.get_valid_nxdl()["files"][key] = digest
+        self._valid_nxdl_changed = True
+
+    def save_valid_nxdl(self):
+        """
+        Write the record of NXDL files proven valid, if it has changed.
+
+        A file set in a read-only directory is not an error.
+        """
+        if not self._valid_nxdl_changed:
+            return False
+        self._valid_nxdl_changed = False  # write (or try to) only once
+        fname = self.valid_nxdl_file
+        try:
+            cache_manager.write_json_file(fname, self._valid_nxdl)
+        except Exception as exc:
+            logger.debug("could not write %s: %s", fname, exc)
+            return False
+        logger.debug("wrote record of valid NXDL files: %s", fname)
+        return True
+
+    @property
+    def snapshot_file(self):
+        """Full path of the snapshot file for this file set."""
+        return os.path.join(self.nxdl_file_set.path, SNAPSHOT_FILE_NAME)
+
+    def snapshot_key(self):
+        """
+        Describe the file set content that the snapshot must match.
+
+        The key includes the file set ``sha``, the punx version, and the
+        name, size, and modification time of each source file.
+        """
+        return dict(
+            format=SNAPSHOT_FORMAT,
+            punx_version=__version__,
+            path=self.nxdl_file_set.path,
+            sha=self.nxdl_file_set.sha,
+            files=get_file_set_fingerprint(self.nxdl_file_set.path),
+        )
+
+    def load_snapshot(self):
+        """
+        Prepare to load ``classes`` and ``nxdl_defaults`` from the snapshot file.
+
+        Only ``nxdl_defaults`` and the index of the NXDL classes are
+        read now.  Each NXDL class is read from the snapshot when first used.
+
+        Return ``True`` if successful, ``False`` if the snapshot is
+        missing, out of date, or cannot be read.
+        """
+        fname = self.snapshot_file
+        if not os.path.exists(fname):
+            return False
+        try:
+            with open(fname, "rb") as fp:
+                if pickle.load(fp) != self.snapshot_key():
+                    logger.debug("NXDL snapshot is out of date: %s", fname)
+                    return False
+                content = pickle.load(fp)
+                offset = fp.tell()
+            st = os.stat(fname)
+        except Exception as exc:
+            logger.debug("could not read NXDL snapshot %s: %s", fname, exc)
+            return False
+        if list(content["index"]) != list(self.classes):
+            logger.debug("NXDL snapshot does not match file set: %s", fname)
+            return False
+
+        self.nxdl_defaults = content["nxdl_defaults"]
+        self._snapshot_index = dict(
+            offset=offset,
+            index=content["index"],
+            stat=(st.st_size, st.st_mtime_ns),
+        )
+        self.from_snapshot = True
+        logger.debug("loaded NXDL snapshot index: %s", fname)
+        return True
+
+    def save_snapshot(self):
+        """
+        Write ``classes`` and ``nxdl_defaults`` to the snapshot file.
+
+        All NXDL classes are loaded first.  Each NXDL class is pickled
+        separately so it can be loaded on its own.  Once written,
+        classes not yet loaded are read from the new snapshot.
+        The file is written to a temporary file first, then renamed.
+        A file set in a read-only directory is not an error.
+        """
+        fname = self.snapshot_file
+        self.classes.load_all(processes=self.processes)
+
+        index = collections.OrderedDict()
+        blobs = []
+        offset = 0
+        for title, definition in self.classes.items():
+            blob = self.dumps_definition(definition)
+            index[title] = (offset, len(blob))
+            offset += len(blob)
+            blobs.append(blob)
+
+        tmp_name = None
+        try:
+            fd, tmp_name = tempfile.mkstemp(
+                dir=self.nxdl_file_set.path, suffix=".tmp"
+            )
+            with os.fdopen(fd, "wb") as fp:
+                pickle.dump(self.snapshot_key(), fp, pickle.HIGHEST_PROTOCOL)
+                pickle.dump(
+                    dict(nxdl_defaults=self.nxdl_defaults, index=index),
+                    fp,
+                    pickle.HIGHEST_PROTOCOL,
+                )
+                blobs_offset = fp.tell()
+                for blob in blobs:
+                    fp.write(blob)
+            os.chmod(tmp_name, 0o644)  # mkstemp() creates it user-only
+            os.replace(tmp_name, fname)
+            st = os.stat(fname)
+        except Exception as exc:
+            logger.debug("could not write NXDL snapshot %s: %s", fname, exc)
+            if tmp_name is not None and os.path.exists(tmp_name):
+                os.remove(tmp_name)
+            return False
+        self._snapshot_index = dict(
+            offset=blobs_offset,
+            index=index,
+            stat=(st.st_size, st.st_mtime_ns),
+        )
+        logger.debug("wrote NXDL snapshot: %s", fname)
+        return True
+
+    def _load_definition_from_snapshot(self, title):
+        """internal: return the NXDL class from the snapshot or ``None``"""
+        if self._snapshot_index is None or title not in self._snapshot_index["index"]:
+            return None
+        fname = self.snapshot_file
+        position, length = self._snapshot_index["index"][title]
+        try:
+            with open(fname, "rb") as fp:
+                st = os.stat(fp.fileno())
+                if (st.st_size, st.st_mtime_ns) != self._snapshot_index["stat"]:
+                    raise IOError("snapshot file has been replaced")
+                fp.seek(self._snapshot_index["offset"] + position)
+                blob = fp.read(length)
+            return self.loads_definition(blob)
+        except Exception as exc:
+            logger.debug("could not read %s from NXDL snapshot %s: %s", title, fname, exc)
+            self._snapshot_index = None  # do not try again
+            return None
+
+    @property
+    def schema_objects(self):
+        """
+        List of the objects in ``nxdl_defaults``, in a repeatable order.
+
+        NXDL structures share these objects.  A pickled NXDL structure
+        refers to them by their position in this list.
+        """
+        if self._schema_objects is None:
+            self._schema_objects = _walk_schema_objects(self.nxdl_defaults)
+        return self._schema_objects
+
+    def get_xml_attributes(self, defaults, overrides=()):
+        """
+        Return the table of XML attributes (and their defaults) of an NXDL element.
+
+        NXDL structures of the same kind share the same table,
+        which must not be changed.
+
+        PARAMETERS
+
+        defaults obj:
+            Instance of nxdl_schema.NXDL_schema__element (from ``nxdl_defaults``).
+        overrides tuple:
+            ``(key, default_value)`` pairs: these XML attributes have
+            different default values in this table.
+        """
+        key = (id(defaults), overrides)
+        table = self._xml_attribute_tables.get(key)
+        if table is None:
+            table = {}
+            for k, v in sorted(defaults.attributes.items()):
+                table[k] = v
+            for k, value in overrides:
+                xml_attribute = copy.copy(table[k])
+                xml_attribute.default_value = value
+                table[k] = xml_attribute
+            self._xml_attribute_tables[key] = table
+            self._xml_attribute_keys[id(table)] = (table, defaults, overrides)
+        return table
+
+    def override_xml_attributes(self, table, key, value):
+        """
+        Return the table of XML attributes like ``table`` but with a different default ``value`` of ``key``.
+
+        ``table`` is from :meth:`get_xml_attributes()`.
+        """
+        _table, defaults, overrides = self._xml_attribute_keys[id(table)]
+        overrides = tuple(o for o in overrides if o[0] != key) + ((key, value),)
+        return self.get_xml_attributes(defaults, overrides)
+
+    def get_class_spec(self, nx_class):
+        """
+        Return the :class:`NXDL_Class_Spec` of NXDL class ``nx_class``.
+
+        The NXDL rules for a NeXus group depend only on its NeXus class,
+        the last part of its classpath (such as ``NXdetector`` in
+        ``/NXentry/NXinstrument/NXdetector``).
+        Each spec is compiled once, when first requested.
+        An unknown ``nx_class`` has a spec with ``known=False``.
+        """
+        spec = self._class_specs.get(nx_class)
+        if spec is None:
+            spec = NXDL_Class_Spec(nx_class, self.classes.get(nx_class))
+            self._class_specs[nx_class] = spec
+        return spec
+
+    def get_name_classifier(self, key, get_patterns):
+        """
+        Return the :class:`Name_Classifier` for ``key`` (such as *validItemName*).
+
+        The classifier is made once, from the patterns returned
+        by ``get_patterns()``, and then kept with this manager
+        (with its memory of names already classified).
+        """
+        classifier = self._name_classifiers.get(key)
+        if classifier is None:
+            classifier = Name_Classifier(get_patterns())
+            self._name_classifiers[key] = classifier
+        return classifier
+
+    def dumps_definition(self, definition):
+        """Return ``definition`` pickled (as ``bytes``) without shared objects."""
+        buf = io.BytesIO()
+        _SnapshotPickler(buf, self).dump(definition)
+        return buf.getvalue()
+
+    def loads_definition(self, blob):
+        """Return the NXDL structure pickled by ``dumps_definition()``."""
+        return _SnapshotUnpickler(io.BytesIO(blob), self).load()
+
+
+class NXDL_Class_Dict(collections.OrderedDict):
+
+    """
+    Dictionary of NXDL classes that loads each class when first accessed.
+
+    The names (titles), categories, and file names of all NXDL classes
+    are known when created.  The :class:`NXDL__definition` of a class is
+    loaded (by the manager) only when the class is first requested.
+    Methods that return all the values (such as ``values()`` and
+    ``items()``) load all the classes first.
+
+    PARAMETERS
+
+    nxdl_manager obj :
+        Instance of :class:`~punx.nxdl_manager.NXDL_Manager()`.
+    nxdl_file_list [str] :
+        Absolute path of each NXDL file, from :func:`get_NXDL_file_list()`.
+
+    .. autosummary::
+
+       ~is_loaded
+       ~load_all
+       ~unload_all
+    """
+
+    def __init__(self, nxdl_manager, nxdl_file_list):
+        collections.OrderedDict.__init__(self)
+        self.nxdl_manager = nxdl_manager
+        self.categories = collections.OrderedDict()
+        self.file_names = collections.OrderedDict()
+        self._lock = threading.RLock()
+        self._loading_all = False
+        for fname in nxdl_file_list:
+            title = os.path.split(fname)[-1].split(".")[0]
+            self.categories[title] = os.path.split(os.path.dirname(fname))[-1]
+            self.file_names[title] = fname
+            collections.OrderedDict.__setitem__(self, title, None)
+
+    def __getitem__(self, title):
+        definition = collections.OrderedDict.__getitem__(self, title)
+        if definition is None:
+            with self._lock:
+                definition = collections.OrderedDict.__getitem__(self, title)
+                if definition is None:
+                    definition = self.nxdl_manager.load_definition(title)
+                    collections.OrderedDict.__setitem__(self, title, definition)
+                    if not self._loading_all:
+                        self.nxdl_manager.save_valid_nxdl()
+        return definition
+
+    def __eq__(self, other):
+        self.load_all()
+        return collections.OrderedDict.__eq__(self, other)
+
+    __hash__ = None
+
+    def __repr__(self):
+        self.load_all()
+        return collections.OrderedDict.__repr__(self)
+
+    def copy(self):
+        self.load_all()
+        return collections.OrderedDict(self.items())
+
+    def get(self, title, default=None):
+        if title in self:
+            return self[title]
+        return default
+
+    def is_loaded(self, title):
+        """Has the NXDL class ``title`` been loaded?"""
+        return collections.OrderedDict.get(self, title) is not None
+
+    def items(self):
+        self.load_all()
+        return collections.OrderedDict.items(self)
+
+    def load_all(self, processes=None):
+        """
+        Load all NXDL classes not yet loaded.
+
+        processes int :
+            If more than ``1``, parse NXDL files with this many worker
+            processes (see :meth:`NXDL_Manager.parse_definitions_parallel()`).
+        """
+        with self._lock:
+            titles = [title for title in self if not self.is_loaded(title)]
+            self._loading_all = True
+            try:
+                if processes is not None and processes > 1 and len(titles) > 1:
+                    parsed = self.nxdl_manager.parse_definitions_parallel(titles, processes)
+                    for title, definition in parsed.items():
+                        collections.OrderedDict.__setitem__(self, title, definition)
+                for title in titles:
+                    self[title]
+            finally:
+                self._loading_all = False
+            self.nxdl_manager.save_valid_nxdl()
+
+    def unload_all(self):
+        """
+        Forget all loaded NXDL classes.
+
+        Each is loaded again (by the manager) when next requested.
+        """
+        with self._lock:
+            for title in self:
+                collections.OrderedDict.__setitem__(self, title, None)
+
+    def pop(self, title, *args):
+        if title in self:
+            self[title]
+        return collections.OrderedDict.pop(self, title, *args)
+
+    def setdefault(self, title, default=None):
+        if title in self:
+            return self[title]
+        return collections.OrderedDict.setdefault(self, title, default)
+
+    def values(self):
+        self.load_all()
+        return collections.OrderedDict.values(self)
+
+
+class NXDL_Manager_Registry(object):
+
+    """
+    Thread-safe registry of shared :class:`NXDL_Manager` instances.
+
+    There is one manager for each file set, identified by its
+    ``ref``, ``sha``, and ``path``.  The manager is created when first
+    requested.  Later requests (from any thread) get the same manager,
+    which must be treated as read-only.  While a manager is created,
+    only the requests for the same file set wait.
+
+    PARAMETERS
+
+    max_managers int :
+        Keep at most this many managers, discarding the least recently
+        used one(s).  ``None`` (default): no limit.
+
+    .. autosummary::
+
+       ~get
+       ~set_max_managers
+       ~clear
+    """
+
+    def __init__(self, max_managers=None):
+        self.max_managers = max_managers
+        self._managers = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks = {}  # one for each file set, held while its manager is created
+
+    def __contains__(self, file_set):
+        return self._key(get_file_set(file_set)) in self._managers
+
+    def __len__(self):
+        return len(self._managers)
+
+    @staticmethod
+    def _key(file_set):
+        return (file_set.ref, file_set.sha, file_set.path)
+
+    def _discard_extra_managers(self):
+        """internal: discard least recently used managers over the limit"""
+        while self.max_managers is not None and len(self._managers) > self.max_managers:
+            key, _manager = self._managers.popitem(last=False)
+            logger.debug("discard shared NXDL_Manager: %s", str(key))
+
+    def get(self, file_set=None):
+        """
+        Return the shared :class:`NXDL_Manager` of ``file_set``.
+
+        file_set obj or str :
+            Instance of :class:`~punx.cache_manager.NXDL_File_Set()`,
+            name of a file set, or ``None`` (for the default file set).
+        """
+        file_set = get_file_set(file_set)
+        key = self._key(file_set)
+        with self._lock:
+            manager = self._managers.get(key)
+            if manager is not None:
+                self._managers.move_to_end(key)
+                return manager
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            with self._lock:
+                manager = self._managers.get(key)  # created while waiting?
+            if manager is None:
+                logger.debug("create shared NXDL_Manager: %s", str(key))
+                manager = NXDL_Manager(file_set)
+            with self._lock:
+                self._managers[key] = manager
+                self._managers.move_to_end(key)
+                self._discard_extra_managers()
+        return manager
+
+    def set_max_managers(self, max_managers):
+        """Change the limit on the number of managers (``None``: no limit)."""
+        with self._lock:
+            self.max_managers = max_managers
+            self._discard_extra_managers()
+
+    def clear(self):
+        """Discard all managers."""
+        with self._lock:
+            self._managers.clear()
+
+
+manager_registry = NXDL_Manager_Registry()
+
+
+def get_shared_manager(file_set=None):
+    """
+    Return the shared (read-only) :class:`NXDL_Manager` of ``file_set``.
+
+    See :class:`NXDL_Manager_Registry`.
+    """
+    return manager_registry.get(file_set)
+
+
+class NXDL_Items_Spec(object):
+
+    """
+    Names of the items of an NXDL class (or group), compiled for validation.
+
+    Attributes
+
+    attributes, fields, groups, links frozenset :
+        Names of the items defined.
+    field_names tuple :
+        Names of the fields, in the order of the NXDL file.
+    required_fields, required_groups frozenset :
+        Names of the fields and groups with ``minOccurs > 0``.
+    attribute_enumerations, field_enumerations dict :
+        Allowed values (``frozenset``) of the attributes and fields
+        that have an enumeration, keyed by name.
+    enumeration_lists dict :
+        Allowed values (``tuple``, in the order of the NXDL file)
+        of the fields that have an enumeration, keyed by name.
+    """
+
+    __slots__ = (
+        "attributes",
+        "fields",
+        "groups",
+        "links",
+        "field_names",
+        "required_fields",
+        "required_groups",
+        "attribute_enumerations",
+        "field_enumerations",
+        "enumeration_lists",
+    )
+
+    def __init__(self, nxdl_group=None):
+        attributes = getattr(nxdl_group, "attributes", {})
+        fields = getattr(nxdl_group, "fields", {})
+        groups = getattr(nxdl_group, "groups", {})
+        links = getattr(nxdl_group, "links", {})
+
+        self.attributes = frozenset(attributes)
+        self.fields = frozenset(fields)
+        self.groups = frozenset(groups)
+        self.links = frozenset(links)
+        self.field_names = tuple(fields)
+        self.required_fields = frozenset(
+            k
+            for k, v in fields.items()
+            if int(v.xml_attributes["minOccurs"].default_value or 0) > 0
+        )
+        self.required_groups = frozenset(
+            k for k, v in groups.items() if v.minOccurs > 0
+        )
+        self.attribute_enumerations = {
+            k: frozenset(v.enumerations)
+            for k, v in attributes.items()
+            if len(v.enumerations) > 0
+        }
+        self.enumeration_lists = {
+            k: tuple(v.enumerations)
+            for k, v in fields.items()
+            if len(v.enumerations) > 0
+        }
+        self.field_enumerations = {
+            k: frozenset(v) for k, v in self.enumeration_lists.items()
+        }
+
+    def __str__(self, *args, **kwargs):
+        return nxdl_schema.render_class_str(self)
+
+
+class NXDL_Class_Spec(NXDL_Items_Spec):
+
+    """
+    Facts about one NXDL class, compiled for validation.
+
+    Get these from :meth:`NXDL_Manager.get_class_spec()`.
+    The names of its items are as :class:`NXDL_Items_Spec`.
+
+    Attributes
+
+    nx_class str :
+        Name of the NXDL class.
+    nxdl obj :
+        Instance of :class:`NXDL__definition` (``None`` if not known).
+    known bool :
+        Is ``nx_class`` defined in the file set?
+    category str :
+        base_classes | applications | contributed_definitions (``None`` if not known).
+    is_base_class bool :
+        Is this NXDL intended for use as a base class?
+        (see :func:`is_base_class()`)
+    used_as_base_class bool :
+        May this NXDL be used as a base class (NeXus group) in a data file?
+        (see :func:`used_as_base_class()`)
+    entry obj :
+        :class:`NXDL_Items_Spec` of the (first) group of an application
+        (or contributed) definition, its ``NXentry`` (``None`` if no group).
+    """
+
+    __slots__ = (
+        "nx_class",
+        "nxdl",
+        "known",
+        "category",
+        "is_base_class",
+        "used_as_base_class",
+        "entry",
+    )
+
+    def __init__(self, nx_class, nxdl=None):
+        super().__init__(nxdl)
+        self.nx_class = nx_class
+        self.nxdl = nxdl
+        self.known = nxdl is not None
+        self.entry = None
+        if nxdl is None:
+            self.category = None
+            self.is_base_class = False
+            self.used_as_base_class = False
+        else:
+            self.category = nxdl.category
+            self.is_base_class = is_base_class(nxdl)
+            self.used_as_base_class = used_as_base_class(nxdl)
+            if not self.is_base_class and len(nxdl.groups) > 0:
+                self.entry = NXDL_Items_Spec(next(iter(nxdl.groups.values())))
+
+
+class Name_Classifier(object):
+
+    """
+    Classify names by the first of several regular expressions each matches.
+
+    All the regular expressions are compiled together, as alternatives,
+    so a name is classified with one match.  The verdict for recently
+    classified names is remembered.
+
+    PARAMETERS
+
+    patterns dict :
+        Regular expressions (values), in the order to be tried, keyed by
+        the description (key) to be reported for a name that matches.
+    cache_size int :
+        Remember the verdict for (at most) this many names.
+
+    .. autosummary::
+
+       ~classify
+    """
+
+    def __init__(self, patterns, cache_size=10000):
+        self.patterns = collections.OrderedDict(patterns)
+        self.keys = list(self.patterns.keys())
+        expression = "|".join(
+            "(?P<k%d>%s)" % (i, p) for i, p in enumerate(self.patterns.values())
+        )
+        self.regexp = re.compile("^(?:" + expression + ")$")
+        self.classify = functools.lru_cache(maxsize=cache_size)(self._classify)
+
+    def _classify(self, name):
+        """Return the key of the first pattern that matches ``name``, or ``None``."""
+        m = self.regexp.match(name)
+        if m is None:
+            return None
+        for i, key in enumerate(self.keys):
+            if m.group("k%d" % i) is not None:
+                return key
+
+
+def is_base_class(nxdl):
+    """
+    Is the given NXDL intended for use as a base class?
+
+    The situation is obvious for base classes and application definitions.
+    For contributed definitions, deeper analysis is necessary.
+    Application definitions define this additional substructure::
+
+      entry/
+       definition = nxdl name (such as NXspecdata)
+
+    If any of that structure is missing, report it as a base class.
+
+    PARAMETERS
+
+    nxdl obj:
+        Instance of :class:`NXDL__definition`.
+    """
+    if nxdl.category == "base_classes":
+        return True
+    elif nxdl.category == "applications":
+        return False
+    elif nxdl.category == "contributed_definitions":
+        nxentry = nxdl.groups.get("entry")
+        if nxentry is None:
+            return True
+        definition = nxentry.fields.get("definition")
+        return definition is None
+    return False
+
+
+def used_as_base_class(nxdl):
+    """
+    May the given NXDL be used as a base class (a NeXus group in a data file)?
+
+    NXDL specifications in the contributed definitions directory
+    could be intended as either a base class or an
+    application definition.  NeXus provides no easy identifier
+    for this difference.  The most obvious distinction between
+    them is the presence of the `definition` field
+    in the `NXentry` group of an application definition.
+    This field is not present in base classes.
+
+    PARAMETERS
+
+    nxdl obj:
+        Instance of :class:`NXDL__definition`.
+    """
+    if nxdl.category == "applications":
+        return False
+    if nxdl.category == "base_classes":
+        return True
+    # now, need to work at it a bit
+    # *Should* only be one NXentry group but that is not a rule.
+    if (
+        len(nxdl.fields) == 0
+        and len(nxdl.links) == 0
+        and len(nxdl.groups) == 1
+    ):  # maybe ...
+        entry_group = list(nxdl.groups.values())[0]
+        # TODO: test entry_group.NX_class == "NXentry" but that attribute is not ready yet!
+        # assume OK
+        return "definition" not in entry_group.fields
+    return True
+
+
+class _SnapshotPickler(pickle.Pickler):
+    """
+    internal: pickle NXDL structures without the objects they share
+
+    Each NXDL structure refers back to its manager, which holds
+    the file set (not suitable for pickling), and to the default
+    values in ``nxdl_defaults``.  Replace those references with tokens.
+    """
+
+    def __init__(self, fp, nxdl_manager):
+        pickle.Pickler.__init__(self, fp, pickle.HIGHEST_PROTOCOL)
+        self.nxdl_manager = nxdl_manager
+        self.schema_ids = {
+            id(obj): i for i, obj in enumerate(nxdl_manager.schema_objects)
+        }
+
+    def persistent_id(self, obj):
+        if obj is self.nxdl_manager:
+            return "nxdl_manager"
+        if id(obj) in self.schema_ids:
+            return self.schema_ids[id(obj)]
+        if id(obj) in self.nxdl_manager._xml_attribute_keys:
+            table, defaults, overrides = self.nxdl_manager._xml_attribute_keys[id(obj)]
+            if table is obj and id(defaults) in self.schema_ids:
+                return ("xml_attributes", self.schema_ids[id(defaults)], overrides)
+        return None
+
+
+class _SnapshotUnpickler(pickle.Unpickler):
+    """internal: restore the references replaced by _SnapshotPickler"""
+
+    def __init__(self, fp, nxdl_manager):
+        pickle.Unpickler.__init__(self, fp)
+        self.nxdl_manager = nxdl_manager
+
+    def persistent_load(self, pid):
+        if pid == "nxdl_manager":
+            return self.nxdl_manager
+        if isinstance(pid, int):
+            return self.nxdl_manager.schema_objects[pid]
+        if isinstance(pid, tuple) and pid[0] == "xml_attributes":
+            defaults = self.nxdl_manager.schema_objects[pid[1]]
+            return self.nxdl_manager.get_xml_attributes(defaults, pid[2])
+        raise pickle.UnpicklingError("unknown persistent id: " + str(pid))
+
+
+_worker_manager = None
+
+
+def _init_parse_worker(info_file):
+    """internal: prepare a process of the pool used by parse_definitions_parallel()"""
+    global _worker_manager
+
+    file_set = cache_manager.NXDL_File_Set()
+    file_set.read_info_file(info_file)
+    _worker_manager = NXDL_Manager(file_set, use_snapshot=False)
+
+
+def _parse_worker(nxdl_file_name):
+    """
+    internal: parse one NXDL file in a worker process
+
+    Return the parsed NXDL file (pickled) and the digest of its
+    (valid) content, to be recorded by the parent process.
+    """
+    definition = _worker_manager.parse_definition(nxdl_file_name)
+    key = os.path.relpath(nxdl_file_name, _worker_manager.nxdl_file_set.path)
+    digest = _worker_manager.get_valid_nxdl()["files"].get(key)
+    return _worker_manager.dumps_definition(definition), digest
+
+
+def _walk_schema_objects(nxdl_defaults):
+    """internal: list the NXDL_schema objects of an NXDL_Summary, depth first"""
+    objects = []
+    known = set()
+
+    def walk(value):
+        if isinstance(value, nxdl_schema.NXDL_schema__Mixin):
+            if id(value) in known:
+                return
+            known.add(id(value))
+            objects.append(value)
+            walk(value.__dict__)
+        elif isinstance(value, dict):
+            for v in value.values():
+                walk(v)
+        elif isinstance(value, (list, tuple)):
+            for v in value:
+                walk(v)
+
+    walk(nxdl_defaults.__dict__)
+    return objects
+
+
+def get_file_set(file_set=None):
+    """
+    Return the :class:`~punx.cache_manager.NXDL_File_Set()` of ``file_set``.
+
+    Raise ``KeyError`` if the named file set is not known.
+
+    PARAMETERS
+
+    file_set obj or str :
+        Instance of :class:`~punx.cache_manager.NXDL_File_Set()`,
+        name of a file set (also selected as the default file set),
+        or ``None`` (for the default file set).
+    """
+    if file_set is None:
+        cm = cache_manager.CacheManager()
+        file_set = cm.default_file_set
+    elif isinstance(file_set, str):
+        cm = cache_manager.CacheManager()
+        cm.select_NXDL_file_set(file_set)
+        file_set = cm.default_file_set
+    assert isinstance(file_set, cache_manager.NXDL_File_Set)
+    return file_set
+
+
+def get_file_set_fingerprint(nxdl_dir):
+    """
+    Return a list describing each source file of a file set.
+
+    Each item is ``[relative_name, size, mtime_ns]``.  If any source
+    file changes, the list changes.
+
+    PARAMETERS
+
+    nxdl_dir str:
+        Absolute path to the directory of a ``file_set`` (defined above).
+    """
+    file_list = [
+        os.path.join(nxdl_dir, nm)
+        for nm in (nxdl_schema.NXDL_XSD_NAME, "nxdlTypes.xsd")
+    ]
+    file_list += get_NXDL_file_list(nxdl_dir)
+    fingerprint = []
+    for fname in file_list:
+        if os.path.exists(fname):
+            st = os.stat(fname)
+            fingerprint.append(
+                [os.path.relpath(fname, nxdl_dir), st.st_size, st.st_mtime_ns]
+            )
+    return fingerprint
+
+
+def get_content_digest(content):
+    """Return a digest (hexadecimal ``str``) of ``content`` (``bytes``)."""
+    return hashlib.sha256(content).hexdigest()
+
+
+def get_schema_digest(nxdl_dir):
+    """
+    Return a digest of the XML Schema files of a file set.
+
+    PARAMETERS
+
+    nxdl_dir str:
+        Absolute path to the directory of a ``file_set`` (defined above).
+    """
+    digest = hashlib.sha256()
+    for nm in (nxdl_schema.NXDL_XSD_NAME, "nxdlTypes.xsd"):
+        fname = os.path.join(nxdl_dir, nm)
+        if os.path.exists(fname):
+            with open(fname, "rb") as fp:
+                digest.update(fp.read())
+    return digest.hexdigest()
+
+
+def get_nxdl_doc(nxdl_file_name, xml_tag, sourceline):
+    """
+    Return the documentation of an NXDL element, read from the NXDL file.
+
+    Return ``None`` if the element has no ``<doc>``.
+
+    PARAMETERS
+
+    nxdl_file_name str:
+        Absolute path to the NXDL file.
+    xml_tag str:
+        Name of the NXDL element (such as *field* or *group*).
+    sourceline int:
+        Line number of the NXDL element in the NXDL file.
+    """
+    st = os.stat(nxdl_file_name)
+    docs = _get_nxdl_docs(nxdl_file_name, st.st_mtime_ns)
+    return docs.get((xml_tag, sourceline))
+
+
+@functools.lru_cache(maxsize=8)
+def _get_nxdl_docs(nxdl_file_name, mtime_ns):
+    """internal: dictionary of the documentation in an NXDL file"""
+    ns = nxdl_schema.get_xml_namespace_dictionary()
+    docs = {}
+    for node in lxml.etree.parse(nxdl_file_name).iter():
+        if not isinstance(node.tag, str):
+            continue  # such as a comment
+        key = (node.tag.split("}")[-1], node.sourceline)
+        doc_nodes = node.xpath("nx:doc", namespaces=ns)
+        if key not in docs and len(doc_nodes) > 0:
+            docs[key] = "".join(doc_nodes[0].itertext()).strip()
+    return docs
+
 
 def get_NXDL_file_list(nxdl_dir):
     """
@@ -158,15 +1217,16 @@ def get_NXDL_file_list(nxdl_dir):
     return nxdl_file_list
 
 
-def validate_xml_tree(xml_tree):
+def validate_xml_tree(xml_tree, schema=None):
     """
     Validate an NXDL XML file against its NeXus NXDL XML Schema file.
 
-    :param str xml_file_name: name of XML file
+    :param obj xml_tree: parsed XML file (``lxml.etree`` tree or element)
+    :param obj schema: compiled XML Schema (``lxml.etree.XMLSchema``),
+        default: the XML Schema of the default file set
     """
-    from . import schema_manager
-
-    schema = schema_manager.get_default_schema_manager().lxml_schema
+    if schema is None:
+        schema = schema_manager.get_default_schema_manager().lxml_schema
     try:
         result = schema.assertValid(xml_tree)
     except lxml.etree.DocumentInvalid as exc:
@@ -179,16 +1239,32 @@ class NXDL__base(object):
 
     """
     Base class for each NXDL structure.
+
+    There are many of these, so each subclass lists its
+    attributes in ``__slots__``.  The table of ``xml_attributes`` is
+    shared (see :meth:`NXDL_Manager.get_xml_attributes()`) and the
+    documentation is read from the NXDL file when requested (``doc``).
     """
 
+    __slots__ = ("name", "nxdl_definition", "xml_attributes", "sourceline")
+    xml_tag = None  # name of the NXDL XML element
+
     def __init__(self, nxdl_definition, *args, **kwargs):
         self.name = None
         self.nxdl_definition = nxdl_definition
         self.xml_attributes = {}
+        self.sourceline = None  # line number of XML element in NXDL file
 
     def __str__(self, *args, **kwargs):
         return nxdl_schema.render_class_str(self)
 
+    @property
+    def doc(self):
+        """Documentation of this structure (``None`` if not available)."""
+        if self.sourceline is None:
+            return None
+        return get_nxdl_doc(self.nxdl_definition.file_name, self.xml_tag, self.sourceline)
+
     def parse_nxdl_xml(self, *args, **kwargs):
         """Parse the XML node and assemble NXDL structure."""
         raise NotImplementedError("must override parse_nxdl_xml() in subclass")
@@ -202,8 +1278,20 @@ class NXDL__base(object):
         defaults obj:
             Instance of nxdl_schema.NXDL_schema__element.
         """
-        for k, v in sorted(defaults.attributes.items()):
-            self.xml_attributes[k] = v
+        manager = self.nxdl_definition.nxdl_manager
+        self.xml_attributes = manager.get_xml_attributes(defaults)
+
+    def override_xml_attribute_default(self, key, value):
+        """
+        Change the default value of XML attribute ``key`` for this structure only.
+
+        The ``xml_attributes`` table is shared with other structures,
+        so use a table with this change.
+        """
+        manager = self.nxdl_definition.nxdl_manager
+        self.xml_attributes = manager.override_xml_attributes(
+            self.xml_attributes, key, value
+        )
 
     def parse_attributes(self, xml_node):
         """
@@ -227,7 +1315,7 @@ class NXDL__base(object):
             if self.nxdl_definition.category in ("applications",):
                 # handle contributed definitions as base classes (for now, minOccurs = 0)
                 # TODO: test for hasattr(base class, "definition")
-                obj.xml_attributes["optional"].default_value = False
+                obj.override_xml_attribute_default("optional", False)
 
             # Does a default already exist?
             if obj.name in self.attributes:
@@ -256,7 +1344,7 @@ class NXDL__base(object):
 
             if self.nxdl_definition.category in ("applications",):
                 # handle contributed definitions as base classes (for now, minOccurs = 0)
-                obj.xml_attributes["minOccurs"].default_value = 1
+                obj.override_xml_attribute_default("minOccurs", 1)
 
             self.ensure_unique_name(obj)
             self.fields[obj.name] = obj
@@ -280,7 +1368,7 @@ class NXDL__base(object):
 
             if self.nxdl_definition.category in ("applications",):
                 # handle contributed definitions as base classes (for now, minOccurs = 0)
-                obj.xml_attributes["minOccurs"].default_value = 1
+                obj.override_xml_attribute_default("minOccurs", 1)
 
             self.ensure_unique_name(obj)
             self.groups[obj.name] = obj
@@ -355,7 +1443,12 @@ class NXDL__base(object):
             obj.name = base_name + str(index)
 
     def assign_defaults(self):
-        """Set default values for required components now."""
+        """
+        Set default values for required components now.
+
+        Each required XML attribute (of the NXDL schema) must be in
+        the ``__slots__`` of the subclass (``AttributeError`` if not).
+        """
         # FIXME: Clarify. The specific intent of this method is ambiguous.
         for k, v in sorted(self.xml_attributes.items()):
             if v.required and not hasattr(self, k):
@@ -371,9 +1464,12 @@ class NXDL__definition(NXDL__base):  # lgtm [py/missing-call-to-init]
         Instance of :class:`~punx.nxdl_manager.NXDL_Manager()`.
     """
 
+    xml_tag = "definition"
+
     def __init__(self, nxdl_manager=None, *args, **kwargs):
         self.nxdl_definition = self
         self.nxdl_manager = nxdl_manager
+        self.sourceline = None
         self.nxdl_path = self.nxdl_manager.nxdl_file_set.path
 
         # shortcut: absolute path to NXDL definitions directory
@@ -392,7 +1488,7 @@ class NXDL__definition(NXDL__base):  # lgtm [py/missing-call-to-init]
         self.links = {}
         self.symbols = []
 
-        nxdl_defaults = nxdl_manager.get_nxdl_defaults()
+        nxdl_defaults = nxdl_manager.nxdl_defaults or nxdl_manager.get_nxdl_defaults()
         self._init_defaults_from_schema(nxdl_defaults)
 
     def __str__(self, *args, **kwargs):
@@ -437,10 +1533,14 @@ class NXDL__definition(NXDL__base):  # lgtm [py/missing-call-to-init]
             logger.error(msg)
             raise FileNotFound(msg)
 
-        lxml_tree = lxml.etree.parse(self.file_name)
+        with open(self.file_name, "rb") as fp:
+            content = fp.read()
+        lxml_tree = lxml.etree.parse(io.BytesIO(content), base_url=self.file_name)
 
         try:
-            validate_xml_tree(lxml_tree)
+            self.nxdl_manager.validate_nxdl_xml(
+                self.file_name, lxml_tree, get_content_digest(content)
+            )
         except InvalidNxdlFile as exc:
             msg = "NXDL file is not valid: " + self.file_name
             msg += "\n" + str(exc)
@@ -448,6 +1548,7 @@ class NXDL__definition(NXDL__base):  # lgtm [py/missing-call-to-init]
             raise InvalidNxdlFile(msg)
 
         root_node = lxml_tree.getroot()
+        self.sourceline = root_node.sourceline
 
         # parse the XML content of this NXDL definition element
         self.parse_symbols(root_node)
@@ -465,6 +1566,9 @@ class NXDL__attribute(NXDL__base):
     ~parse_nxdl_xml
     """
 
+    __slots__ = ("enumerations",)
+    xml_tag = "attribute"
+
     def __init__(self, nxdl_definition, nxdl_defaults=None, *args, **kwargs):
         NXDL__base.__init__(self, nxdl_definition)
 
@@ -488,6 +1592,7 @@ class NXDL__attribute(NXDL__base):
         parse the XML content
         """
         self.name = xml_node.attrib["name"]
+        self.sourceline = xml_node.sourceline
 
         ns = nxdl_schema.get_xml_namespace_dictionary()
 
@@ -504,6 +1609,9 @@ class NXDL__dim(NXDL__base):
     Contents of a *dim* structure (XML element) in a NXDL XML file.
     """
 
+    __slots__ = ("index", "value", "ref", "refindex", "incr")
+    xml_tag = "dim"
+
     def __init__(self, nxdl_definition, nxdl_defaults=None, *args, **kwargs):
         NXDL__base.__init__(self, nxdl_definition)
         self._init_defaults_from_schema(nxdl_defaults)
@@ -521,6 +1629,7 @@ class NXDL__dim(NXDL__base):
         for k in "index value ref refindex incr".split():
             self.__setattr__(k, xml_node.attrib.get(k))
         self.name = self.index
+        self.sourceline = xml_node.sourceline
 
 
 class NXDL__dimensions(NXDL__base):
@@ -529,6 +1638,9 @@ class NXDL__dimensions(NXDL__base):
     Contents of a *dimensions* structure (XML element) in a NXDL XML file.
     """
 
+    __slots__ = ("rank", "dims")
+    xml_tag = "dimensions"
+
     def __init__(self, nxdl_definition, nxdl_defaults=None, *args, **kwargs):
         NXDL__base.__init__(self, nxdl_definition)
 
@@ -553,6 +1665,7 @@ class NXDL__dimensions(NXDL__base):
         self.rank = xml_node.attrib.get(
             "rank"
         )
+        self.sourceline = xml_node.sourceline
         for node in xml_node.xpath("nx:dim", namespaces=ns):
             obj = NXDL__dim(self.nxdl_definition, nxdl_defaults=nxdl_defaults)
             obj.parse_nxdl_xml(node)
@@ -565,6 +1678,9 @@ class NXDL__field(NXDL__base):
     Contents of a *field* structure (XML element) in a NXDL XML file.
     """
 
+    __slots__ = ("attributes", "dimensions", "enumerations")
+    xml_tag = "field"
+
     def __init__(self, nxdl_definition, nxdl_defaults=None, *args, **kwargs):
         NXDL__base.__init__(self, nxdl_definition)
 
@@ -581,6 +1697,7 @@ class NXDL__field(NXDL__base):
     def parse_nxdl_xml(self, xml_node):
         """parse the XML content"""
         self.name = xml_node.attrib["name"]
+        self.sourceline = xml_node.sourceline
 
         self.parse_attributes(xml_node)
 
@@ -604,6 +1721,9 @@ class NXDL__group(NXDL__base):
     Contents of a *group* structure (XML element) in a NXDL XML file.
     """
 
+    __slots__ = ("attributes", "fields", "groups", "links", "minOccurs", "type")
+    xml_tag = "group"
+
     def __init__(self, nxdl_definition, nxdl_defaults=None, *args, **kwargs):
         NXDL__base.__init__(self, nxdl_definition)
 
@@ -621,12 +1741,20 @@ class NXDL__group(NXDL__base):
     def parse_nxdl_xml(self, xml_node):
         """parse the XML content"""
         self.name = xml_node.attrib.get("name", xml_node.attrib["type"][2:])
+        self.sourceline = xml_node.sourceline
 
         self.parse_attributes(xml_node)
         for k, v in xml_node.attrib.items():
             if k not in ("name", "type"):
                 # https://github.com/prjemian/punx/issues/165
                 self.attributes[k] = v  # FIXME: should be NXDL__attribute instance
+
+        # decided here, not during validation: the NXDL structure may be shared
+        minOccurs = 0
+        if hasattr(self.nxdl_definition, "definition"):  # application definition
+            minOccurs = 1
+        self.minOccurs = int(self.attributes.get("minOccurs", minOccurs))
+
         self.parse_groups(xml_node)
         self.parse_fields(xml_node)
         self.parse_links(xml_node)
@@ -648,6 +1776,9 @@ class NXDL__link(NXDL__base):
 
     """
 
+    __slots__ = ("target",)
+    xml_tag = "link"
+
     def __init__(self, nxdl_definition, nxdl_defaults=None, *args, **kwargs):
         NXDL__base.__init__(self, nxdl_definition)
 
@@ -658,6 +1789,7 @@ class NXDL__link(NXDL__base):
         """parse the XML content"""
         self.name = xml_node.attrib["name"]
         self.target = xml_node.attrib.get("target")
+        self.sourceline = xml_node.sourceline
 
 
 class NXDL__symbols(NXDL__base):
@@ -675,6 +1807,9 @@ class NXDL__symbols(NXDL__base):
 
     """
 
+    __slots__ = ("symbols",)
+    xml_tag = "symbols"
+
     def __init__(self, nxdl_definition, nxdl_defaults=None, *args, **kwargs):
         NXDL__base.__init__(self, nxdl_definition)
 
@@ -682,6 +1817,7 @@ class NXDL__symbols(NXDL__base):
 
     def parse_nxdl_xml(self, symbols_node):
         """parse the XML content"""
+        self.sourceline = symbols_node.sourceline
         for node in symbols_node:
             if isinstance(node, lxml.etree._Comment):
                 continue
@@ -90,7 +90,12 @@ def render_class_str(obj):
     excluded = (list, dict)
     msg = "%s(" % type(obj).__name__
     l = []
-    for k, v in sorted(obj.__dict__.items()):
+    content = dict(getattr(obj, "__dict__", {}))
+    for cls in type(obj).__mro__:  # also any __slots__
+        for k in getattr(cls, "__slots__", ()):
+            if hasattr(obj, k):
+                content[k] = getattr(obj, k)
+    for k, v in sorted(content.items()):
         if not k.startswith("_") and v is not None and type(v) not in excluded:
             l.append("%s=%s" % (k, str(v).lstrip("_")))
     msg += ", ".join(l)
@@ -0,0 +1,343 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# -----------------------------------------------------------------------------
+# :author:    Pete R. Jemian
+# :email:     prjemian@gmail.com
+# :copyright: (c) 2014-2022, Pete R. Jemian
+#
+# Distributed under the terms of the Creative Commons Attribution 4.0 International Public License.
+#
+# The full license is in the file LICENSE.txt, distributed with this software.
+# -----------------------------------------------------------------------------
+
+"""
+write the findings of a validation, one at a time, to a file
+
+.. autosummary::
+
+   ~Report_Writer
+   ~Text_Writer
+   ~JSON_Lines_Writer
+   ~CSV_Writer
+   ~TSV_Writer
+   ~get_writer
+   ~register_writer
+   ~write_report
+   ~write_findings
+   ~write_file_result
+   ~open_output
+
+Unlike :meth:`~punx.validate.Data_File_Validator.print_report`
+(which makes the whole table before it is printed), a writer writes
+each finding to the file as it comes.  The findings are sorted as in
+the report (see :meth:`~punx.finding.Finding_Store.report_order`).
+
+Writers (see ``WRITERS``):
+
+=========  ==============================================================
+name       format
+=========  ==============================================================
+text       fixed-width columns (widths from the addresses & test names)
+jsonl      JSON Lines: an object for each finding (and the file, summary)
+csv        comma-separated values, with a header row
+tsv        tab-separated values, with a header row
+=========  ==============================================================
+
+EXAMPLE::
+
+    validator.validate(fname)
+    with open("findings.jsonl", "w") as fp:
+        punx.report.write_report(validator, fp, "jsonl")
+"""
+
+import collections
+import contextlib
+import csv
+import json
+import sys
+
+from . import finding
+
+
+COLUMNS = ("address", "status", "test", "comment")
+WRITERS = collections.OrderedDict()
+
+
+class Report_Writer(object):
+
+    """
+    Base class: write findings (rows) to the file object ``fp``
+
+    PARAMETERS
+
+    fp obj :
+        file object (open for writing text)
+    columns tuple :
+        names of the values of each row (default: ``COLUMNS``)
+
+    Attributes
+
+    rows int :
+        number of rows written
+
+    .. autosummary::
+
+       ~write_header
+       ~write_row
+       ~write_summary
+    """
+
+    name = None  # in WRITERS
+
+    def __init__(self, fp, columns=COLUMNS):
+        self.fp = fp
+        self.columns = tuple(columns)
+        self.rows = 0
+
+    def __str__(self):
+        return "%s(%s)" % (type(self).__name__, ", ".join(self.columns))
+
+    def write_header(self, info, widths=None):
+        """
+        Begin the findings of a data file.
+
+        ``info`` : dictionary (such as ``file``, ``nxdl_file_set``, ``sha``)
+        ``widths`` : (optional) widest value of each column
+        """
+
+    def write_row(self, row):
+        """Write a finding (tuple of values, as ``columns``)."""
+        raise NotImplementedError
+
+    def write_summary(self, summary, score):
+        """
+        End the report.
+
+        ``summary`` : count of findings (dictionary) by status
+        ``score`` : ``(total, count, average)`` of the findings
+        """
+
+
+class Text_Writer(Report_Writer):
+
+    """Write the findings in fixed-width columns (the last one not padded)."""
+
+    name = "text"
+
+    def __init__(self, fp, columns=COLUMNS):
+        super().__init__(fp, columns)
+        self.widths = [len(c) for c in self.columns]
+
+    def write_header(self, info, widths=None):
+        """Write the file, definitions, then the column labels."""
+        if "file" in info:
+            self.fp.write("data file: %s\n" % info["file"])
+        if "nxdl_file_set" in info:
+            self.fp.write("NeXus definitions: %s, sha=%s\n" % (info["nxdl_file_set"], info.get("sha")))
+        if info.get("error") is not None:
+            self.fp.write("error: %s\n" % info["error"])
+        self.widths = [len(c) for c in self.columns]
+        for i, width in enumerate(widths or ()):
+            self.widths[i] = max(self.widths[i], width)
+        self.fp.write("\n")
+        self.write_row(self.columns, count=False)
+        self.write_row(["-" * w for w in self.widths], count=False)
+
+    def write_row(self, row, count=True):
+        """Write a finding, one line."""
+        last = len(row) - 1
+        text = "  ".join(
+            str(v) if i == last else str(v).ljust(self.widths[i])
+            for i, v in enumerate(row)
+        )
+        self.fp.write(text.rstrip() + "\n")
+        if count:
+            self.rows += 1
+
+    def write_summary(self, summary, score):
+        """Write the count of each status and the score."""
+        self.fp.write("\nsummary statistics\n")
+        for status, count in summary.items():
+            self.fp.write("%-8s %8d  %s\n" % (status, count, status.description))
+        self.fp.write("%-8s %8d\n" % ("TOTAL", sum(summary.values())))
+        self.fp.write("<finding>=%f of %d items reviewed\n" % (score[2], score[1]))
+
+
+class JSON_Lines_Writer(Report_Writer):
+
+    """
+    Write JSON Lines: an object for each finding (with ``columns``)
+
+    Before the findings of a file, an object with the file
+    (``data_file``); at the end, an object with the ``summary``
+    (and ``score``).
+    """
+
+    name = "jsonl"
+
+    def __init__(self, fp, columns=COLUMNS):
+        super().__init__(fp, columns)
+        # each row: as json.dumps(dict(zip(columns, row))), without the dict
+        self._encode = json.JSONEncoder().encode
+        self._template = "{" + ", ".join(json.dumps(c) + ": %s" for c in self.columns) + "}\n"
+
+    def write_header(self, info, widths=None):
+        """Write an object with the data file (``data_file``) and its ``info``."""
+        content = {"data_file": info.get("file")}
+        content.update((k, v) for k, v in info.items() if k != "file")
+        self.fp.write(json.dumps(content) + "\n")
+
+    def write_row(self, row):
+        """Write an object (one line) for a finding."""
+        self.fp.write(self._template % tuple(map(self._encode, row)))
+        self.rows += 1
+
+    def write_summary(self, summary, score):
+        """Write an object with the ``summary`` and ``score``."""
+        content = dict(
+            summary={str(status): count for status, count in summary.items()},
+            score=dict(zip("total count average".split(), score)),
+        )
+        self.fp.write(json.dumps(content) + "\n")
+
+
+class CSV_Writer(Report_Writer):
+
+    """Write comma-separated values: a header row (once), then a row for each finding."""
+
+    name = "csv"
+    delimiter = ","
+
+    def __init__(self, fp, columns=COLUMNS):
+        super().__init__(fp, columns)
+        self.writer = csv.writer(fp, delimiter=self.delimiter, lineterminator="\n")
+        self._header_written = False
+
+    def write_header(self, info, widths=None):
+        """Write the column labels (before the first file only)."""
+        if not self._header_written:
+            self.writer.writerow(self.columns)
+            self._header_written = True
+
+    def write_row(self, row):
+        """Write a finding, one row."""
+        self.writer.writerow(row)
+        self.rows += 1
+
+
+class TSV_Writer(CSV_Writer):
+
+    """Write tab-separated values: a header row (once), then a row for each finding."""
+
+    name = "tsv"
+    delimiter = "\t"
+
+
+def register_writer(writer_class):
+    """Add (or replace) a :class:`Report_Writer` class by its name."""
+    WRITERS[writer_class.name] = writer_class
+    return writer_class
+
+
+def get_writer(name, fp, columns=COLUMNS):
+    """Return a new :class:`Report_Writer` (of ``WRITERS``) named ``name``."""
+    if name not in WRITERS:
+        raise KeyError(f"unknown report format: '{name}', use one of these: {', '.join(WRITERS)}")
+    return WRITERS[name](fp, columns)
+
+
+for _writer_class in (Text_Writer, JSON_Lines_Writer, CSV_Writer, TSV_Writer):
+    register_writer(_writer_class)
+
+
+@contextlib.contextmanager
+def open_output(path=None):
+    """Open file ``path`` to write a report (``None`` or ``-``: the standard output)."""
+    if path is None or path == "-":
+        yield sys.stdout
+        sys.stdout.flush()
+    else:
+        with open(path, "w", newline="") as fp:
+            yield fp
+
+
+def write_findings(writer, store, info=None, statuses=None, sort=True):
+    """
+    Write the findings of a :class:`~punx.finding.Finding_Store`.
+
+    ``info`` : dictionary for :meth:`Report_Writer.write_header`
+    (its ``file`` is also the ``file`` column, if the writer has one)
+    ``statuses`` : names of the statuses to write (default: all)
+    ``sort`` : in the order of the report?  (else, as recorded)
+
+    Return the number of findings written.
+    """
+    info = info or {}
+    if statuses is None:
+        codes = None
+    else:
+        codes = set(finding.STATUS_CODES[finding.VALID_STATUS_DICT[s]] for s in statuses)
+    prefix = ()
+    if "file" in writer.columns:
+        prefix = (info.get("file"),)
+    widths = [len(str(prefix[0]))] if len(prefix) > 0 else []
+    widths.append(max([len(str(a)) for a in store.addresses], default=0))
+    widths.append(max(len(str(s)) for s in finding.VALID_STATUS_LIST))
+    widths.append(max([len(t) for t in store.test_names], default=0))
+    writer.write_header(info, widths)
+
+    status_keys = [str(s) for s in finding.VALID_STATUS_LIST]
+    addresses = store.addresses
+    address_ids = store.address_ids
+    test_names = store.test_names
+    test_ids = store.test_ids
+    status_codes = store.status_codes
+    rows = store.report_order() if sort else range(len(store))
+    written = 0
+    for i in rows:
+        code = status_codes[i]
+        if codes is None or code in codes:
+            writer.write_row(
+                prefix
+                + (
+                    addresses[address_ids[i]],
+                    status_keys[code],
+                    test_names[test_ids[i]],
+                    store.comment(i),
+                )
+            )
+            written += 1
+    return written
+
+
+def write_report(validator, fp, fmt="text", statuses=None, sort=True):
+    """
+    Write the findings of ``validator`` (and their summary) to file object ``fp``.
+
+    ``fmt`` : name of the writer (see ``WRITERS``)
+    ``statuses`` : names of the statuses to write (default: all)
+
+    Return the number of findings written.
+    """
+    writer = get_writer(fmt, fp)
+    file_set = validator.manager.nxdl_file_set
+    info = dict(file=validator.fname, nxdl_file_set=file_set.ref, sha=file_set.sha)
+    written = write_findings(writer, validator.validations, info, statuses, sort)
+    writer.write_summary(validator.finding_summary(), validator.finding_score())
+    return written
+
+
+def write_file_result(writer, result, statuses=None, sort=True):
+    """
+    Write the findings of a :class:`~punx.batch.File_Result`.
+
+    Return the number of findings written.
+    """
+    store = finding.Finding_Store()
+    for h5_address, test_name, status, comment in result.findings:
+        store.record(h5_address, test_name, finding.VALID_STATUS_DICT[status], comment)
+    info = dict(file=result.fname)
+    if result.error is not None:
+        info["error"] = result.error
+    return write_findings(writer, store, info, statuses, sort)
@@ -0,0 +1,328 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# -----------------------------------------------------------------------------
+# :author:    Pete R. Jemian
+# :email:     prjemian@gmail.com
+# :copyright: (c) 2014-2022, Pete R. Jemian
+#
+# Distributed under the terms of the Creative Commons Attribution 4.0 International Public License.
+#
+# The full license is in the file LICENSE.txt, distributed with this software.
+# -----------------------------------------------------------------------------
+
+"""
+on-disk cache of validation findings, for files that did not change
+
+.. autosummary::
+
+   ~Validation_Result_Cache
+   ~file_identity
+   ~default_cache_directory
+
+When the same data files are validated again and again (such as a
+nightly validation of many files, most of them unchanged), the
+findings of each file are kept in a cache.  The findings of a file
+that did not change are returned from the cache, without opening
+the file.
+
+Each entry is identified by:
+
+* the data file: its absolute path, size, modification time and
+  inode (or, optionally, a digest of its content)
+* the NXDL file set (its ``sha``) and the punx version
+* the validator's settings (and rules) that change the findings
+
+An entry is not used if a target file of an external link (or a
+source file of a virtual dataset) in the data file changed.  Findings of a file with an external link (or a
+source file of a virtual dataset) that is not found are not kept
+(the file might be found next time).
+
+Entries not used for ``max_age`` seconds are removed (by
+:meth:`~Validation_Result_Cache.evict`), then the least recently
+used entries, until all entries fit in ``max_bytes``.
+
+EXAMPLE::
+
+    cache = punx.result_cache.Validation_Result_Cache()
+    validator = punx.validate.Data_File_Validator()
+    for fname in file_names:
+        cache.validate(validator, fname)
+        validator.print_report()
+    cache.evict()
+"""
+
+import hashlib
+import logging
+import os
+import pickle
+import tempfile
+import time
+
+from . import __version__
+from . import finding
+
+
+CACHE_FORMAT = 1  # increment when the content of an entry changes
+CACHE_SUBDIR = "validation_results"  # in the user cache directory
+DEFAULT_MAX_AGE = 30 * 24 * 60 * 60  # seconds an entry is kept without use
+DEFAULT_MAX_BYTES = 2**28  # bytes of all entries
+DIGEST_BLOCK_SIZE = 2**20  # bytes read at once for a digest
+ENTRY_SUFFIX = ".pickle"
+logger = logging.getLogger(__name__)
+
+
+def default_cache_directory():
+    """Return the directory of the result cache (in the user cache directory)."""
+    from . import cache_manager
+
+    return os.path.join(cache_manager.UserCache().path, CACHE_SUBDIR)
+
+
+def file_identity(fname, digest=False):
+    """
+    Return what identifies the content of file ``fname`` (a tuple).
+
+    By default: its absolute path, size, modification time and
+    inode (learned without reading the file).  If ``digest``, its size
+    and a digest of its content (the file is read, but not opened as
+    HDF5), so a copy (or a file with another modification time) is
+    identified as the same content.
+    """
+    if digest:
+        h = hashlib.blake2b()
+        size = 0
+        with open(fname, "rb") as fp:
+            for block in iter(lambda: fp.read(DIGEST_BLOCK_SIZE), b""):
+                h.update(block)
+                size += len(block)
+        return ("digest", size, h.hexdigest())
+    st = os.stat(fname)
+    return ("stat", os.path.abspath(fname), st.st_size, st.st_mtime_ns, st.st_dev, st.st_ino)
+
+
+def _dependency_stat(path):
+    """internal: (size, modification time) of ``path``, None if not found"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+class Validation_Result_Cache(object):
+
+    """
+    On-disk cache of the findings of validated data files
+
+    PARAMETERS
+
+    directory str :
+        directory of the cache (default: :func:`default_cache_directory`)
+    max_age float :
+        seconds an entry is kept without being used
+    max_bytes int :
+        bytes of all entries (at most)
+    digest bool :
+        Identify each data file by a digest of its content
+        (see :func:`file_identity`)?
+
+    Attributes
+
+    hits int :
+        findings returned from the cache
+    misses int :
+        files validated (and their findings kept)
+
+    .. autosummary::
+
+       ~validate
+       ~get
+       ~put
+       ~evict
+       ~clear
+       ~entry_file
+       ~entry_key
+    """
+
+    def __init__(
+        self, directory=None, max_age=DEFAULT_MAX_AGE, max_bytes=DEFAULT_MAX_BYTES, digest=False
+    ):
+        if directory is None:
+            directory = default_cache_directory()
+        self.directory = directory
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self.digest = digest
+        self.hits = 0
+        self.misses = 0
+
+    def __str__(self):
+        return "Validation_Result_Cache(%s)" % self.directory
+
+    def entry_key(self, validator, fname):
+        """
+        Return what an entry for data file ``fname`` must match.
+
+        The key includes the punx version, the identity of the data
+        file (see :func:`file_identity`), the NXDL file set ``sha``,
+        and the validator settings (and rules) that change the findings.
+        """
+        return dict(
+            format=CACHE_FORMAT,
+            punx_version=__version__,
+            file=file_identity(fname, self.digest),
+            sha=validator.manager.nxdl_file_set.sha,
+            read_virtual_datasets=validator.read_virtual_datasets,
+            max_read_bytes=validator.read_budget.max_read_bytes,
+            max_file_bytes=validator.read_budget.max_file_bytes,
+            rules=[rule.name for rule in validator.enabled_rules()],
+        )
+
+    def entry_file(self, key):
+        """Return the name of the file of the entry with ``key``."""
+        text = repr(sorted(key.items())).encode("utf8")
+        return os.path.join(self.directory, hashlib.sha1(text).hexdigest() + ENTRY_SUFFIX)
+
+    def get(self, validator, fname):
+        """
+        Return the findings (list of Finding) kept for ``fname``, or None.
+
+        None if no entry (or its data file, or a target file of its
+        external links, changed).  The file is not opened.
+        """
+        key = self.entry_key(validator, fname)
+        path = self.entry_file(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "rb") as fp:
+                if pickle.load(fp) != key:
+                    return None
+                content = pickle.load(fp)
+        except Exception as exc:
+            logger.debug("could not read cached findings %s: %s", path, exc)
+            return None
+        for dependency, stat in content["dependencies"].items():
+            if _dependency_stat(dependency) != stat:
+                logger.debug("changed: %s (external link or VDS source of %s)", dependency, fname)
+                return None
+        try:
+            os.utime(path)  # used now
+        except OSError:
+            pass
+        return [
+            finding.Finding(h5_address, test_name, finding.VALID_STATUS_DICT[status], comment)
+            for h5_address, test_name, status, comment in content["findings"]
+        ]
+
+    def put(self, validator, fname):
+        """
+        Keep the findings of ``validator`` (just validated ``fname``).
+
+        Findings are not kept if an external link (or a source file
+        of a virtual dataset) was not found.
+        Return ``True`` if kept.
+        """
+        catalog = validator.catalog
+        missing = [f for f in validator.validations if f.test_name == "external link"]
+        missing += [s for s in catalog.virtual_sources.values() if len(s.missing) > 0]
+        if len(missing) > 0:
+            logger.debug("not cached (files not found): %s", fname)
+            return False
+        key = self.entry_key(validator, fname)
+        paths = set(catalog.files.values())
+        for sources in catalog.virtual_sources.values():
+            paths.update(sources.paths)
+        dependencies = {path: _dependency_stat(path) for path in paths}
+        content = dict(
+            dependencies=dependencies,
+            findings=[
+                (f.h5_address, f.test_name, str(f.status), f.comment)
+                for f in validator.validations
+            ],
+        )
+        path = self.entry_file(key)
+        tmp_name = None
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "wb") as fp:
+                pickle.dump(key, fp, pickle.HIGHEST_PROTOCOL)
+                pickle.dump(content, fp, pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_name, path)
+        except Exception as exc:
+            logger.debug("could not write cached findings %s: %s", path, exc)
+            if tmp_name is not None and os.path.exists(tmp_name):
+                os.remove(tmp_name)
+            return False
+        return True
+
+    def validate(self, validator, fname, refresh=False):
+        """
+        Validate ``fname`` with ``validator``, or use the findings kept for it.
+
+        Afterwards, the validator's ``validations`` are the findings of
+        ``fname`` (as :meth:`~punx.validate.Data_File_Validator.validate`).
+        If the findings are from the cache, the file is not opened and
+        the catalog (``addresses``, ``classpaths``) of the validator is empty.
+        If ``refresh``, validate (and keep the findings) even if kept.
+
+        Return ``True`` if the findings are from the cache.
+        """
+        if not refresh:
+            findings = self.get(validator, fname)
+            if findings is not None:
+                validator.close()
+                validator.__init_local__()
+                validator.fname = fname
+                validator.validations = finding.Finding_Store(findings)
+                self.hits += 1
+                return True
+        validator.validate(fname)
+        self.put(validator, fname)
+        self.misses += 1
+        return False
+
+    def _entries(self):
+        """internal: (last used, size, path) of each entry"""
+        entries = []
+        if not os.path.isdir(self.directory):
+            return entries
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.name.endswith(ENTRY_SUFFIX):
+                    st = entry.stat()
+                    entries.append((st.st_mtime, st.st_size, entry.path))
+        return entries
+
+    def evict(self, now=None):
+        """
+        Remove entries not used for ``max_age`` seconds, then the least
+        recently used entries, until all entries fit in ``max_bytes``.
+
+        Return the number of entries removed.
+        """
+        if now is None:
+            now = time.time()
+        entries = sorted(self._entries(), reverse=True)  # most recently used first
+        total, removed = 0, 0
+        for last_used, size, path in entries:
+            total += size
+            if now - last_used > self.max_age or total > self.max_bytes:
+                try:
+                    os.remove(path)
+                    removed += 1
+                except OSError as exc:
+                    logger.debug("could not remove %s: %s", path, exc)
+        if removed > 0:
+            logger.debug("%s: removed %d entries", self, removed)
+        return removed
+
+    def clear(self):
+        """Remove all entries, return the number removed."""
+        removed = 0
+        for _last_used, _size, path in self._entries():
+            os.remove(path)
+            removed += 1
+        return removed
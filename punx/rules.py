@@ -0,0 +1,365 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# -----------------------------------------------------------------------------
+# :author:    Pete R. Jemian
+# :email:     prjemian@gmail.com
+# :copyright: (c) 2014-2022, Pete R. Jemian
+#
+# Distributed under the terms of the Creative Commons Attribution 4.0 International Public License.
+#
+# The full license is in the file LICENSE.txt, distributed with this software.
+# -----------------------------------------------------------------------------
+
+"""
+registry of the validation rules
+
+.. autosummary::
+
+   ~Rule
+   ~Rule_Registry
+   ~default_registry
+
+Each rule is a check (a function of the validator and a
+:class:`~punx.validate.ValidationItem`) and what it applies to:
+
+* its *scope*: when the check is made
+* the *kinds* of items (``group``, ``field``, ``attribute``)
+* item (or attribute) *names*
+* *NeXus classes* of groups (for a field or attribute: of its group)
+* a *classpath* pattern (regular expression, the whole NeXus class path)
+
+==========================  ==================================================
+scope                       check is made
+==========================  ==================================================
+``ITEM``                    for each item (group, field, attribute)
+``GROUP``                   for each group (once all its members are known)
+``APPLICATION_DEFINITION``  for each group that names an application definition
+``FILE``                    once for the file (item: the file root)
+==========================  ==================================================
+
+The rules for an item are found through an index (by scope, kind,
+name and NeXus class path), so an item is offered only to the rules
+that apply to it.
+
+Rules are in *families* (such as ``attributes``), which can be
+disabled for a validator (such as to skip expensive checks)::
+
+    validator.disable_rules("application definitions")
+
+Other packages can add rules, with an entry point in the
+``punx.rules`` group.  The entry point is a :class:`Rule`, a
+list of rules, or a function called with the registry (to register
+its rules).  For example, in ``setup.py``::
+
+    entry_points={
+        "punx.rules": ["my_rules = my_package.punx_rules:register"],
+    },
+
+where::
+
+    def register(registry):
+        registry.register(
+            punx.rules.Rule(
+                "units are known",
+                check_units,  # check_units(validator, v_item)
+                family="units",
+                kinds=("attribute",),
+                names=("units",),
+            )
+        )
+"""
+
+import logging
+import re
+
+from . import validate
+
+
+ITEM = "item"
+GROUP = "group"
+APPLICATION_DEFINITION = "application definition"
+FILE = "file"
+SCOPES = (ITEM, GROUP, APPLICATION_DEFINITION, FILE)
+KINDS = ("group", "field", "attribute")
+ENTRY_POINT_GROUP = "punx.rules"
+ATTRIBUTE_CLASSPATH = r".*@.*"  # attributes of NeXus content (and items named with "@")
+logger = logging.getLogger(__name__)
+
+_KIND_NAMES = {
+    validate.Address_Catalog.HDF5_GROUP: "group",
+    validate.Address_Catalog.HDF5_OBJECT: "field",
+    validate.Address_Catalog.ATTRIBUTE: "attribute",
+    validate.Address_Catalog.VALUE: "attribute",
+}
+_default_registry = None
+
+
+class Rule(object):
+
+    """
+    A validation rule: a check and what it applies to
+
+    PARAMETERS
+
+    name str :
+        name of this rule
+    check obj :
+        function ``check(validator, v_item)`` that records findings
+    scope str :
+        when the check is made (one of ``SCOPES``)
+    family str :
+        family of rules (to enable or disable together), default: ``name``
+    kinds tuple :
+        kinds of items (of ``KINDS``), default: all
+    names tuple :
+        names of items (or attributes), default: any
+    nx_classes tuple :
+        NeXus classes of groups (for a field or attribute, of its group),
+        default: any
+    classpath str :
+        regular expression to match the whole NeXus class path, default: any
+    nexus_only bool :
+        Not for non-NeXus content?
+    fallback bool :
+        Only for items not selected by name by another rule of the family?
+    """
+
+    def __init__(
+        self,
+        name,
+        check,
+        scope=ITEM,
+        family=None,
+        kinds=None,
+        names=None,
+        nx_classes=None,
+        classpath=None,
+        nexus_only=False,
+        fallback=False,
+    ):
+        if scope not in SCOPES:
+            raise ValueError(f"unknown scope: '{scope}', use one of these: {', '.join(SCOPES)}")
+        for kind in kinds or ():
+            if kind not in KINDS:
+                raise ValueError(f"unknown kind: '{kind}', use one of these: {', '.join(KINDS)}")
+        self.name = name
+        self.check = check
+        self.scope = scope
+        self.family = family or name
+        self.kinds = None if kinds is None else tuple(kinds)
+        self.names = None if names is None else tuple(names)
+        self.nx_classes = None if nx_classes is None else tuple(nx_classes)
+        self.classpath = None if classpath is None else re.compile(classpath)
+        self.nexus_only = nexus_only
+        self.fallback = fallback
+
+    def __str__(self):
+        return "Rule(%s, family=%s, scope=%s)" % (self.name, self.family, self.scope)
+
+    def applies(self, kind, nx_class, classpath):
+        """Does this rule apply to an item (its name is already matched)?"""
+        if self.kinds is not None and kind not in self.kinds:
+            return False
+        if self.nexus_only and classpath == validate.CLASSPATH_OF_NON_NEXUS_CONTENT:
+            return False
+        if self.nx_classes is not None and nx_class not in self.nx_classes:
+            return False
+        if self.classpath is not None and self.classpath.fullmatch(classpath) is None:
+            return False
+        return True
+
+
+class Rule_Registry(object):
+
+    """
+    The validation rules, indexed by what they apply to
+
+    The rules for a scope are indexed by the names they apply to.
+    The rules that apply to an item are found once for each
+    combination of scope, kind, (indexed) name, and NeXus class path,
+    then kept.
+
+    .. autosummary::
+
+       ~register
+       ~select
+       ~families
+       ~load_entry_points
+    """
+
+    def __init__(self):
+        self.rules = []  # in order of registration (the order of the checks)
+        self._by_name = {scope: {} for scope in SCOPES}  # rules with names, by name
+        self._any_name = {scope: [] for scope in SCOPES}  # rules without names
+        self._selected = {}  # rules, by (scope, kind, name, classpath)
+
+    def __len__(self):
+        return len(self.rules)
+
+    def register(self, rule):
+        """Add a :class:`Rule` (checked after those already registered)."""
+        self.rules.append(rule)
+        if rule.names is None:
+            self._any_name[rule.scope].append(rule)
+        else:
+            for name in rule.names:
+                self._by_name[rule.scope].setdefault(name, []).append(rule)
+        self._selected.clear()
+        return rule
+
+    def families(self):
+        """Return the names of the rule families (in order of registration)."""
+        return list(dict.fromkeys(rule.family for rule in self.rules))
+
+    def select(self, scope, v_item):
+        """Return the rules (in order) of ``scope`` that apply to ``v_item``."""
+        catalog = v_item.catalog
+        index = v_item.index
+        kind = _KIND_NAMES[catalog.kinds[index]]
+        name = v_item.name
+        if name not in self._by_name[scope]:
+            name = None  # no rule for this name
+        classpath = catalog.classpaths.values[catalog.classpath_ids[index]]
+        key = (scope, kind, name, classpath)
+        rules = self._selected.get(key)
+        if rules is None:
+            rules = self._select(scope, kind, name, _group_nx_class(v_item, kind), classpath)
+            self._selected[key] = rules
+        return rules
+
+    def _select(self, scope, kind, name, nx_class, classpath):
+        """internal: find the rules of ``scope`` for such items"""
+        by_name = [
+            rule
+            for rule in self._by_name[scope].get(name, [])
+            if rule.applies(kind, nx_class, classpath)
+        ]
+        named_families = {rule.family for rule in by_name}
+        any_name = [
+            rule
+            for rule in self._any_name[scope]
+            if rule.applies(kind, nx_class, classpath)
+            and not (rule.fallback and rule.family in named_families)
+        ]
+        order = {id(rule): i for i, rule in enumerate(self.rules)}
+        return tuple(sorted(by_name + any_name, key=lambda rule: order[id(rule)]))
+
+    def load_entry_points(self, group=ENTRY_POINT_GROUP):
+        """
+        Register the rules of the entry points in ``group``.
+
+        An entry point that cannot be loaded is reported (logged)
+        and skipped.  Return the number of entry points loaded.
+        """
+        import importlib.metadata
+
+        try:
+            entry_points = importlib.metadata.entry_points(group=group)
+        except TypeError:  # before Python 3.10
+            entry_points = importlib.metadata.entry_points().get(group, [])
+        loaded = 0
+        for entry_point in entry_points:
+            try:
+                obj = entry_point.load()
+                if isinstance(obj, Rule):
+                    self.register(obj)
+                elif callable(obj):
+                    obj(self)
+                else:
+                    for rule in obj:
+                        self.register(rule)
+            except Exception as exc:
+                logger.warning("could not load rules from %s: %s", entry_point.name, exc)
+                continue
+            loaded += 1
+        return loaded
+
+
+def _group_nx_class(v_item, kind):
+    """internal: NeXus class of the item's group (or of the item, if a group)"""
+    group = v_item
+    if kind != "group":
+        group = v_item.parent
+        if group is not None and not group.is_group:  # attribute of a field
+            group = group.parent
+    if group is None:
+        return None
+    if group.classpath == "":
+        return "NXroot"
+    return group.catalog.nx_classes.get(group.index)
+
+
+def builtin_rules():
+    """Return the rules of punx (in the order of the checks)."""
+    from .validations import application_definition
+    from .validations import attribute
+    from .validations import default_plot
+    from .validations import item_name
+    from .validations import nexus_group
+
+    Validator = validate.Data_File_Validator
+    rules = [
+        Rule("valid item name", item_name.verify, family="item names"),
+    ]
+    handlers = (
+        ("NX_class", attribute.nxclass_handler),
+        ("target", attribute.target_handler),
+        ("signal", attribute.signal_handler),
+        ("axes", attribute.axes_handler),
+        ("units", attribute.units_handler),
+    )
+    for attribute_name, handler in handlers:
+        rules.append(
+            Rule(
+                "@" + attribute_name,
+                handler,
+                family="attributes",
+                names=(attribute_name,),
+                classpath=ATTRIBUTE_CLASSPATH,
+            )
+        )
+    rules += [
+        Rule(
+            "attribute",
+            attribute.generic_handler,
+            family="attributes",
+            classpath=ATTRIBUTE_CLASSPATH,
+            fallback=True,
+        ),
+        Rule("HDF5 hard link", Validator.validate_hard_link, family="hard links", kinds=("group", "field")),
+        Rule("virtual dataset", Validator.validate_virtual_dataset, family="virtual datasets", kinds=("field",)),
+        Rule("NeXus group", nexus_group.verify, GROUP, family="base classes", kinds=("group",)),
+        Rule(
+            "NeXus application definition",
+            application_definition.verify,
+            APPLICATION_DEFINITION,
+            family="application definitions",
+            kinds=("group",),
+        ),
+        Rule(
+            "NeXus default plot",
+            lambda validator, v_item: default_plot.verify(validator),
+            FILE,
+            family="default plot",
+        ),
+    ]
+    return rules
+
+
+def default_registry():
+    """
+    Return the registry of rules used by default (shared by all validators).
+
+    Made when first used, with :func:`builtin_rules` and
+    the rules of the entry points (see :mod:`punx.rules`).
+    """
+    global _default_registry
+
+    if _default_registry is None:
+        registry = Rule_Registry()
+        for rule in builtin_rules():
+            registry.register(rule)
+        registry.load_entry_points()
+        _default_registry = registry
+    return _default_registry
@@ -27,6 +27,7 @@ Public
    ~Schema_Element
    ~Schema_Type
    ~get_default_schema_manager
+   ~get_xml_schema
    ~raise_error
    ~strip_ns
 
@@ -45,6 +46,7 @@ from __future__ import print_function
 
 import lxml.etree
 import os
+import threading
 from . import NAMESPACE_DICT, FileNotFound, InvalidNxdlFile
 from . import singletons
 from . import utils
@@ -52,6 +54,9 @@ from . import utils
 
 logger = utils.setup_logger(__name__)
 
+_xml_schema_cache = {}  # compiled XML Schema, keyed by absolute file name
+_xml_schema_lock = threading.Lock()
+
 
 def strip_ns(ref):
     """
@@ -88,6 +93,29 @@ def get_default_schema_manager():
     return cm.default_file_set.schema_manager
 
 
+def get_xml_schema(schema_file):
+    """
+    Return the compiled ``lxml.etree.XMLSchema`` of ``schema_file``.
+
+    Each XML Schema file is compiled once (in this process)
+    and compiled again only if the file has changed.
+
+    :param str schema_file: name of XML Schema file (such as ``nxdl.xsd``)
+    """
+    if not os.path.exists(schema_file):
+        raise FileNotFound("XML Schema file: " + schema_file)
+    key = os.path.abspath(schema_file)
+    st = os.stat(key)
+    stamp = (st.st_size, st.st_mtime_ns)
+    with _xml_schema_lock:
+        cached = _xml_schema_cache.get(key)
+        if cached is None or cached[0] != stamp:
+            logger.debug("compiling XML Schema: %s", key)
+            cached = (stamp, lxml.etree.XMLSchema(lxml.etree.parse(key)))
+            _xml_schema_cache[key] = cached
+    return cached[1]
+
+
 class SchemaManager(object):
 
     """
@@ -114,7 +142,7 @@ class SchemaManager(object):
             raise FileNotFound("XML Schema file: " + self.schema_file)
 
         self.lxml_tree = lxml.etree.parse(self.schema_file)
-        self.lxml_schema = lxml.etree.XMLSchema(self.lxml_tree)
+        self.lxml_schema = get_xml_schema(self.schema_file)
         self.lxml_root = self.lxml_tree.getroot()
 
         nodes = self.lxml_root.xpath("xs:element", namespaces=self.ns)
@@ -0,0 +1,91 @@
+import h5py
+import os
+import pytest
+
+from ._core import DEFAULT_NXDL_FILE_SET
+from ._core import tempdir
+from .. import access_profiles
+from .. import h5tree
+from .. import validate
+
+
+def write_file(tempdir):
+    fname = os.path.join(tempdir, "profiled.h5")
+    with h5py.File(fname, "w") as f:
+        eg = f.create_group("entry")
+        eg.attrs["NX_class"] = "NXentry"
+        eg.create_dataset("title", data="profiled")
+        eg.create_dataset("data", data=list(range(1000)))
+    return fname
+
+
+def test_Block_Cache_File(tempdir):
+    fname = os.path.join(tempdir, "bytes.bin")
+    content = bytes(range(256)) * 40
+    with open(fname, "wb") as f:
+        f.write(content)
+
+    bf = access_profiles.Block_Cache_File(fname, block_size=1000, max_blocks=2)
+    assert repr(bf) == fname
+    assert bf.read(10) == content[:10]
+    assert bf.reads == 1
+    bf.seek(995)
+    assert bf.read(10) == content[995:1005]  # spans 2 blocks
+    assert bf.reads == 2
+    bf.seek(-5, os.SEEK_END)
+    assert bf.tell() == len(content) - 5
+    assert bf.read(100) == content[-5:]  # short read at the end
+    assert bf.read(100) == b""
+    assert bf.reads == 3
+    bf.seek(0)
+    assert bf.read(10) == content[:10]
+    assert bf.reads == 4  # block 0 was discarded
+    assert bf.bytes_read == 3000 + len(content) - 10000
+    bf.close()
+    assert bf.closed
+
+
+def test_get_profile():
+    assert access_profiles.get_profile().name == access_profiles.DEFAULT_PROFILE
+    profile = access_profiles.get_profile("network")
+    assert profile.name == "network"
+    assert access_profiles.get_profile(profile) is profile
+    with pytest.raises(KeyError, match="unknown access profile"):
+        access_profiles.get_profile("no-such-profile")
+    assert list(access_profiles.PROFILES)[0] == access_profiles.DEFAULT_PROFILE
+
+
+@pytest.mark.parametrize("name", list(access_profiles.PROFILES))
+def test_open_file(tempdir, name):
+    fname = write_file(tempdir)
+    with access_profiles.open_file(fname, name) as root:
+        assert root.filename == fname
+        assert root["/entry/data"][-1] == 999
+        assert root["/entry"].attrs["NX_class"] == "NXentry"
+
+
+def test_cache_settings(tempdir):
+    fname = write_file(tempdir)
+    profile = access_profiles.Access_Profile("test", mdc_nbytes=2**22, sieve_nbytes=2**20)
+    with profile.open(fname) as root:
+        fapl = root.id.get_access_plist()
+        assert fapl.get_mdc_config().initial_size == 2**22
+        assert fapl.get_sieve_buf_size() == 2**20
+
+    profile.block_size = 2**16
+    with profile.open(fname) as root:
+        assert root.filename == fname
+        assert root["/entry/data"][0] == 0
+
+
+def test_validate_and_h5tree(tempdir):
+    fname = write_file(tempdir)
+    validator = validate.Data_File_Validator(ref=DEFAULT_NXDL_FILE_SET, access_profile="network")
+    validator.validate(fname)
+    assert validator.access_profile.name == "network"
+    assert "/entry/title" in validator.addresses
+    validator.close()
+
+    report = h5tree.Hdf5TreeView(fname, access_profile="network").report()
+    assert "  entry:NXentry" in report
+    assert "    title:NX_CHAR = b'profiled'" in report
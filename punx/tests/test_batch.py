@@ -0,0 +1,176 @@
+import json
+import os
+import pytest
+import shutil
+
+from ._core import DEFAULT_NXDL_FILE_SET
+from ._core import EXAMPLE_DATA_DIR
+from ._core import tempdir
+from .. import batch
+from .. import rules
+from .. import validate
+
+
+EXAMPLES = "writer_1_3.hdf5 writer_2_1.hdf5 verysimple.nx5 chopper.nxs".split()
+
+
+def copy_examples(tempdir):
+    path = os.path.join(tempdir, "data")
+    os.makedirs(os.path.join(path, "more"))
+    for i, name in enumerate(EXAMPLES):
+        subdir = "more" if i % 2 else ""
+        shutil.copy(os.path.join(EXAMPLE_DATA_DIR, name), os.path.join(path, subdir, name))
+    with open(os.path.join(path, "notes.txt"), "w") as f:
+        f.write("not HDF5")
+    return path
+
+
+def findings_of(validator, fname):
+    validator.validate(fname)
+    findings = sorted(
+        (f.h5_address, f.test_name, str(f.status), f.comment)
+        for f in validator.validations
+    )
+    validator.close()
+    return findings
+
+
+def test_expand_inputs(tempdir):
+    path = copy_examples(tempdir)
+    found = list(batch.expand_inputs([path]))
+    assert [os.path.basename(f) for f in found] == [
+        "verysimple.nx5",
+        "writer_1_3.hdf5",
+        "chopper.nxs",
+        "writer_2_1.hdf5",
+    ]
+
+    pattern = os.path.join(path, "**", "*.hdf5")
+    assert [os.path.relpath(f, path) for f in batch.expand_inputs([pattern])] == [
+        os.path.join("more", "writer_2_1.hdf5"),
+        "writer_1_3.hdf5",
+    ]
+
+    file_list = os.path.join(tempdir, "files.txt")
+    with open(file_list, "w") as f:
+        f.write("# files to validate\n\n")
+        f.write(found[1] + "\n")
+        f.write(os.path.join(path, "notes.txt") + "\n")
+        f.write(os.path.join(path, "more") + "\n")
+    names = list(batch.expand_inputs(["@" + file_list, found[1], pattern]))
+    assert [os.path.basename(f) for f in names] == [
+        "writer_1_3.hdf5",
+        "notes.txt",  # named: validated (and reported) anyway
+        "chopper.nxs",
+        "writer_2_1.hdf5",
+    ]
+
+    assert batch.is_batch([path])
+    assert batch.is_batch(["@" + file_list])
+    assert batch.is_batch([pattern])
+    assert batch.is_batch(found[:2])
+    assert not batch.is_batch(found[:1])
+    assert not batch.is_batch(["no_such_file.h5"])
+
+
+@pytest.mark.parametrize("processes, order", [(1, "largest"), (2, "stream"), (2, "largest")])
+def test_run(tempdir, processes, order):
+    path = copy_examples(tempdir)
+    missing = os.path.join(path, "missing.h5")
+    validator = validate.Data_File_Validator(ref=DEFAULT_NXDL_FILE_SET)
+    validator.disable_rules("default plot")
+    expected = {
+        fname: findings_of(validator, fname)
+        for fname in batch.expand_inputs([path])
+    }
+
+    runner = batch.Batch_Validation(
+        validator, processes=processes, order=order, use_cache=False, keep_findings=True
+    )
+    inputs = [path, os.path.join(path, "notes.txt"), missing]
+    results = {result.index: result for result in runner.run(inputs)}
+    assert len(results) == len(runner.results) == 6
+    if order == "largest" and processes == 1:
+        sizes = [result.size for result in results.values()]
+        assert sizes == sorted(sizes, reverse=True)
+
+    for index, fname in enumerate(batch.expand_inputs(inputs)):
+        result = results[index]
+        assert result.fname == fname
+        assert runner.results[index].findings is None  # only the summary is kept
+        assert runner.results[index].summary == result.summary
+        if fname in expected:
+            assert result.error is None
+            assert sorted(result.findings) == expected[fname]
+            assert sum(result.summary.values()) == len(expected[fname])
+            assert "NeXus default plot" not in [f[1] for f in result.findings]
+    assert runner.results[4].error == "could not open as HDF5"
+    assert runner.results[5].error == "file not found"
+
+    totals = runner.totals()
+    assert sum(totals.values()) == sum(len(findings) for findings in expected.values())
+    report = runner.report(statuses=["ERROR", "WARN"])
+    assert "TOTAL (6 files)" in report
+    assert "2 not validated" in report
+
+
+def test_result_cache(tempdir):
+    path = copy_examples(tempdir)
+    validator = validate.Data_File_Validator(ref=DEFAULT_NXDL_FILE_SET)
+    cache_directory = os.path.join(tempdir, "cache")
+    runner = batch.Batch_Validation(validator, cache_directory=cache_directory, keep_findings=True)
+    first = sorted(runner.run([path]), key=lambda result: result.index)
+    assert not any(result.cached for result in first)
+    second = sorted(runner.run([path]), key=lambda result: result.index)
+    assert all(result.cached for result in second)
+    assert [r.findings for r in first] == [r.findings for r in second]
+
+    with pytest.raises(ValueError, match="unknown order"):
+        batch.Batch_Validation(validator, order="smallest")
+
+
+def test_worker_settings():
+    validator = validate.Data_File_Validator(ref=DEFAULT_NXDL_FILE_SET)
+    validator.disable_rules("default plot")
+    settings = batch.Batch_Validation(validator, processes=2).settings()
+    worker = batch._Batch_Worker.from_settings(settings)
+    file_set = worker.validator.manager.nxdl_file_set
+    assert (file_set.path, file_set.sha) == (settings["nxdl_path"], settings["nxdl_sha"])
+    assert worker.validator.enabled_rules() == validator.enabled_rules()
+
+    with pytest.raises(ValueError, match="NXDL file set of the worker"):
+        batch._Batch_Worker.from_settings(dict(settings, nxdl_sha="0" * 40))
+    with pytest.raises(ValueError, match="rules of the worker"):
+        batch._Batch_Worker.from_settings(dict(settings, rules=settings["rules"] + ["custom"]))
+
+    validator.rules = rules.Rule_Registry()
+    batch.Batch_Validation(validator)  # validated by validator itself
+    with pytest.raises(ValueError, match="default rules only"):
+        batch.Batch_Validation(validator, processes=2)
+
+
+def test_write_results(tempdir):
+    path = copy_examples(tempdir)
+    validator = validate.Data_File_Validator(ref=DEFAULT_NXDL_FILE_SET)
+    output = os.path.join(tempdir, "results")
+    runner = batch.Batch_Validation(validator, use_cache=False, output_dir=output)
+    results = list(runner.run([path]))
+    assert all(result.findings is None for result in results)  # written by the worker
+
+    assert runner.write_results() == os.path.join(output, batch.REPORT_FILE)
+    assert len(os.listdir(output)) == 5
+    with open(os.path.join(output, batch.REPORT_FILE)) as f:
+        report = json.load(f)
+    assert len(report["files"]) == 4
+    assert report["summary"] == runner.totals()
+
+    result = runner.results[0]
+    assert report["files"][0]["results"] == batch.results_file_name(result.fname)
+    with open(os.path.join(output, report["files"][0]["results"])) as f:
+        content = json.load(f)
+    assert content["file"] == result.fname
+    assert len(content["findings"]) == sum(result.summary.values())
+    assert sorted(content["findings"][0]) == ["address", "comment", "status", "test"]
+
+    with pytest.raises(ValueError, match="no output directory"):
+        batch.Batch_Validation(validator).write_results()
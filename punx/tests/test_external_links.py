@@ -0,0 +1,191 @@
+import h5py
+import numpy
+import os
+import pytest
+
+from ._core import DEFAULT_NXDL_FILE_SET
+from ._core import tempdir
+from .. import ValueNotInspected
+from .. import external_links
+from .. import finding
+from .. import h5tree
+from .. import validate
+
+
+def write_files(tempdir, subdir="data"):
+    """master file in tempdir, external file (relative link) in tempdir/subdir"""
+    path = os.path.join(tempdir, subdir)
+    os.makedirs(path, exist_ok=True)
+    with h5py.File(os.path.join(path, "external.h5"), "w") as f:
+        g = f.create_group("sample")
+        g.attrs["NX_class"] = "NXsample"
+        g.create_dataset("temperature", data=[273.15])
+
+    master = os.path.join(tempdir, "master.h5")
+    with h5py.File(master, "w") as f:
+        eg = f.create_group("entry")
+        eg.attrs["NX_class"] = "NXentry"
+        eg["sample"] = h5py.ExternalLink(f"{subdir}/external.h5", "/sample")
+        eg["missing"] = h5py.ExternalLink("no-such-file.h5", "/sample")
+    return master
+
+
+def test_search_path(tempdir):
+    parent = os.path.join(tempdir, "master.h5")
+    resolver = external_links.External_Link_Resolver(
+        prefix=os.pathsep.join(["/prefix", "${ORIGIN}/sub"])
+    )
+    assert resolver.search_path("a/b.h5", parent) == [
+        "/prefix/a/b.h5",
+        os.path.join(tempdir, "sub", "a/b.h5"),
+        os.path.join(tempdir, "a/b.h5"),
+        "a/b.h5",
+    ]
+    # absolute: first as given, then by base name
+    assert resolver.search_path("/elsewhere/b.h5", parent) == [
+        "/elsewhere/b.h5",
+        "/prefix/b.h5",
+        os.path.join(tempdir, "sub", "b.h5"),
+        os.path.join(tempdir, "b.h5"),
+        "b.h5",
+    ]
+
+
+def test_environment_prefix(tempdir, monkeypatch):
+    write_files(tempdir, "prefixed")
+    monkeypatch.setenv(external_links.EXT_PREFIX_ENVIRONMENT_VARIABLE, tempdir)
+    resolver = external_links.External_Link_Resolver()
+    assert resolver.prefixes == [tempdir]
+    path = resolver.resolve("prefixed/external.h5", "/no/such/dir/master.h5")
+    assert path == os.path.join(tempdir, "prefixed", "external.h5")
+
+
+def test_resolver(tempdir):
+    master = write_files(tempdir)
+    resolver = external_links.External_Link_Resolver(max_files=1, prefix="")
+
+    expected = os.path.join(tempdir, "data", "external.h5")
+    assert resolver.resolve("data/external.h5", master) == expected
+    assert resolver.resolve("no-such-file.h5", master) is None
+    assert resolver.exists(expected)
+    assert not resolver.exists(os.path.join(tempdir, "no-such-file.h5"))
+
+    # existence is checked once
+    os.rename(expected, expected + ".moved")
+    assert resolver.resolve("data/external.h5", master) == expected
+    os.rename(expected + ".moved", expected)
+
+    obj = resolver.get("data/external.h5", "/sample/temperature", master)
+    assert obj[()] == [273.15]
+    assert resolver.open(expected) == obj.file  # kept open
+    assert resolver.get("data/external.h5", "/no/such/path", master) is None
+    assert resolver.get("no-such-file.h5", "/sample", master) is None
+    assert len(resolver) == 1
+
+    # least recently used files are discarded
+    with h5py.File(master, "r"):
+        resolver.open(master)
+    assert len(resolver) == 1
+    assert resolver.open(master) is not None
+    resolver.set_max_files(0)
+    assert resolver.max_files == 1
+    resolver.clear()
+    assert len(resolver) == 0
+
+
+def test_validate(tempdir):
+    master = write_files(tempdir)
+    validator = validate.Data_File_Validator(ref=DEFAULT_NXDL_FILE_SET)
+    validator.validate(master)
+
+    v_item = validator.addresses["/sample/temperature"]
+    assert v_item.classpath == "/NXentry/NXsample/temperature"
+    assert v_item.h5_object[()] == [273.15]
+    assert len(validator.resolver) == 1
+
+    f = validator.addresses["/entry"].validations["external link"]
+    assert f.status == finding.WARN
+    assert "no-such-file.h5" in f.comment
+
+    validator.close()
+    assert len(validator.resolver) == 0
+
+
+def test_h5tree(tempdir):
+    master = write_files(tempdir)
+    report = h5tree.Hdf5TreeView(master).report()
+    assert "    missing: missing external file" in report
+    assert "    sample:NXsample" in report
+    assert "      temperature:NX_FLOAT64 = 273.15" in report
+
+
+def write_virtual_files(tempdir):
+    """master file with a virtual dataset: 2 rows in source.h5, 1 row missing"""
+    with h5py.File(os.path.join(tempdir, "source.h5"), "w") as f:
+        f.create_dataset("data", data=numpy.arange(10).reshape(2, 5))
+
+    layout = h5py.VirtualLayout(shape=(3, 5), dtype="i8")
+    for i in range(2):
+        layout[i] = h5py.VirtualSource("source.h5", "data", shape=(2, 5))[i]
+    layout[2] = h5py.VirtualSource("missing.h5", "data", shape=(5,))
+
+    master = os.path.join(tempdir, "master.h5")
+    with h5py.File(master, "w") as f:
+        eg = f.create_group("entry")
+        eg.attrs["NX_class"] = "NXentry"
+        dg = eg.create_group("data")
+        dg.attrs["NX_class"] = "NXdata"
+        dg.attrs["signal"] = "data"
+        dg.create_virtual_dataset("data", layout, fillvalue=-1)
+        dg.create_dataset("x", data=[1, 2, 3])
+    return master
+
+
+def test_virtual_sources(tempdir):
+    master = write_virtual_files(tempdir)
+    resolver = external_links.External_Link_Resolver(vds_prefix="")
+    with h5py.File(master, "r") as f:
+        assert resolver.virtual_sources(f["/entry/data/x"]) is None
+        assert resolver.virtual_sources(f["/entry/data"]) is None
+        sources = resolver.virtual_sources(f["/entry/data/data"])
+    assert sources.mappings == 3
+    assert sources.files == ("source.h5", "missing.h5")
+    assert sources.missing == ("missing.h5",)
+    assert sources.paths == (os.path.join(os.path.abspath(tempdir), "source.h5"),)
+    assert str(sources) == "3 mapping(s) from 2 source file(s), 1 not found: missing.h5"
+    assert len(resolver) == 0  # no source file opened
+
+
+def test_validate_virtual(tempdir):
+    master = write_virtual_files(tempdir)
+    validator = validate.Data_File_Validator(ref=DEFAULT_NXDL_FILE_SET)
+    validator.validate(master)
+
+    v_item = validator.addresses["/entry/data/data"]
+    f = v_item.validations["virtual dataset"]
+    assert f.status == finding.WARN
+    assert "missing.h5" in f.comment
+    assert "virtual dataset" not in validator.addresses["/entry/data/x"].validations
+    with h5py.File(master, "r") as f:
+        with pytest.raises(ValueNotInspected, match="virtual dataset"):
+            validator.read_value(f["/entry/data/data"])
+        validator.read_virtual_datasets = True
+        with pytest.raises(ValueNotInspected, match="not a scalar"):
+            validator.read_value(f["/entry/data/data"])  # now by the read budget
+
+
+def test_h5tree_virtual(tempdir):
+    master = write_virtual_files(tempdir)
+    tree = h5tree.Hdf5TreeView(master)
+    report = [line.strip() for line in tree.report()]
+    expected = "data:NX_INT64[3,5] = [ virtual: 3 mapping(s) from 2 source file(s), 1 not found: "
+    assert [s for s in report if s.startswith(expected)] != []
+    assert not any(s.startswith("@virtual") for s in report)
+
+    # the mappings are shown, even without the attributes
+    report = [line.strip() for line in tree.report(show_attributes=False)]
+    assert [s for s in report if s.startswith(expected)] != []
+
+    tree.read_virtual_datasets = True
+    report = [line.strip() for line in tree.report()]
+    assert [s for s in report if "virtual:" in s] == []
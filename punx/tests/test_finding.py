@@ -75,3 +75,58 @@ def test_Finding_make_md5(addr, test_name, status, comment):
 
         # can be duplicated from same inputs (is NOT random)?
         assert md5 == f.make_md5()
+
+
+def test_Finding_comment_template():
+    f = finding.Finding("/entry", "test", finding.OK, "found: %s/%s", "/entry", "title")
+    assert f._comment == "found: %s/%s"  # not formatted yet
+    assert f.comment == "found: /entry/title"
+    assert f.key() == f.make_md5()
+    assert not hasattr(f, "__dict__")
+
+
+def test_Finding_Store():
+    store = finding.Finding_Store()
+    assert len(store) == 0
+    assert store.score() == (0, 0, 0)
+
+    store.record("/entry", "test", finding.OK, "comment")
+    store.record("/entry@NX_class", "test", finding.ERROR, "%s: %d", "count", 2)
+    store.append(finding.Finding("/entry", "other", finding.TODO, "later"))
+    store.extend([finding.Finding("/", "test", finding.NOTE, "note")])
+    assert len(store) == 4
+    assert store.addresses == ["/entry", "/entry@NX_class", "/"]
+    assert store.test_names == ["test", "other"]
+    assert store.comments[1] == "%s: %d"
+    assert store.comment(1) == "count: 2"
+
+    f = store[-3]
+    assert isinstance(f, finding.Finding)
+    assert (f.h5_address, f.test_name, f.status, f.comment) == (
+        "/entry@NX_class",
+        "test",
+        finding.ERROR,
+        "count: 2",
+    )
+    assert [f.test_name for f in store[2:]] == ["other", "test"]
+    with pytest.raises(IndexError):
+        store[4]
+    with pytest.raises(ValueError):
+        store.record("/", "test", "OK", "not a status")
+
+    summary = store.summary()
+    assert list(summary.keys()) == list(finding.VALID_STATUS_LIST)
+    assert summary[finding.OK] == summary[finding.ERROR] == summary[finding.TODO] == 1
+    assert store.summary([finding.NOTE, finding.WARN]) == {finding.NOTE: 1, finding.WARN: 0}
+    total = finding.OK.value + finding.ERROR.value + finding.NOTE.value
+    assert store.score() == (total, 3, total / 3)
+
+    # by address (attributes after their item), then by status
+    assert store.report_order() == [3, 2, 0, 1]
+
+
+def test_status_pickle():
+    import pickle
+
+    for status in finding.VALID_STATUS_LIST:
+        assert pickle.loads(pickle.dumps(status)) is status
@@ -20,7 +20,8 @@ def test_DLS_master_file():
     Test that missing external links are handled gracefully.
 
     Using the data from DLS (a master file with missing external files),
-    test that the tree renders a 183-item report, with no errors.
+    test that the tree renders a 182-item report, with no errors.
+    (The values of the virtual dataset /entry/data/data are not shown, only its mapping.)
     """
     os.path.exists(TESTFILE)
 
@@ -29,7 +30,10 @@ def test_DLS_master_file():
 
     report = tree.report()
     assert isinstance(report, list)
-    assert len(report) == 183
+    assert len(report) == 182
+    assert report[10].strip() == (
+        "data:NX_INT64[488,4362,4148] = [ virtual: 1 mapping(s) from 1 source file(s) ]"
+    )
 
 
 def test_SwissFEL_file_replica(hfile):
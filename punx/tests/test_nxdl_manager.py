@@ -1,8 +1,11 @@
+import collections
 import lxml.etree
 import os
 import pytest
+import shutil
 
 from ._core import No_Exception
+from ._core import tempdir
 from .. import cache_manager
 from .. import FileNotFound
 from .. import InvalidNxdlFile
@@ -186,6 +189,372 @@ def test_count_NXDL_files(file_set, num_nxdl_files):
     assert len(manager.classes) == num_nxdl_files
 
 
+def copy_file_set(file_set_name, path):
+    """Return a NXDL_File_Set copied into the directory ``path``."""
+    cm = cache_manager.CacheManager()
+    source = cm.NXDL_file_sets[file_set_name].path
+    target = os.path.join(path, file_set_name)
+    shutil.copytree(source, target)
+    for item in os.listdir(target):
+        if item in (nxdl_manager.SNAPSHOT_FILE_NAME, nxdl_manager.VALID_NXDL_FILE_NAME):
+            os.remove(os.path.join(target, item))  # start clean
+
+    fs = cache_manager.NXDL_File_Set()
+    fs.read_info_file(os.path.join(target, cache_manager.INFO_FILE_NAME))
+    return fs
+
+
+def test_NXDL_Manager_snapshot(tempdir):
+    fs = copy_file_set("v3.3", tempdir)
+    snapshot = os.path.join(fs.path, nxdl_manager.SNAPSHOT_FILE_NAME)
+    assert not os.path.exists(snapshot)
+
+    first = nxdl_manager.NXDL_Manager(fs)
+    assert not first.from_snapshot
+    assert os.path.exists(snapshot)
+
+    second = nxdl_manager.NXDL_Manager(fs)
+    assert second.from_snapshot
+    assert str(second) == str(first)
+    assert list(second.classes) == list(first.classes)
+    for k, v in second.classes.items():
+        assert v.nxdl_manager is second
+        assert str(v) == str(first.classes[k])
+    nxdata = second.classes["NXdata"]
+    assert nxdata.fields["errors"].nxdl_definition is nxdata
+
+    # any change to a source file will rebuild the snapshot
+    fname = os.path.join(fs.path, "base_classes", "NXdata.nxdl.xml")
+    st = os.stat(fname)
+    os.utime(fname, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    third = nxdl_manager.NXDL_Manager(fs)
+    assert not third.from_snapshot
+    assert nxdl_manager.NXDL_Manager(fs).from_snapshot
+
+    # do not use (or write) the snapshot when asked
+    os.remove(snapshot)
+    fourth = nxdl_manager.NXDL_Manager(fs, use_snapshot=False)
+    assert not fourth.from_snapshot
+    assert not os.path.exists(snapshot)
+
+
+def test_NXDL_Manager_snapshot_unloaded(tempdir):
+    fs = copy_file_set("v3.3", tempdir)
+    manager = nxdl_manager.NXDL_Manager(fs)
+    assert not manager.from_snapshot
+
+    # classes loaded to write the snapshot are not kept
+    classes = manager.classes
+    assert not any(classes.is_loaded(k) for k in classes)
+    nxdata = classes["NXdata"]
+    assert [k for k in classes if classes.is_loaded(k)] == ["NXdata"]
+    assert nxdata.nxdl_manager is manager
+    assert nxdata.fields["errors"].nxdl_definition is nxdata
+    assert str(nxdata) == str(nxdl_manager.NXDL_Manager(fs, use_snapshot=False).classes["NXdata"])
+
+
+def test_NXDL_Manager_snapshot_damaged(tempdir):
+    fs = copy_file_set("v3.3", tempdir)
+    snapshot = os.path.join(fs.path, nxdl_manager.SNAPSHOT_FILE_NAME)
+    with open(snapshot, "wb") as fp:
+        fp.write(b"not a snapshot")
+
+    manager = nxdl_manager.NXDL_Manager(fs)
+    assert not manager.from_snapshot
+    assert len(manager.classes) == 98
+    assert nxdl_manager.NXDL_Manager(fs).from_snapshot
+
+
+@pytest.mark.parametrize("use_snapshot", [False, True])
+def test_NXDL_Class_Dict_lazy(use_snapshot, tempdir):
+    fs = copy_file_set("v3.3", tempdir)
+    if use_snapshot:
+        nxdl_manager.NXDL_Manager(fs)  # write the snapshot
+    manager = nxdl_manager.NXDL_Manager(fs, use_snapshot=use_snapshot)
+    assert manager.from_snapshot == use_snapshot
+    classes = manager.classes
+    assert isinstance(classes, nxdl_manager.NXDL_Class_Dict)
+
+    # titles & categories are known before any NXDL class is loaded
+    assert len(classes) == 98
+    assert "NXdata" in classes
+    assert classes.categories["NXdata"] == "base_classes"
+    assert classes.categories["NXmx"] == "applications"
+    assert str(manager).startswith("NXDL_Manager(applications:")
+    assert not any(classes.is_loaded(k) for k in classes)
+
+    nxdata = classes.get("NXdata")
+    assert isinstance(nxdata, nxdl_manager.NXDL__definition)
+    assert classes.is_loaded("NXdata")
+    assert classes["NXdata"] is nxdata
+    assert classes.get("NXno_such_class") is None
+    assert [k for k in classes if classes.is_loaded(k)] == ["NXdata"]
+
+    # values() & items() load everything
+    for v in classes.values():
+        assert isinstance(v, nxdl_manager.NXDL__definition)
+    assert all(classes.is_loaded(k) for k in classes)
+
+
+def test_NXDL_Manager_own_xml_schema(tempdir):
+    cm = cache_manager.CacheManager()
+    cm.select_NXDL_file_set("v2018.5")  # not the file set to be loaded
+    fs = copy_file_set("v3.3", tempdir)
+
+    manager = nxdl_manager.NXDL_Manager(fs, use_snapshot=False)
+    default_schema = cm.default_file_set.schema_manager.lxml_schema
+    assert manager.xml_schema is not default_schema
+    manager.classes.load_all()  # validates with v3.3 nxdl.xsd
+    assert len(manager.classes) == 98
+
+    # compiled once per file set
+    other = nxdl_manager.NXDL_Manager(fs, use_snapshot=False)
+    assert other.xml_schema is manager.xml_schema
+
+
+def test_valid_nxdl_record(tempdir, monkeypatch):
+    fs = copy_file_set("v3.3", tempdir)
+    record_file = os.path.join(fs.path, nxdl_manager.VALID_NXDL_FILE_NAME)
+    assert not os.path.exists(record_file)
+
+    manager = nxdl_manager.NXDL_Manager(fs, use_snapshot=False)
+    manager.classes["NXdata"]
+    assert os.path.exists(record_file)
+    record = cache_manager.read_json_file(record_file)
+    assert list(record["files"]) == [os.path.join("base_classes", "NXdata.nxdl.xml")]
+
+    validated = []
+
+    def validate_xml_tree(xml_tree, schema=None):
+        validated.append(xml_tree.docinfo.URL)
+
+    monkeypatch.setattr(nxdl_manager, "validate_xml_tree", validate_xml_tree)
+
+    # valid NXDL files are not validated again
+    manager = nxdl_manager.NXDL_Manager(fs, use_snapshot=False)
+    manager.classes["NXdata"]
+    assert validated == []
+    manager.classes["NXentry"]
+    assert len(validated) == 1
+
+    # ... unless changed
+    fname = os.path.join(fs.path, "base_classes", "NXdata.nxdl.xml")
+    with open(fname, "a") as fp:
+        fp.write("<!-- changed -->\n")
+    manager = nxdl_manager.NXDL_Manager(fs, use_snapshot=False)
+    manager.classes["NXdata"]
+    manager.classes["NXentry"]
+    assert validated[1:] == [fname]
+
+
+def test_NXDL_Manager_Registry():
+    registry = nxdl_manager.NXDL_Manager_Registry(max_managers=2)
+    v33 = registry.get("v3.3")
+    assert isinstance(v33, nxdl_manager.NXDL_Manager)
+    assert v33.nxdl_file_set.ref == "v3.3"
+    assert registry.get("v3.3") is v33
+    assert "v3.3" in registry
+    assert len(registry) == 1
+
+    a4fd52d = registry.get("a4fd52d")
+    assert a4fd52d is not v33
+    registry.get("v3.3")  # most recently used
+    registry.get("v2018.5")  # discards the least recently used
+    assert len(registry) == 2
+    assert "a4fd52d" not in registry
+    assert "v3.3" in registry
+
+    registry.set_max_managers(1)
+    assert len(registry) == 1
+    assert "v2018.5" in registry
+    registry.clear()
+    assert len(registry) == 0
+
+    with pytest.raises(KeyError):
+        registry.get("no such file set")
+
+
+def test_NXDL_Manager_Registry_threads():
+    import concurrent.futures
+
+    registry = nxdl_manager.NXDL_Manager_Registry()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
+        managers = list(executor.map(registry.get, ["v3.3"] * 8))
+    assert len(registry) == 1
+    assert all(m is managers[0] for m in managers)
+    assert nxdl_manager.get_shared_manager("v3.3") is nxdl_manager.get_shared_manager("v3.3")
+
+
+def test_NXDL_Manager_Registry_lock_per_file_set(monkeypatch):
+    import threading
+
+    registry = nxdl_manager.NXDL_Manager_Registry()
+    v33 = registry.get("v3.3")
+
+    started = threading.Event()
+    release = threading.Event()
+    original = nxdl_manager.NXDL_Manager
+
+    def slow_manager(file_set, *args, **kwargs):
+        if file_set.ref == "v2018.5":
+            started.set()
+            assert release.wait(timeout=60)
+        return original(file_set, *args, **kwargs)
+
+    monkeypatch.setattr(nxdl_manager, "NXDL_Manager", slow_manager)
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(registry.get("v2018.5")))
+        for _ in range(2)
+    ]
+    for thread in threads:
+        thread.start()
+    assert started.wait(timeout=60)
+
+    # other file sets are not blocked by the slow one
+    assert registry.get("v3.3") is v33
+    a4fd52d = registry.get("a4fd52d")
+    assert a4fd52d.nxdl_file_set.ref == "a4fd52d"
+    assert "v2018.5" not in registry
+
+    release.set()
+    for thread in threads:
+        thread.join(timeout=60)
+    assert len(results) == 2
+    assert results[0] is results[1]
+    assert registry.get("v2018.5") is results[0]
+    assert len(registry) == 3
+
+
+def test_NXDL_Class_Spec():
+    manager = nxdl_manager.NXDL_Manager("v3.3")
+    spec = manager.get_class_spec("NXsource")
+    assert spec is manager.get_class_spec("NXsource")  # compiled once
+    assert spec.known
+    assert spec.nxdl is manager.classes["NXsource"]
+    assert spec.category == "base_classes"
+    assert spec.is_base_class
+    assert spec.used_as_base_class
+    assert isinstance(spec.fields, frozenset)
+    assert "probe" in spec.fields
+    assert "probe" in spec.field_enumerations
+    assert "x-ray" in spec.field_enumerations["probe"]
+    assert isinstance(spec.field_enumerations["probe"], frozenset)
+    assert "distance" not in spec.field_enumerations
+
+    spec = manager.get_class_spec("NXmx")
+    assert spec.category == "applications"
+    assert not spec.is_base_class
+    assert not spec.used_as_base_class
+    assert spec.groups == frozenset(["entry"])
+    assert spec.entry.field_names[:2] == ("title", "start_time")  # NXDL order
+    assert "definition" in spec.entry.required_fields
+    assert spec.entry.field_enumerations["definition"] == frozenset(["NXmx"])
+    assert spec.entry.enumeration_lists["definition"] == ("NXmx",)
+    assert manager.get_class_spec("NXentry").entry is None
+
+    spec = manager.get_class_spec("NXno_such_class")
+    assert not spec.known
+    assert spec.nxdl is None
+    assert not spec.used_as_base_class
+    assert len(spec.fields) == 0
+
+
+def test_Name_Classifier():
+    patterns = collections.OrderedDict()
+    patterns["strict"] = "[a-z_][a-z0-9_]*"
+    patterns["relaxed"] = r"[A-Za-z_][\w_]*"
+    classifier = nxdl_manager.Name_Classifier(patterns, cache_size=2)
+    assert classifier.classify("entry") == "strict"  # first match wins
+    assert classifier.classify("Entry") == "relaxed"
+    assert classifier.classify("entry") == "strict"
+    assert classifier.classify.cache_info().hits == 1
+    assert classifier.classify("1entry") is None
+    assert classifier.classify("") is None
+    assert classifier.classify.cache_info().currsize == 2  # bounded
+
+
+def as_plain_data(obj):
+    """Render an NXDL structure as plain Python data, for comparisons."""
+    if isinstance(obj, dict):
+        return {k: as_plain_data(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [as_plain_data(v) for v in obj]
+    if isinstance(obj, (nxdl_manager.NXDL__base, nxdl_schema.NXDL_schema__Mixin)):
+        content = dict(getattr(obj, "__dict__", {}))
+        for cls in type(obj).__mro__:
+            for k in getattr(cls, "__slots__", ()):
+                if hasattr(obj, k):
+                    content[k] = getattr(obj, k)
+        d = {
+            k: as_plain_data(v)
+            for k, v in content.items()
+            if k not in ("nxdl_definition", "nxdl_manager")
+        }
+        d["__class__"] = type(obj).__name__
+        return d
+    return obj
+
+
+def test_parallel_load_same_as_serial():
+    serial = nxdl_manager.NXDL_Manager("v3.3", use_snapshot=False)
+    serial.classes.load_all()
+    parallel = nxdl_manager.NXDL_Manager("v3.3", use_snapshot=False)
+    parallel.classes.load_all(processes=2)
+
+    assert list(parallel.classes) == list(serial.classes)
+    for title, definition in parallel.classes.items():
+        assert definition.nxdl_manager is parallel
+        assert as_plain_data(definition) == as_plain_data(serial.classes[title])
+    # shared defaults are not copied into each class
+    nxdata = parallel.classes["NXdata"]
+    xml_attribute = nxdata.fields["errors"].xml_attributes["units"]
+    assert xml_attribute is parallel.nxdl_defaults.field.attributes["units"]
+
+
+def test_application_defaults_not_shared():
+    manager = nxdl_manager.NXDL_Manager("v3.3", use_snapshot=False)
+    nxmx = manager.classes["NXmx"]  # applications: minOccurs=1
+    field = nxmx.groups["entry"].fields["definition"]
+    assert field.xml_attributes["minOccurs"].default_value == 1
+
+    # NXDL "field" default from nxdl.xsd is not changed
+    spec = manager.nxdl_defaults.field.attributes["minOccurs"]
+    assert spec is not field.xml_attributes["minOccurs"]
+    nxentry = manager.classes["NXentry"]
+    assert nxentry.fields["title"].xml_attributes["minOccurs"] is spec
+
+
+@pytest.mark.parametrize("use_snapshot", [False, True])
+def test_NXDL__base_compact(use_snapshot, tempdir):
+    fs = copy_file_set("v3.3", tempdir)
+    if use_snapshot:
+        nxdl_manager.NXDL_Manager(fs)  # write the snapshot
+    manager = nxdl_manager.NXDL_Manager(fs, use_snapshot=use_snapshot)
+    assert manager.from_snapshot == use_snapshot
+    nxdata = manager.classes["NXdata"]
+    nxentry = manager.classes["NXentry"]
+    field = nxdata.fields["errors"]
+    assert not hasattr(field, "__dict__")
+    with pytest.raises(AttributeError):
+        field.no_such_attribute = None
+
+    # tables of XML attribute defaults are shared
+    assert field.xml_attributes is nxentry.fields["title"].xml_attributes
+    nxmx = manager.classes["NXmx"]
+    entry = nxmx.groups["entry"]
+    assert entry.fields["definition"].xml_attributes is entry.fields["title"].xml_attributes
+    assert entry.fields["title"].xml_attributes is not field.xml_attributes
+
+    # documentation is read from the NXDL file when requested
+    assert field.sourceline is not None
+    assert field.doc.startswith("Standard deviations of data values")
+    assert nxdata.doc.startswith(":ref:`NXdata` describes the plottable data")
+    assert nxentry.groups["data"].doc.startswith("The data group")
+    assert "NXentry(" in str(nxentry)
+    assert str(field).startswith("NXDL__field(")
+
+
 def test_NXDL__base_structure():
     """Spot-check one"""
     file_set = "a4fd52d"
@@ -219,6 +588,25 @@ def test_NXDL__base_subclasses(item):
     assert issubclass(item, nxdl_manager.NXDL__base)
 
 
+@pytest.mark.parametrize("file_set", ["a4fd52d", "v2018.5", "v3.3"])
+def test_NXDL__base_required_slots(file_set):
+    """each required XML attribute (of the NXDL schema) has a place"""
+    cache_manager.CacheManager()
+    manager = nxdl_manager.NXDL_Manager(file_set)
+    defaults = manager.nxdl_defaults
+    for tag, item in (
+        ("attribute", nxdl_manager.NXDL__attribute),
+        ("field", nxdl_manager.NXDL__field),
+        ("group", nxdl_manager.NXDL__group),
+        ("link", nxdl_manager.NXDL__link),
+    ):
+        slots = set()
+        for cls in item.__mro__:
+            slots.update(getattr(cls, "__slots__", ()))
+        required = [k for k, v in getattr(defaults, tag).attributes.items() if v.required]
+        assert set(required) <= slots, tag
+
+
 @pytest.mark.parametrize(
     "nxclass, file_set, attr_names",
     [
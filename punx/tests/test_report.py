@@ -0,0 +1,110 @@
+import csv
+import io
+import json
+import os
+import pytest
+
+from ._core import DEFAULT_NXDL_FILE_SET
+from ._core import EXAMPLE_DATA_DIR
+from .. import batch
+from .. import finding
+from .. import report
+from .. import validate
+
+
+@pytest.fixture(scope="module")
+def validator():
+    validator = validate.Data_File_Validator(ref=DEFAULT_NXDL_FILE_SET)
+    validator.validate(os.path.join(EXAMPLE_DATA_DIR, "writer_1_3.hdf5"))
+    yield validator
+    validator.close()
+
+
+def expected_rows(validator, statuses=None):
+    store = validator.validations
+    return [
+        (f.h5_address, str(f.status), f.test_name, f.comment)
+        for f in (store[i] for i in store.report_order())
+        if statuses is None or str(f.status) in statuses
+    ]
+
+
+def test_jsonl(validator):
+    fp = io.StringIO()
+    assert validator.write_report(fp, "jsonl") == len(validator.validations)
+    lines = fp.getvalue().splitlines()
+    header = json.loads(lines[0])
+    assert header["data_file"] == validator.fname
+    assert header["nxdl_file_set"] == validator.manager.nxdl_file_set.ref
+    rows = [json.loads(line) for line in lines[1:-1]]
+    assert [tuple(r[c] for c in report.COLUMNS) for r in rows] == expected_rows(validator)
+    summary = json.loads(lines[-1])
+    assert summary["summary"]["OK"] == validator.finding_summary()[finding.OK]
+    assert summary["score"]["count"] == validator.finding_score()[1]
+
+    # same text as json.dumps()
+    row = ("/a@b", "OK", 'quote " and \\ backslash', "non-ASCII: Å \t")
+    fp = io.StringIO()
+    report.get_writer("jsonl", fp).write_row(row)
+    assert fp.getvalue() == json.dumps(dict(zip(report.COLUMNS, row))) + "\n"
+
+
+@pytest.mark.parametrize("fmt, delimiter", [("csv", ","), ("tsv", "\t")])
+def test_csv(validator, fmt, delimiter):
+    statuses = ["OK", "NOTE"]
+    fp = io.StringIO()
+    written = validator.write_report(fp, fmt, statuses)
+    fp.seek(0)
+    rows = [tuple(row) for row in csv.reader(fp, delimiter=delimiter)]
+    assert rows[0] == report.COLUMNS
+    assert rows[1:] == expected_rows(validator, statuses)
+    assert written == len(rows) - 1
+
+
+def test_text(validator):
+    fp = io.StringIO()
+    validator.write_report(fp, "text", ["NOTE"])
+    lines = fp.getvalue().splitlines()
+    assert lines[0] == "data file: " + validator.fname
+    assert lines[3].split() == list(report.COLUMNS)
+    widths = [len(dashes) for dashes in lines[4].split()]
+    assert widths[0] == max(len(a) for a in validator.validations.addresses)
+    (address, status, test, comment), = expected_rows(validator, ["NOTE"])
+    assert lines[5] == "  ".join(
+        [address.ljust(widths[0]), status.ljust(widths[1]), test.ljust(widths[2]), comment]
+    )
+    assert lines[-1].startswith("<finding>=")
+
+
+def test_file_result():
+    result = batch.File_Result(0, "example.h5")
+    result.findings = [
+        ("/entry@NX_class", "known NXDL", "OK", "known"),
+        ("/entry", "validItemName", "NOTE", "relaxed"),
+    ]
+    fp = io.StringIO()
+    writer = report.get_writer("csv", fp, ("file",) + report.COLUMNS)
+    assert report.write_file_result(writer, result) == 2
+    assert fp.getvalue().splitlines() == [
+        "file,address,status,test,comment",
+        "example.h5,/entry,NOTE,validItemName,relaxed",
+        "example.h5,/entry@NX_class,OK,known NXDL,known",
+    ]
+
+
+def test_register_writer():
+    with pytest.raises(KeyError, match="unknown report format"):
+        report.get_writer("xml", io.StringIO())
+
+    class Count_Writer(report.Report_Writer):
+        name = "count"
+
+        def write_row(self, row):
+            self.rows += 1
+
+    report.register_writer(Count_Writer)
+    try:
+        writer = report.get_writer("count", io.StringIO())
+        assert isinstance(writer, Count_Writer)
+    finally:
+        del report.WRITERS["count"]
@@ -0,0 +1,116 @@
+import h5py
+import os
+import shutil
+
+from ._core import DEFAULT_NXDL_FILE_SET
+from ._core import EXAMPLE_DATA_DIR
+from ._core import tempdir
+from .. import result_cache
+from .. import validate
+
+
+def findings_of(validator):
+    return sorted(
+        (f.h5_address, f.test_name, str(f.status), f.comment)
+        for f in validator.validations
+    )
+
+
+def test_validate(tempdir):
+    fname = os.path.join(tempdir, "writer_1_3.hdf5")
+    shutil.copy(os.path.join(EXAMPLE_DATA_DIR, "writer_1_3.hdf5"), fname)
+    cache = result_cache.Validation_Result_Cache(os.path.join(tempdir, "cache"))
+    validator = validate.Data_File_Validator(ref=DEFAULT_NXDL_FILE_SET)
+
+    assert not cache.validate(validator, fname)
+    expected = findings_of(validator)
+    assert "/Scan" in validator.addresses
+
+    assert cache.validate(validator, fname)
+    assert findings_of(validator) == expected
+    assert validator.fname == fname
+    assert len(validator.addresses) == 0  # not opened
+
+    assert not cache.validate(validator, fname, refresh=True)
+    assert (cache.hits, cache.misses) == (1, 2)
+
+    # changed
+    validator.close()
+    with h5py.File(fname, "a") as f:
+        f["/Scan"].create_group("notes").attrs["NX_class"] = "NXnote"
+    assert not cache.validate(validator, fname)
+    assert "/Scan/notes" in validator.addresses
+    assert cache.validate(validator, fname)
+
+    # copy: another file, unless identified by its content
+    copy = os.path.join(tempdir, "copy.hdf5")
+    shutil.copy(fname, copy)
+    assert cache.get(validator, copy) is None
+    cache = result_cache.Validation_Result_Cache(cache.directory, digest=True)
+    assert not cache.validate(validator, fname)
+    assert cache.validate(validator, copy)
+
+
+def test_external_link(tempdir):
+    target = os.path.join(tempdir, "target.h5")
+    with h5py.File(target, "w") as f:
+        f.create_dataset("x", data=[1, 2, 3])
+    fname = os.path.join(tempdir, "master.h5")
+    with h5py.File(fname, "w") as f:
+        f["x"] = h5py.ExternalLink("target.h5", "/x")
+        f["missing"] = h5py.ExternalLink("missing.h5", "/x")
+
+    cache = result_cache.Validation_Result_Cache(os.path.join(tempdir, "cache"))
+    validator = validate.Data_File_Validator(ref=DEFAULT_NXDL_FILE_SET)
+    assert not cache.validate(validator, fname)
+    assert not cache.validate(validator, fname)  # a file not found: not kept
+
+    validator.close()
+    with h5py.File(fname, "a") as f:
+        del f["missing"]
+    assert not cache.validate(validator, fname)
+    assert cache.validate(validator, fname)
+
+    with h5py.File(target, "a") as f:
+        f.create_dataset("y", data=[4, 5, 6])
+    assert cache.get(validator, fname) is None  # the target file changed
+
+
+def test_virtual_sources(tempdir):
+    source = os.path.join(tempdir, "source.h5")
+    with h5py.File(source, "w") as f:
+        f.create_dataset("data", data=[1, 2, 3])
+    layout = h5py.VirtualLayout(shape=(3,), dtype="i8")
+    layout[:] = h5py.VirtualSource("source.h5", "data", shape=(3,))
+    fname = os.path.join(tempdir, "master.h5")
+    with h5py.File(fname, "w") as f:
+        f.create_virtual_dataset("data", layout)
+
+    cache = result_cache.Validation_Result_Cache(os.path.join(tempdir, "cache"))
+    validator = validate.Data_File_Validator(ref=DEFAULT_NXDL_FILE_SET)
+    assert not cache.validate(validator, fname)
+    assert cache.validate(validator, fname)
+
+    with h5py.File(source, "a") as f:
+        f.create_dataset("more", data=[4, 5, 6])
+    assert cache.get(validator, fname) is None  # the source file changed
+    assert not cache.validate(validator, fname)
+    assert cache.validate(validator, fname)
+
+
+def test_evict(tempdir):
+    cache = result_cache.Validation_Result_Cache(
+        os.path.join(tempdir, "cache"), max_age=100, max_bytes=250
+    )
+    os.makedirs(cache.directory)
+    now = 1e9
+    for i, age in enumerate((10, 20, 30, 200)):
+        path = os.path.join(cache.directory, "%d.pickle" % i)
+        with open(path, "wb") as f:
+            f.write(b"x" * 100)
+        os.utime(path, (now - age, now - age))
+
+    assert cache.evict(now=now) == 2  # too old: 3, too many bytes: 2
+    assert sorted(os.listdir(cache.directory)) == ["0.pickle", "1.pickle"]
+    assert cache.clear() == 2
+    assert os.listdir(cache.directory) == []
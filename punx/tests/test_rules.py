@@ -0,0 +1,172 @@
+import h5py
+import importlib.metadata
+import os
+import pytest
+
+from ._core import DEFAULT_NXDL_FILE_SET
+from ._core import tempdir
+from .. import finding
+from .. import rules
+from .. import validate
+
+
+def write_file(tempdir):
+    fname = os.path.join(tempdir, "rules.h5")
+    with h5py.File(fname, "w") as f:
+        f.attrs["default"] = "entry"
+        entry = f.create_group("entry")
+        entry.attrs["NX_class"] = "NXentry"
+        entry.attrs["default"] = "data"
+        data = entry.create_group("data")
+        data.attrs["NX_class"] = "NXdata"
+        data.attrs["signal"] = "y"
+        ds = data.create_dataset("y", data=[1, 2, 3])
+        ds.attrs["units"] = "counts"
+    return fname
+
+
+def names_of(registry, scope, v_item):
+    return [rule.name for rule in registry.select(scope, v_item)]
+
+
+def test_default_registry(tempdir):
+    registry = rules.default_registry()
+    assert registry is rules.default_registry()
+    assert registry.families() == [
+        "item names",
+        "attributes",
+        "hard links",
+        "virtual datasets",
+        "base classes",
+        "application definitions",
+        "default plot",
+    ]
+
+    validator = validate.Data_File_Validator(ref=DEFAULT_NXDL_FILE_SET)
+    validator.validate(write_file(tempdir))
+    addresses = validator.addresses
+    assert names_of(registry, rules.ITEM, addresses["/entry/data@signal"]) == [
+        "valid item name",
+        "@signal",
+    ]
+    assert names_of(registry, rules.ITEM, addresses["/entry@default"]) == [
+        "valid item name",
+        "attribute",  # (no rule for @default)
+    ]
+    assert names_of(registry, rules.ITEM, addresses["/entry/data/y"]) == [
+        "valid item name",
+        "HDF5 hard link",
+        "virtual dataset",
+    ]
+    assert names_of(registry, rules.GROUP, addresses["/entry/data"]) == ["NeXus group"]
+    assert names_of(registry, rules.GROUP, addresses["/entry/data/y"]) == []
+    validator.close()
+
+
+def test_disable_rules(tempdir):
+    fname = write_file(tempdir)
+    validator = validate.Data_File_Validator(ref=DEFAULT_NXDL_FILE_SET)
+    validator.validate(fname)
+    test_names = set(f.test_name for f in validator.validations)
+    assert "attribute value" in test_names
+    assert "NeXus default plot" in test_names
+
+    validator.disable_rules("attributes", "default plot")
+    validator.validate(fname)
+    test_names = set(f.test_name for f in validator.validations)
+    assert "attribute value" not in test_names
+    assert "NeXus default plot" not in test_names
+    assert "validItemName" in test_names
+    assert "default plot" not in [rule.family for rule in validator.enabled_rules()]
+
+    validator.enable_rules("default plot")
+    validator.validate(fname)
+    assert "NeXus default plot" in set(f.test_name for f in validator.validations)
+
+    with pytest.raises(ValueError, match="unknown rule family"):
+        validator.disable_rules("no such family")
+    validator.close()
+
+
+@pytest.mark.parametrize(
+    "method, address, scope, family",
+    [
+        ("validate_item_name", "/entry/data/y", rules.ITEM, "item names"),
+        ("validate_attribute", "/entry/data@signal", rules.ITEM, "attributes"),
+        ("validate_group", "/entry/data", rules.GROUP, "base classes"),
+    ],
+)
+def test_deprecated_methods(tempdir, method, address, scope, family):
+    validator = validate.Data_File_Validator(ref=DEFAULT_NXDL_FILE_SET)
+    validator.validate(write_file(tempdir))
+    v_item = validator.addresses[address]
+
+    def findings_of(check):
+        validator.validations = finding.Finding_Store()
+        check()
+        return sorted((f.h5_address, f.test_name, str(f.status), f.comment) for f in validator.validations)
+
+    def by_rules():
+        for rule in validator.rules.select(scope, v_item):
+            if rule.family == family:
+                rule.check(validator, v_item)
+
+    expected = findings_of(by_rules)
+    assert len(expected) > 0
+    with pytest.warns(DeprecationWarning, match=method):
+        assert findings_of(lambda: getattr(validator, method)(v_item)) == expected
+    validator.close()
+
+
+def test_selectors(tempdir):
+    registry = rules.Rule_Registry()
+    checked = []
+
+    def check(validator, v_item):
+        checked.append(v_item.h5_address)
+        validator.record_finding(v_item, "custom", finding.NOTE, "checked")
+
+    registry.register(rules.Rule("units", check, kinds=("attribute",), names=("units",)))
+    registry.register(rules.Rule("in NXdata", check, family="data", kinds=("field",), nx_classes=("NXdata",)))
+    registry.register(rules.Rule("entries", check, rules.GROUP, family="data", classpath="/NXentry"))
+    with pytest.raises(ValueError, match="unknown scope"):
+        rules.Rule("bad", check, scope="no such scope")
+    with pytest.raises(ValueError, match="unknown kind"):
+        rules.Rule("bad", check, kinds=("dataset",))
+
+    validator = validate.Data_File_Validator(ref=DEFAULT_NXDL_FILE_SET)
+    validator.rules = registry
+    validator.validate(write_file(tempdir))
+    assert sorted(checked) == ["/entry", "/entry/data/y", "/entry/data/y@units"]
+    assert len(validator.validations) == 3
+
+    checked.clear()
+    validator.disable_rules("data")
+    validator.validate(validator.fname)
+    assert checked == ["/entry/data/y@units"]
+    validator.close()
+
+
+def test_load_entry_points(monkeypatch):
+    rule = rules.Rule("one rule", lambda validator, v_item: None)
+
+    class Entry_Point(object):
+        def __init__(self, name, obj):
+            self.name = name
+            self.obj = obj
+
+        def load(self):
+            if isinstance(self.obj, Exception):
+                raise self.obj
+            return self.obj
+
+    entry_points = [
+        Entry_Point("rule", rule),
+        Entry_Point("list", [rules.Rule("in a list", rule.check)]),
+        Entry_Point("function", lambda registry: registry.register(rules.Rule("registered", rule.check))),
+        Entry_Point("broken", ImportError("no such module")),
+    ]
+    monkeypatch.setattr(importlib.metadata, "entry_points", lambda group: entry_points)
+    registry = rules.Rule_Registry()
+    assert registry.load_entry_points() == 3
+    assert [r.name for r in registry.rules] == ["one rule", "in a list", "registered"]
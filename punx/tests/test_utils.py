@@ -27,6 +27,25 @@ def test_byte_string():
         assert s == utils.decode_byte_string(arr)
 
 
+def test_read_attributes(hfile):
+    with h5py.File(hfile, "w") as f:
+        f.attrs["units"] = numpy.bytes_(b"\xb0")  # not UTF-8
+        f.attrs["NX_class"] = numpy.bytes_(b"NXroot")
+        f.attrs["axes"] = numpy.array([b"x", b"y"])
+        f.attrs["count"] = 5
+
+    with h5py.File(hfile, "r") as f:
+        attrs = utils.read_attributes(f)
+
+    assert list(attrs) == ["NX_class", "axes", "count", "units"]
+    assert attrs["NX_class"] == "NXroot"
+    assert attrs["axes"] == ["x", "y"]
+    assert attrs["count"] == 5
+    assert attrs["units"] == b"\xb0"  # kept as read
+    with pytest.raises(TypeError):
+        attrs["count"] = 6  # read-only
+
+
 def test_isHdf5FileObject(hfile):
     with h5py.File(hfile, "w") as f:
         assert not utils.isHdf5FileObject(hfile)
@@ -19,18 +19,22 @@ ISSUES
 """
 
 import h5py
+import numpy
 import os
 import pytest
+import tracemalloc
 
 from ._core import DEFAULT_NXDL_FILE_SET
 from ._core import EXAMPLE_DATA_DIR
 from ._core import hfile
 from ._core import No_Exception
+from ._core import tempdir
 from .. import FileNotFound
 from .. import finding
 from .. import HDF5_Open_Error
 from .. import utils
 from .. import validate
+from .. import ValueNotInspected
 
 
 def avert_exception(fname):
@@ -238,6 +242,342 @@ def test_proper_classpath_determined(hfile):
     assert "/NXentry/NXdata@signal" in validator.classpaths
 
 
+def test_attribute_snapshot(hfile):
+    setup_simple_test_file_validate(hfile)
+    with h5py.File(hfile, "r+") as f:
+        f["/entry"].attrs["title"] = numpy.bytes_(b"byte string")
+
+    validator = validate.Data_File_Validator(ref=DEFAULT_NXDL_FILE_SET)
+    validator.validate(hfile)
+
+    entry = validator.addresses["/entry"]
+    assert entry.attrs["NX_class"] == "NXentry"
+    assert entry.attrs["title"] == "byte string"
+    with pytest.raises(TypeError):
+        entry.attrs["title"] = "changed"  # read-only
+    title = validator.addresses["/entry@title"]
+    assert title.value == "byte string"
+    assert title.attrs == {}
+    data = validator.addresses["/entry/data/data"]
+    assert dict(data.attrs) == {}  # of a dataset, only KEPT_ATTRIBUTES
+    assert validator.addresses["/entry/data/data@units"].value == "arbitrary"  # read again
+    assert validator.addresses["/entry/data@signal"].value == "data"
+
+    # snapshot is not read again from the file
+    validator.close()
+    assert entry.attrs["title"] == "byte string"
+
+
+def test_address_catalog(hfile):
+    expected_item_count = setup_simple_test_file_validate(hfile)
+    with h5py.File(hfile, "r+") as f:
+        for i in range(3):
+            eg = f.create_group(f"entry_{i}")
+            eg.attrs["NX_class"] = "NXentry"
+            eg.create_dataset("title", data="title")
+
+    validator = validate.Data_File_Validator(ref=DEFAULT_NXDL_FILE_SET)
+    validator.validate(hfile)
+    catalog = validator.catalog
+    assert len(validator.addresses) == expected_item_count + 3 * 3
+
+    # items are views of catalog rows
+    v_item = validator.addresses["/entry/data"]
+    assert isinstance(v_item, validate.ValidationItem)
+    assert v_item == validator.addresses["/entry/data"]
+    assert v_item is not validator.addresses["/entry/data"]
+    assert v_item.catalog is catalog
+    assert v_item.parent == validator.addresses["/entry"]
+    assert v_item.parent.parent.parent is None
+    assert v_item.nx_class == "NXdata"
+    rows = v_item.catalog.validations[v_item.index]  # rows of its findings, by test name
+    assert sorted(v_item.validations) == sorted(rows)
+    for test_name, row in rows.items():
+        f = v_item.validations[test_name]
+        assert (f.h5_address, f.test_name) == (v_item.h5_address, test_name)
+        assert f.comment == validator.validations.comment(row)
+    with pytest.raises(AttributeError):
+        validator.addresses["/entry/data/data"].nx_class  # not a group
+
+    # repeated names and class paths are kept once
+    assert catalog.names.values.count("title") == 1
+    assert catalog.classpaths.values.count("/NXentry/title") == 1
+    titles = validator.classpaths["/NXentry/title"]
+    assert [v.h5_address for v in titles] == [f"/entry_{i}/title" for i in range(3)]
+
+    # dictionary interface
+    assert "/entry_2/title@NX_class" not in validator.addresses
+    assert validator.addresses.get("/no/such/address") is None
+    assert validator.classpaths.get("/no/such/classpath") is None
+    assert list(validator.addresses)[:2] == ["/", "/@default"]
+    assert list(validator.classpaths)[0] == ""
+    assert len(validator.classpaths) == len(set(validator.classpaths))
+
+
+def test_Read_Budget(hfile):
+    with h5py.File(hfile, "w") as f:
+        f["scalar"] = 1.5
+        f["one"] = [2]
+        f["text"] = "NXarpes"
+        f["texts"] = numpy.array([b"a", b"bc"])
+        f["array"] = numpy.arange(10)
+        f["long_text"] = "x" * 200
+        f.create_group("group")
+
+    budget = validate.Read_Budget(max_read_bytes=100, max_file_bytes=400)
+    with h5py.File(hfile, "r") as f:
+        assert budget.read(f["scalar"]) == 1.5
+        assert budget.read(f["one"]) == [2]
+        assert utils.decode_byte_string(budget.read(f["text"])) == "NXarpes"
+        assert budget.value_size(f["long_text"]) is None  # variable-length: known once read
+        assert budget.check(f["long_text"]) is None
+        assert budget.bytes_read == 8 + 8 + 7
+
+        for name, reason in (
+            ("array", "not a scalar"),
+            ("texts", "not a scalar"),
+            ("group", "not a dataset"),
+            ("long_text", "200 bytes, more than 100 bytes per value"),
+        ):
+            with pytest.raises(ValueNotInspected, match=reason):
+                budget.read(f[name])
+        assert budget.bytes_read == 23  # refused (long_text: once read)
+        for i in range(47):
+            budget.read(f["scalar"])
+        with pytest.raises(ValueNotInspected, match="more than 400 bytes read"):
+            budget.read(f["scalar"])
+
+        budget.reset()
+        assert budget.bytes_read == 0
+        assert budget.check(f["scalar"]) is None
+
+    validator = validate.Data_File_Validator(ref=DEFAULT_NXDL_FILE_SET)
+    validator.read_budget.bytes_read = 10
+    validator.validate(hfile)
+    assert validator.read_budget.bytes_read == 0  # budget of each file
+
+
+def test_Read_Budget_memory(hfile):
+    megabyte = "x" * 2**20
+    with h5py.File(hfile, "w") as f:
+        f.create_dataset("texts", data=[megabyte] * 32, dtype=h5py.string_dtype())
+        f.create_dataset("text", data=megabyte * 8, dtype=h5py.string_dtype())
+    del megabyte
+
+    budget = validate.Read_Budget()
+    with h5py.File(hfile, "r") as f:
+        tracemalloc.start()
+        try:
+            with pytest.raises(ValueNotInspected, match="not a scalar"):
+                budget.read(f["texts"])
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        assert peak < 2**18  # values of 32 MB were not read
+        with pytest.raises(ValueNotInspected, match="bytes per value"):
+            budget.read(f["text"])  # a scalar: read, then refused
+    assert budget.bytes_read == 0
+
+
+@pytest.mark.parametrize("profile", ["network", "paged"])
+def test_Read_Budget_access_profiles(hfile, profile):
+    setup_simple_test_file_validate(hfile)
+    with h5py.File(hfile, "r+") as f:
+        f["/entry"].create_dataset("definition", data="NXarpes")  # variable-length string
+
+    def findings(access_profile):
+        validator = validate.Data_File_Validator(
+            ref=DEFAULT_NXDL_FILE_SET, access_profile=access_profile
+        )
+        validator.validate(hfile)
+        result = sorted(
+            (f.h5_address, f.test_name, str(f.status), f.comment) for f in validator.validations
+        )
+        validator.close()
+        return result
+
+    expected = findings(None)
+    assert ("/entry", "NeXus application definition", "TODO", "NXarpes: more validations needed") in expected
+    assert findings(profile) == expected
+
+
+def test_Handle_Cache():
+    opened = []
+
+    def opener(index):
+        opened.append(index)
+        return f"object {index}"
+
+    cache = validate.Handle_Cache(max_handles=2)
+    assert cache.get(1, opener) == "object 1"
+    assert cache.get(2, opener) == "object 2"
+    assert cache.get(1, opener) == "object 1"  # from the cache
+    assert opened == [1, 2]
+    cache.put(3, "object 3")  # discards 2, the least recently used
+    assert len(cache) == 2
+    assert 2 not in cache
+    assert cache.get(2, opener) == "object 2"  # opened again
+    assert opened == [1, 2, 2]
+    cache.set_max_handles(0)  # at least one is kept
+    assert len(cache) == 1
+    assert 2 in cache
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_address_only_items(hfile, tempdir):
+    external = os.path.join(tempdir, "external.h5")
+    with h5py.File(external, "w") as f:
+        eg = f.create_group("sample")
+        eg.attrs["NX_class"] = "NXsample"
+        eg.create_dataset("temperature", data=[273.15, 300])
+
+    setup_simple_test_file_validate(hfile)
+    with h5py.File(hfile, "r+") as f:
+        f["/entry/sample"] = h5py.ExternalLink(external, "/sample")
+        for i in range(50):
+            f["/entry"].create_dataset(f"field_{i}", data=[i])
+
+    validator = validate.Data_File_Validator(ref=DEFAULT_NXDL_FILE_SET, max_handles=4)
+    validator.validate(hfile)
+    catalog = validator.catalog
+    assert len(catalog.handles) <= 4
+    obj_types = h5py.h5f.OBJ_DATASET | h5py.h5f.OBJ_GROUP | h5py.h5f.OBJ_ATTR
+    assert h5py.h5f.get_obj_count(validator.h5.id, obj_types) <= 4
+
+    # objects are opened again when needed
+    v_item = validator.addresses["/entry/field_0"]
+    assert v_item.index not in catalog.handles
+    assert v_item.is_hdf5_object and not v_item.is_group
+    assert v_item.h5_object[()] == [0]
+    assert validator.addresses["/entry"].is_group
+    assert validator.addresses["/"].h5_object == validator.h5
+    assert validator.addresses["/entry/data@signal"].h5_object == "data"
+
+    # through the external link (HDF5 address is in the external file)
+    v_item = validator.addresses["/sample/temperature"]
+    assert catalog.files[v_item.index] == os.path.abspath(external)
+    assert list(v_item.h5_object[()]) == [273.15, 300]
+    assert v_item.parent.classpath == "/NXentry/NXsample"
+
+
+@pytest.mark.parametrize(
+    "file_name",
+    ["writer_1_3.hdf5", "writer_2_1.hdf5", "example_mapping.nxs"],
+)
+def test_validate_iter(file_name):
+    fname = os.path.join(EXAMPLE_DATA_DIR, file_name)
+    validator = validate.Data_File_Validator(ref=DEFAULT_NXDL_FILE_SET)
+    validator.validate(fname)
+    item_count = len(validator.addresses)
+
+    def key(f):
+        return (f.h5_address, f.test_name, str(f.status), f.comment)
+
+    expected = sorted(key(f) for f in validator.validations)
+
+    streamer = validate.Data_File_Validator(ref=DEFAULT_NXDL_FILE_SET)
+    findings = streamer.validate_iter(fname)
+    first = next(findings)
+    assert isinstance(first, finding.Finding)
+    assert len(streamer.addresses) < item_count  # before the walk is done
+    received = [first] + list(findings)
+    assert sorted(key(f) for f in received) == expected
+    # kept: what the default plot reads (groups, their attributes and members)
+    assert len(streamer.catalog) <= item_count
+    for v_item in validator.addresses.values():
+        parent = v_item.parent
+        if parent is None or not v_item.is_hdf5_object:
+            continue
+        kept = parent.classpath in validate.DEFAULT_PLOT_CLASSPATHS
+        assert (v_item.h5_address in streamer.addresses) == kept, v_item.h5_address
+    assert len(streamer.validations) == 0  # findings are not kept
+    assert streamer.addresses["/"].validations == {}
+    streamer.close()
+
+
+def test_hard_link_aliases(hfile):
+    with h5py.File(hfile, "w") as f:
+        for name in ("entry1", "entry2"):
+            eg = f.create_group(name)
+            eg.attrs["NX_class"] = "NXentry"
+        instrument = f["/entry1"].create_group("instrument")
+        instrument.attrs["NX_class"] = "NXinstrument"
+        for i in range(5):
+            instrument.create_dataset(f"field_{i}", data=[i])
+        f["/entry2/instrument"] = instrument  # same group in both entries
+        f["/entry2/loop"] = f["/"]  # link back to the file root
+
+    validator = validate.Data_File_Validator(ref=DEFAULT_NXDL_FILE_SET)
+    validator.validate(hfile)  # does not loop
+
+    addrs = validator.addresses
+    assert "/entry1/instrument/field_4" in addrs
+    assert "/entry2/instrument/field_0" not in addrs  # members cataloged once
+    alias = addrs["/entry2/instrument"]
+    assert alias.alias_of == "/entry1/instrument"
+    assert alias.classpath == "/NXentry/NXinstrument"
+    assert "/entry2/instrument@NX_class" in addrs  # class path depends on path
+    assert addrs["/entry2/loop"].alias_of == "/"
+    assert addrs["/entry1/instrument"].alias_of is None
+    assert "HDF5 hard link" in alias.validations
+    assert "NeXus base class" not in alias.validations  # validated once
+    assert "NeXus base class" in addrs["/entry1/instrument"].validations
+
+
+def test_hard_link_at_target(hfile):
+    with h5py.File(hfile, "w") as f:
+        eg = f.create_group("entry")
+        eg.attrs["NX_class"] = "NXentry"
+        ds = eg.create_dataset("x", data=[1])
+        ds.attrs["target"] = "/entry/x"
+        f["/e2"] = eg  # found before /entry
+        eg.attrs["target"] = "/entry"
+
+        # @target path cannot be reached: /b is an alias of /a
+        a = f.create_group("a")
+        a["y"] = f.create_dataset("c", data=[2])
+        f["/a/y"].attrs["target"] = "/b/y"
+        f["/b"] = a
+
+    validator = validate.Data_File_Validator(ref=DEFAULT_NXDL_FILE_SET)
+    validator.validate(hfile)
+
+    addrs = validator.addresses
+    # cataloged at the @target path, the source of the NeXus link
+    assert addrs["/entry"].alias_of is None
+    assert addrs["/e2"].alias_of == "/entry"
+    assert "/entry/x" in addrs
+    assert "/e2/x" not in addrs
+    # cataloged at the first path found
+    assert addrs["/a"].alias_of is None
+    assert addrs["/a/y"].alias_of is None
+    assert addrs["/b"].alias_of == "/a"
+    assert addrs["/c"].alias_of == "/a/y"
+
+
+def test_address_catalog_deep_tree(hfile):
+    depth = 1200  # deeper than Python's default recursion limit
+    with h5py.File(hfile, "w") as f:
+        group = f
+        for i in range(depth):
+            group = group.create_group(f"g{i}")
+        group.create_dataset("data", data=[1, 2, 3])
+        f["/g0"].create_dataset("values", data=[4])
+
+    validator = validate.Data_File_Validator(ref=DEFAULT_NXDL_FILE_SET)
+    validator.validate(hfile)
+
+    addrs = list(validator.addresses)
+    leaf = "/" + "/".join(f"g{i}" for i in range(depth)) + "/data"
+    assert len(addrs) == depth + 3
+    assert leaf in validator.addresses
+    assert validator.addresses[leaf].parent.h5_address == leaf.rsplit("/", 1)[0]
+    # depth-first: all of /g0/g1 is cataloged before its sibling /g0/values
+    assert addrs[:3] == ["/", "/g0", "/g0/g1"]
+    assert addrs[-1] == "/g0/values"
+
+
 def test_writer_1_3():
     validator = use_example_file("writer_1_3.hdf5")
     items = """
@@ -466,6 +806,29 @@ def test_item_names(hfile):
     assert sum < 0, "scoring detects error(s)"
 
 
+def test_item_name_classifier_shared(hfile):
+    from ..validations import item_name
+
+    with h5py.File(hfile, "w") as f:
+        eg = f.create_group("entry")
+        eg.attrs["NX_class"] = "NXentry"
+        eg.create_dataset("Title", data="relaxed item name")
+
+    first = validate.Data_File_Validator(ref="v3.3")
+    first.validate(hfile)
+    first.close()
+    classifier = item_name.get_name_classifier(first)
+    assert classifier.classify("Title").startswith("relaxed pattern")
+    assert item_name.validItemName_match_key(first, b"title").startswith("strict")
+
+    second = validate.Data_File_Validator(ref="v3.3")
+    assert item_name.get_name_classifier(second) is classifier
+    hits = classifier.classify.cache_info().hits
+    second.validate(hfile)
+    second.close()
+    assert classifier.classify.cache_info().hits > hits  # names seen before
+
+
 # class Test_Default_Plot
 
 
@@ -546,6 +909,32 @@ def test_default_plot_v3_pass_multi(hfile):
     assert len(flist) == 3  # 3 signal attributes
 
 
+def test_shared_manager(tempdir):
+    first = validate.Data_File_Validator(ref="v3.3")
+    second = validate.Data_File_Validator(ref="v3.3")
+    assert first.manager is second.manager
+    other = validate.Data_File_Validator(ref="v3.3", shared_manager=False)
+    assert other.manager is not first.manager
+
+    # validation does not change the shared NXDL structures
+    with_entry = os.path.join(tempdir, "with_entry.hdf5")
+    setup_simple_test_file_default_plot(with_entry)
+    no_entry = os.path.join(tempdir, "no_entry.hdf5")
+    with h5py.File(no_entry, "w") as f:
+        f["item"] = 5
+
+    def default_plot_status(validator, fname):
+        validator.validate(fname)
+        validator.close()
+        flist = [f for f in validator.validations if f.test_name == "NeXus default plot"]
+        assert len(flist) == 1
+        return flist[0].status
+
+    expected = default_plot_status(other, no_entry)
+    default_plot_status(first, with_entry)
+    assert default_plot_status(second, no_entry) == expected
+
+
 @pytest.mark.parametrize(
     "file_set_name, status, occurs",
     # occurs: # findings with status
@@ -0,0 +1,167 @@
+import h5py
+import os
+import shutil
+
+from ._core import DEFAULT_NXDL_FILE_SET
+from ._core import EXAMPLE_DATA_DIR
+from ._core import tempdir
+from .. import access_profiles
+from .. import finding
+from .. import validate
+from .. import watch
+
+
+def findings_of(validator):
+    return sorted(
+        (f.h5_address or "", f.test_name, str(f.status), f.comment)
+        for f in validator.validations
+    )
+
+
+def full_validation(fname):
+    validator = validate.Data_File_Validator(ref=DEFAULT_NXDL_FILE_SET)
+    validator.validate(fname)
+    validator.close()
+    return findings_of(validator)
+
+
+def test_first_pass(tempdir):
+    fname = os.path.join(tempdir, "writer_1_3.hdf5")
+    shutil.copy(os.path.join(EXAMPLE_DATA_DIR, "writer_1_3.hdf5"), fname)
+    validator = validate.Data_File_Validator(ref=DEFAULT_NXDL_FILE_SET)
+    watcher = watch.Validation_Watcher(validator, fname)
+
+    watch_pass = watcher.refresh()
+    assert watch_pass.number == 1
+    assert watch_pass.new_items == len(validator.catalog)
+    assert len(watch_pass.findings) == len(validator.validations)
+    assert findings_of(validator) == full_validation(fname)
+    assert validator.h5 is None  # closed between passes
+
+    # unchanged: not read
+    watch_pass = watcher.refresh()
+    assert watch_pass.number == 2
+    assert watch_pass.new_items == 0
+    assert len(watch_pass.findings) == 0
+    assert findings_of(validator) == full_validation(fname)
+
+
+def test_new_objects(tempdir):
+    fname = os.path.join(tempdir, "growing.h5")
+    with h5py.File(fname, "w", libver="latest") as f:
+        entry = f.create_group("entry")
+        entry.attrs["NX_class"] = "NXentry"
+        data = entry.create_group("data")
+        data.attrs["NX_class"] = "NXdata"
+        data.create_dataset("x", data=[1, 2, 3])
+
+    validator = validate.Data_File_Validator(ref=DEFAULT_NXDL_FILE_SET)
+    watcher = watch.Validation_Watcher(validator, fname)
+    for watch_pass in watcher.watch(interval=0, passes=1):
+        assert watch_pass.new_items == 6
+    f = validator.addresses["/"].validations["NeXus default plot"]
+    assert f.status == finding.NOTE
+
+    with h5py.File(fname, "a", libver="latest") as f:
+        f.attrs["default"] = "entry"
+        f["/entry"].attrs["default"] = "data"
+        f["/entry/data"].attrs["signal"] = "y"
+        f["/entry/data"].create_dataset("y", data=[4, 5, 6])
+        log = f["/entry"].create_group("log")
+        log.attrs["NX_class"] = "NXlog"
+        log.create_dataset("value", data=[1.0])
+
+    watch_pass = watcher.refresh(force=True)
+    assert watch_pass.number == 2
+    assert watch_pass.changed_groups == 3  # /, /entry, /entry/data
+    assert watch_pass.new_items == 7  # 3 attributes, y, log, log@NX_class, value
+    addresses = set(f.h5_address for f in watch_pass.findings)
+    assert "/entry/data/x" in addresses  # a member of a changed group
+    assert "/entry/log/value" in addresses
+    f = validator.addresses["/"].validations["NeXus default plot"]
+    assert f.status == finding.OK
+    assert findings_of(validator) == full_validation(fname)
+
+    watch_pass = watcher.refresh(force=True)
+    assert watch_pass.new_items == 0
+    assert watch_pass.changed_groups == 0
+    assert findings_of(validator) == full_validation(fname)
+    watcher.close()
+
+
+def test_swmr_open(tempdir):
+    fname = os.path.join(tempdir, "swmr.h5")
+    with h5py.File(fname, "w", libver="latest") as f:
+        f.create_dataset("x", data=[1, 2, 3])
+    for name in access_profiles.PROFILES:
+        with access_profiles.get_profile(name).open(fname, swmr=True) as root:
+            assert root.swmr_mode
+            assert root.filename == fname
+
+
+def test_removed_objects(tempdir):
+    fname = os.path.join(tempdir, "changing.h5")
+    with h5py.File(fname, "w") as f:
+        entry = f.create_group("entry")
+        entry.attrs["NX_class"] = "NXentry"
+        entry.attrs["default"] = "data"
+        data = entry.create_group("data")
+        data.attrs["NX_class"] = "NXdata"
+        data.attrs["signal"] = "y"
+        data.create_dataset("y", data=[4, 5, 6])
+        entry.create_group("log").attrs["NX_class"] = "NXlog"
+
+    validator = validate.Data_File_Validator(ref=DEFAULT_NXDL_FILE_SET)
+    watcher = watch.Validation_Watcher(validator, fname)
+    watcher.refresh()
+    assert "/entry/data/y" in validator.addresses
+
+    with h5py.File(fname, "a") as f:
+        del f["/entry/data/y"]  # @signal names a field no longer there
+        del f["/entry"].attrs["default"]
+        del f["/entry/log"]
+        f["/entry"].create_group("log").create_dataset("value", data=[1.0])  # replaced
+
+    watch_pass = watcher.refresh(force=True)
+    assert watch_pass.removed_items == 4  # y, @default, log, log@NX_class
+    assert watch_pass.new_items == 2  # log, value
+    assert "/entry/data/y" not in validator.addresses
+    assert "/entry@default" not in validator.addresses
+    assert "/entry/log/value" in validator.addresses
+    assert findings_of(validator) == full_validation(fname)
+    watcher.close()
+
+
+def test_saved_state(tempdir):
+    fname = os.path.join(tempdir, "writer_1_3.hdf5")
+    shutil.copy(os.path.join(EXAMPLE_DATA_DIR, "writer_1_3.hdf5"), fname)
+    state_dir = os.path.join(tempdir, "state")
+
+    validator = validate.Data_File_Validator(ref=DEFAULT_NXDL_FILE_SET)
+    watch_pass = watch.validate_incremental(validator, fname, state_dir)
+    assert watch_pass.read
+    assert watch_pass.new_items == len(validator.catalog)
+    watcher = watch.Validation_Watcher(validator, fname)
+    assert os.path.exists(watcher.state_file(state_dir))
+
+    # unchanged: the file is not read
+    validator = validate.Data_File_Validator(ref=DEFAULT_NXDL_FILE_SET)
+    watch_pass = watch.validate_incremental(validator, fname, state_dir)
+    assert not watch_pass.read
+    assert "/Scan/data/two_theta" in validator.addresses
+    assert findings_of(validator) == full_validation(fname)
+
+    with h5py.File(fname, "a") as f:
+        f["/Scan"].create_group("notes").attrs["NX_class"] = "NXnote"
+
+    validator = validate.Data_File_Validator(ref=DEFAULT_NXDL_FILE_SET)
+    watch_pass = watch.validate_incremental(validator, fname, state_dir)
+    assert watch_pass.read
+    assert watch_pass.new_items == 2  # notes, notes@NX_class
+    assert validator.addresses["/Scan/notes"].nx_class == "NXnote"
+    assert findings_of(validator) == full_validation(fname)
+
+    # another NXDL file set: the saved state is not used
+    watcher = watch.Validation_Watcher(validator, fname)
+    watcher.state_key = lambda: {}
+    assert not watcher.load_state(watcher.state_file(state_dir))
@@ -12,6 +12,7 @@ utility routines
 
 .. autosummary::
 
+   ~decode_attributes
    ~decode_byte_string
    ~isHdf5FileObject
    ~isHdf5Group
@@ -22,6 +23,7 @@ utility routines
    ~isNeXusGroup
    ~isNeXusDataset
    ~isNeXusLink
+   ~read_attributes
    ~setup_logger
 
 """
@@ -31,9 +33,12 @@ import logging
 import os
 import numpy
 import sys
+import types
 
+from . import access_profiles
 
-def decode_byte_string(value):
+
+def decode_byte_string(value, encoding=None):
     """Convert (arrays of) byte-strings to (list of) unicode strings.
 
     Due to limitations of HDF5, all strings are saved as byte-strings or arrays
@@ -41,6 +46,9 @@ def decode_byte_string(value):
     objects pass unchanged.
 
     Zero-dimenstional arrays are replaced with None.
+
+    Byte-strings are decoded with ``encoding``
+    (default: the encoding of ``sys.stdout``, or UTF-8).
     """
     if (isinstance(value, numpy.ndarray) and value.dtype.kind in ['O', 'S']):
         if value.size > 0:
@@ -48,7 +56,7 @@ def decode_byte_string(value):
         else:
             return None
     elif isinstance(value, (bytes, numpy.bytes_)):
-        return value.decode(sys.stdout.encoding or "utf8")
+        return value.decode(encoding or sys.stdout.encoding or "utf8")
     else:
         return value
 
@@ -109,12 +117,17 @@ def __isHdf5ExternalLink(obj):
     return isinstance(obj, h5py.ExternalLink)
 
 
-def isNeXusFile(filename):
-    """Is `filename` is a NeXus HDF5 file?"""
+def isNeXusFile(filename, access_profile=None):
+    """
+    Is `filename` is a NeXus HDF5 file?
+
+    The file is opened with `access_profile`
+    (see :mod:`punx.access_profiles`, default: the default profile).
+    """
     if not os.path.exists(filename):
         return None
 
-    f = h5py.File(filename, "r")
+    f = access_profiles.open_file(filename, access_profile)
     if isHdf5FileObject(f):
         for item in f:
             if isNeXusGroup(f[item], "NXentry"):
@@ -146,6 +159,39 @@ def isNeXusLink(obj):
     return len(target) > 0 and target != obj.name
 
 
+def decode_attributes(items):
+    """
+    Return a read-only mapping of decoded attribute values.
+
+    ``items`` is a sequence of (name, value) pairs as read from HDF5.
+    Each value is decoded by :func:`decode_byte_string`.  A value that
+    cannot be decoded (such as a byte-string in another encoding)
+    is kept as it was read.
+    """
+    encoding = sys.stdout.encoding or "utf8"  # consulted once, not per value
+    attrs = {}
+    for k, v in items:
+        try:
+            attrs[decode_byte_string(k, encoding)] = decode_byte_string(v, encoding)
+        except UnicodeDecodeError:
+            attrs[k] = v
+    return types.MappingProxyType(attrs)
+
+
+def read_attributes(obj):
+    """
+    Read all attributes of HDF5 ``obj`` once, return them decoded.
+
+    Returns a read-only mapping, sorted by attribute name.
+
+    :see: :func:`decode_attributes`
+    """
+    return decode_attributes(sorted(obj.attrs.items()))
+
+
+NO_ATTRIBUTES = types.MappingProxyType({})
+
+
 def setup_logger(log_name, level=None):
     """
     setups up python logging handler for named entity
@@ -26,24 +26,43 @@ INTERNAL
 .. autosummary::
 
    ~ValidationItem
+   ~Read_Budget
+   ~Address_Catalog
+   ~Handle_Cache
+   ~Catalog_Address_Dict
+   ~Catalog_Classpath_Dict
+   ~Item_Findings
+   ~Interned_Values
 
 """
 
+import array
 import collections
+import collections.abc
 import h5py
 import logging
+import numpy
 import os
 import pyRestTable
+import types
+import warnings
 
-from . import FileNotFound, HDF5_Open_Error
+from . import FileNotFound, HDF5_Open_Error, ValueNotInspected
+from . import access_profiles
 from . import finding
 from . import utils
 from . import nxdl_manager
+from .external_links import External_Link_Resolver
 
 
 SLASH = "/"
 INFORMATIVE = int((logging.INFO + logging.DEBUG) / 2)
 CLASSPATH_OF_NON_NEXUS_CONTENT = "non-NeXus content"
+DEFAULT_MAX_HANDLES = 256  # open HDF5 objects kept by the address catalog
+DEFAULT_MAX_READ_BYTES = 2**16  # largest dataset value read during validation
+DEFAULT_MAX_FILE_BYTES = 2**24  # all dataset values read while validating a file
+APPLICATION_DEFINITION_CLASSPATHS = ("/NXentry/definition", "/NXentry/NXsubentry/definition")
+DEFAULT_PLOT_CLASSPATHS = ("", "/NXentry", "/NXentry/NXdata")  # groups read by the default plot
 VALIDITEMNAME_STRICT_PATTERN = r"[a-z_][a-z0-9_]*"
 logger = utils.setup_logger(__name__)
 
@@ -66,11 +85,61 @@ class Data_File_Validator(object):
         validator = punx.validate.Data_File_Validator("v3.2")
         validator = punx.validate.Data_File_Validator("main")
 
+       Validators of the same NXDL file set share one (read-only)
+       :class:`~punx.nxdl_manager.NXDL_Manager`, so making another
+       validator is fast.  To use a new manager instead::
+
+        validator = punx.validate.Data_File_Validator("main", shared_manager=False)
+
+       While validating, at most ``max_handles`` (default:
+       ``DEFAULT_MAX_HANDLES``) objects of the data file are kept open,
+       no matter how many objects are in the file::
+
+        validator = punx.validate.Data_File_Validator(max_handles=32)
+
+       Files are opened with an access profile (see
+       :mod:`punx.access_profiles`), such as for a network file system::
+
+        validator = punx.validate.Data_File_Validator(access_profile="network")
+
+       The files of external links are found (as HDF5 does, see
+       :mod:`punx.external_links`) and opened once, and at most
+       ``max_files`` (default: ``DEFAULT_MAX_FILES``) of them are kept
+       open::
+
+        validator.resolver.set_max_files(4)
+
+       Only the values of scalar and (small) string datasets are read,
+       within the byte budgets of ``read_budget`` (see
+       :class:`Read_Budget`).  Other values are "not inspected"::
+
+        validator.read_budget.max_read_bytes = 2**20
+
+       The values of virtual datasets are not read (reading them opens
+       all their source files), only their mapping to source files.
+       To read them too (such as to check enumerated values)::
+
+        validator.read_virtual_datasets = True
+
+       The checks are the rules of a registry (see :mod:`punx.rules`).
+       To skip the rules of some families (such as expensive checks)::
+
+        validator.disable_rules("application definitions", "default plot")
+
     2. use to validate a file or files::
 
         result = validator.validate(hdf5_file_name)
         result = validator.validate(another_file)
 
+       To validate a file while it is written (again and again, only
+       what was added each time), see :mod:`punx.watch`.
+
+       To write the findings one at a time (such as JSON Lines or
+       CSV, for many findings), see :mod:`punx.report`::
+
+        with open("findings.csv", "w") as fp:
+            validator.write_report(fp, "csv")
+
     3. close the HDF5 file when done with validation::
 
         validator.close()
@@ -81,7 +150,13 @@ class Data_File_Validator(object):
 
        ~close
        ~validate
+       ~validate_iter
        ~print_report
+       ~write_report
+       ~apply_rules
+       ~disable_rules
+       ~enable_rules
+       ~enabled_rules
 
     INTERNAL METHODS
 
@@ -89,22 +164,51 @@ class Data_File_Validator(object):
 
        ~build_address_catalog
        ~_group_address_catalog_
+
+    DEPRECATED METHODS (use :meth:`apply_rules`)
+
+    .. autosummary::
+
        ~validate_item_name
+       ~validate_attribute
+       ~validate_group
+       ~validate_application_definition
+       ~validate_NX_class_attribute
 
     """
 
-    def __init__(self, ref=None):
+    def __init__(
+        self, ref=None, shared_manager=True, max_handles=DEFAULT_MAX_HANDLES, access_profile=None
+    ):
+        from . import rules
+
         self.h5 = None
+        self.max_handles = max_handles
+        self.access_profile = access_profiles.get_profile(access_profile)
+        self.resolver = External_Link_Resolver(access_profile=self.access_profile)
+        self.read_virtual_datasets = False
+        self.read_budget = Read_Budget()
+        self.rules = rules.default_registry()  # shared by all validators
+        self.disabled_rule_families = set()
         self.__init_local__()
-        self.manager = nxdl_manager.NXDL_Manager(ref)
-
-    def __init_local__(self):
-        self.validations = []  # list of Finding() instances
-        self.addresses = (
-            collections.OrderedDict()
-        )  # dictionary of all HDF5 address nodes in the data file
-        self.classpaths = {}
-        self.regexp_cache = {}
+        if shared_manager:
+            # read-only, shared with all validators of this file set
+            self.manager = nxdl_manager.get_shared_manager(ref)
+        else:
+            self.manager = nxdl_manager.NXDL_Manager(ref)
+
+    def __init_local__(self, keep_findings=True):
+        self.validations = finding.Finding_Store()  # (as a list of Finding() instances)
+        # all HDF5 objects in the data file
+        self.catalog = Address_Catalog(
+            max_handles=self.max_handles,
+            keep_findings=keep_findings,
+            resolver=self.resolver,
+        )
+        # dictionary of all HDF5 address nodes in the data file
+        self.addresses = Catalog_Address_Dict(self.catalog)
+        # dictionary of lists of HDF5 address nodes, by NeXus class path
+        self.classpaths = Catalog_Classpath_Dict(self.catalog)
 
     def close(self):
         """
@@ -113,15 +217,79 @@ class Data_File_Validator(object):
         if utils.isHdf5FileObject(self.h5):
             self.h5.close()
             self.h5 = None
+        self.resolver.clear()  # and the files of external links
+
+    def apply_rules(self, scope, v_item):
+        """check ``v_item`` with the (enabled) rules of ``scope`` that apply to it"""
+        for rule in self.rules.select(scope, v_item):
+            if rule.family not in self.disabled_rule_families:
+                rule.check(self, v_item)
+
+    def disable_rules(self, *families):
+        """do not check the rules of these families (see :mod:`punx.rules`)"""
+        known = self.rules.families()
+        for family in families:
+            if family not in known:
+                raise ValueError(f"unknown rule family: '{family}', use one of these: {', '.join(known)}")
+        self.disabled_rule_families.update(families)
+
+    def enable_rules(self, *families):
+        """check the rules of these families again"""
+        self.disabled_rule_families.difference_update(families)
+
+    def enabled_rules(self):
+        """return the rules checked (not disabled), in order"""
+        return [rule for rule in self.rules.rules if rule.family not in self.disabled_rule_families]
+
+    def read_value(self, h5_obj):
+        """
+        return the value of h5py dataset ``h5_obj``, if within the read budget
+
+        Raises :exc:`~punx.ValueNotInspected` (with the reason) if the
+        value is not read: the value of a virtual dataset (unless
+        ``read_virtual_datasets``) or a value not allowed by
+        ``read_budget``.
+        """
+        if not self.read_virtual_datasets and self.resolver.virtual_sources(h5_obj) is not None:
+            raise ValueNotInspected("virtual dataset")
+        return self.read_budget.read(h5_obj)
 
-    def record_finding(self, v_item, key, status, comment):
+    def record_finding(self, v_item, key, status, comment, *args):
         """
-        prepare the finding object and record it
+        record the finding (and its row, with ``v_item``)
+
+        ``comment`` may be a ``%`` template, formatted with ``args``
+        only when used (such as in a report).
+        Return the row of the finding in ``validations``.
+        """
+        store = self.validations
+        row = store.record(v_item.h5_address, key, status, comment, *args)
+        catalog = self.catalog
+        if catalog.keep_findings:
+            if catalog.findings is not store:  # rows of another store
+                catalog.findings = store
+                catalog.validations = {}
+            catalog.validations.setdefault(v_item.index, {})[key] = row
+        return row
+
+    def _index_findings_(self):
         """
-        f = finding.Finding(v_item.h5_address, key, status, comment)
-        self.validations.append(f)
-        v_item.validations[key] = f
-        return f
+        internal: keep the row of each finding with its cataloged item
+
+        For ``validations`` assigned (such as by :mod:`punx.watch`),
+        not recorded by :meth:`record_finding`.
+        """
+        catalog = self.catalog
+        catalog.findings = store = self.validations
+        catalog.validations = {}
+        if not catalog.keep_findings:
+            return
+        indices = [catalog.find(address) for address in store.addresses]
+        test_names = store.test_names
+        for row, (address_id, test_id) in enumerate(zip(store.address_ids, store.test_ids)):
+            index = indices[address_id]
+            if index is not None:
+                catalog.validations.setdefault(index, {})[test_names[test_id]] = row
 
     def finding_score(self):
         """
@@ -131,16 +299,7 @@ class Data_File_Validator(object):
         total: sum of status values for all findings
         score: total / count -- average status / finding
         """
-        total = 0
-        count = 0
-        for f in self.validations:
-            if f.status.value != 0:
-                total += f.status.value
-                count += 1
-        if count == 0:
-            return total, count, 0
-        else:
-            return total, count, float(total) / count
+        return self.validations.score()
 
     def finding_summary(self, report_statuses=None):
         """
@@ -161,13 +320,7 @@ class Data_File_Validator(object):
         TOTAL   16    --
         ======= ===== ===========================================================
         """
-        report_statuses = report_statuses or finding.VALID_STATUS_LIST
-        summary = collections.OrderedDict()
-        for status in report_statuses:
-            summary[status] = 0
-        for f in self.validations:
-            summary[f.status] += 1
-        return summary
+        return self.validations.summary(report_statuses)
 
     def print_report(self, statuses=None):
         """
@@ -182,24 +335,23 @@ class Data_File_Validator(object):
             f", sha={self.manager.nxdl_file_set.sha}\n"
         )
 
-        def sort_validations(f):
-            value = f.h5_address
-            value += " %3d" % -f.status.value  # sort from best to worst
-            value += " " + f.status.description
-            value = value.replace("@", " @")  # keep attributes with group or dataset
-            return value
+        store = self.validations
+        reported_codes = set(
+            finding.STATUS_CODES[finding.VALID_STATUS_DICT[key]] for key in reported_statuses
+        )
 
         print("findings")
         t = pyRestTable.Table()
         for label in "address status test comments".split():
             t.addLabel(label)
-        for f in sorted(self.validations, key=sort_validations):
-            if str(f.status) in reported_statuses:
+        for i in store.report_order():  # attributes with their group or dataset
+            code = store.status_codes[i]
+            if code in reported_codes:
                 row = []
-                row.append(f.h5_address)
-                row.append(f.status)
-                row.append(f.test_name)
-                row.append(f.comment)
+                row.append(store.addresses[store.address_ids[i]])
+                row.append(finding.VALID_STATUS_LIST[code])
+                row.append(store.test_names[store.test_ids[i]])
+                row.append(store.comment(i))
                 t.addRow(row)
         print(str(t))
 
@@ -217,46 +369,114 @@ class Data_File_Validator(object):
         total, count, average = self.finding_score()
         print("<finding>=%f of %d items reviewed" % (average, count))
 
-    def validate(self, fname):
-        """start the validation process from the file root"""
-        from .validations import default_plot
+    def write_report(self, fp, fmt="text", statuses=None):
+        """
+        Write the findings (one at a time) and summary to file object ``fp``.
 
+        ``fmt`` is the name of a writer (such as ``jsonl``, ``csv``),
+        see :mod:`punx.report`.  Return the number of findings written.
+        """
+        from . import report
+
+        return report.write_report(self, fp, fmt, statuses)
+
+    def _open_file_(self, fname, swmr=False):
+        """open the HDF5 data file for validation (as a SWMR reader if ``swmr``)"""
         if not os.path.exists(fname):
             raise FileNotFound(fname)
         self.fname = fname
 
         if self.h5 is not None:
             self.close()  # left open from previous call to validate()
+        self.resolver.clear()  # check for the files of external links again
+        self.read_budget.reset()
         try:
-            self.h5 = h5py.File(fname, "r")
+            self.h5 = self.access_profile.open(fname, swmr=swmr)
         except IOError:
             logger.error("Could not open as HDF5: " + fname)
             raise HDF5_Open_Error(fname)
 
+    def validate(self, fname):
+        """start the validation process from the file root"""
+        from . import rules
+
+        self._open_file_(fname)
         self.__init_local__()
         self.build_address_catalog()
 
         # 1. check all objects in file (name is valid, ...)
         for v_list in self.classpaths.values():
             for v_item in v_list:
-                self.validate_item_name(v_item)
-                self.validate_attribute(v_item)
+                self.apply_rules(rules.ITEM, v_item)
 
         # 2. check all base classes against defaults
         for k, v_item in self.addresses.items():
-            if utils.isHdf5Group(v_item.h5_object) or utils.isHdf5FileObject(
-                v_item.h5_object
-            ):
-                self.validate_group(v_item)
+            if v_item.is_group and v_item.alias_of is None:
+                self.apply_rules(rules.GROUP, v_item)
 
         # 3. check application definitions
-        for k in ("/NXentry/definition", "/NXentry/NXsubentry/definition"):
+        for k in APPLICATION_DEFINITION_CLASSPATHS:
             if k in self.classpaths:
                 for v_item in self.classpaths[k]:
-                    self.validate_application_definition(v_item.parent)
+                    self.apply_rules(rules.APPLICATION_DEFINITION, v_item.parent)
 
         # 4. check for default plot
-        default_plot.verify(self)
+        self.apply_rules(rules.FILE, self.catalog.item(0))
+
+    def validate_iter(self, fname):
+        """
+        validate the file, yield each finding as soon as it is made
+
+        Unlike :meth:`validate`, the checks are made while the file
+        is cataloged.  Each object (and attribute) is checked when
+        it is cataloged, each group once all of its members have been
+        cataloged, and the default plot at the end.
+        The findings are yielded (in this order) and not kept
+        (``validations`` is emptied as they are yielded).  Once a group
+        is done, the catalog forgets its members' contents, unless the
+        group is one that the default plot (checked at the end) reads:
+        the root, NXentry and NXdata groups (see
+        ``DEFAULT_PLOT_CLASSPATHS``) keep their attributes and members.
+        So the catalog does not grow with the number of objects in
+        the file.
+
+        EXAMPLE::
+
+            validator = punx.validate.Data_File_Validator()
+            for f in validator.validate_iter(hdf5_file_name):
+                if f.status == punx.finding.ERROR:
+                    print(f)
+        """
+        from . import rules
+
+        self._open_file_(fname)
+        self.__init_local__(keep_findings=False)
+        self.catalog.h5 = self.h5
+        application_definitions = set()  # indices of groups
+
+        def keep(v_item):
+            return v_item.classpath in DEFAULT_PLOT_CLASSPATHS
+
+        for v_item, group_done in self._walk_address_catalog_(None, self.h5, keep=keep):
+            if group_done:
+                self.apply_rules(rules.GROUP, v_item)
+                if v_item.index in application_definitions:
+                    application_definitions.remove(v_item.index)
+                    self.apply_rules(rules.APPLICATION_DEFINITION, v_item)
+            else:
+                self.apply_rules(rules.ITEM, v_item)
+                if v_item.classpath in APPLICATION_DEFINITION_CLASSPATHS:
+                    application_definitions.add(v_item.parent.index)
+            yield from self._take_findings_()
+
+        self.apply_rules(rules.FILE, self.catalog.item(0))
+        yield from self._take_findings_()
+
+    def _take_findings_(self):
+        """return the findings recorded so far, and forget them"""
+        findings = self.validations
+        self.validations = finding.Finding_Store()
+        return findings
 
     # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
 
@@ -264,96 +484,311 @@ class Data_File_Validator(object):
         """
         find all HDF5 addresses and NeXus class paths in the data file
         """
+        self.catalog.h5 = self.h5
         self._group_address_catalog_(None, self.h5)
 
     def _group_address_catalog_(self, parent, group):
         """
         catalog this group's address and all its contents
         """
+        for _v_item, _group_done in self._walk_address_catalog_(parent, group):
+            pass
 
-        def addClasspath(v):
-            if v.classpath not in self.classpaths:
-                self.classpaths[v.classpath] = []
-            self.classpaths[v.classpath].append(v)
+    def _walk_address_catalog_(self, parent, group, names=None, members=None, keep=None):
+        """
+        catalog this group's address and all its contents, step by step
+
+        Yields ``(v_item, False)`` for each item (group, dataset,
+        attribute) as it is cataloged and ``(v_item, True)`` for each
+        group once all its members have been cataloged.
+
+        If ``names`` is given, ``group`` is already cataloged (``parent``
+        is its item) and only its members ``names`` (link names, bytes)
+        and their contents are cataloged now.
+        If ``members`` (a dict) is given, the link names walked in each
+        group are added to it (a dict of the index of the member's item,
+        or None if not cataloged, by link name; by index of the group's item).
+        If ``keep`` (a function of a group's item) is given, the rows
+        of the contents of each group done (after it is yielded) are
+        removed from the catalog (see :meth:`Address_Catalog.truncate`)
+        unless ``keep(v_item)`` is true.
+
+        The HDF5 tree is walked depth-first (each group's members in
+        the order HDF5 iterates them) using a stack, not recursion,
+        so there is no limit to the depth of the tree.
+        Each member is opened once.  Its type and number of attributes
+        are learned with a low-level call.  Its attributes are read
+        (all at once) only if it has any.
+
+        Members are not kept open (only the groups on the stack are).
+        The path (of link names) to each member is recorded if it is
+        not the member's HDF5 address so the member can be opened again.
+
+        External links are followed through the validator's
+        :class:`~punx.external_links.External_Link_Resolver`
+        (each file is found and opened once).  The file is recorded
+        for each member in the file of an external link.
+        A WARN finding is recorded for (the group of) an external link
+        whose file (or object) is not found.
+        The mapping of each virtual dataset to its source files is
+        recorded (but no source file is opened).
+
+        A group with several hard links is cataloged with its members
+        only once.  Each other path to an object with several hard links
+        is cataloged as an alias (see :attr:`ValidationItem.alias_of`)
+        with its attributes (their NeXus class paths depend on the path)
+        but without members.  So each group is validated once, and a
+        group linked to one of its ancestors does not loop.
+        The object is cataloged at the path named by its ``@target``
+        attribute (the source of a NeXus link), if the walk reaches
+        that path, otherwise at the first path found.
+        Objects are identified by file number and address in the file
+        (only objects with more than one hard link are remembered,
+        in the catalog's ``hard_links``).
+        The rows of a group's contents are not removed while one of
+        them waits for the walk to reach its ``@target`` path.
+        """
+
+        catalog = self.catalog
+        root = group.file
+        visited = catalog.hard_links
+        deferred = {}  # (fileno, addr): [@target, alias indices], not cataloged yet
+
+        def register(v):
+            catalog.register(v.index)
             logger.log(INFORMATIVE, "NeXus classpath: " + v.classpath)
 
-        def get_subject(parent, o):
-            v = ValidationItem(parent, o)
-            self.addresses[v.h5_address] = v
+        def get_subject(parent, o, items, path=None, attrs=None, fname=None):
+            if attrs is None:
+                attrs = utils.decode_attributes(items)
+            v = ValidationItem(parent, o, attrs=attrs, catalog=catalog)
+            if fname is not None:
+                catalog.files[v.index] = fname
+            elif path is not None:
+                catalog.set_path(v.index, path)
             logger.log(INFORMATIVE, "HDF5 address: " + v.h5_address)
-            addClasspath(v)
-            for k, a in sorted(o.attrs.items()):
+            register(v)
+            subjects = [v]
+            for k, a in items:
                 av = ValidationItem(v, a, attribute_name=k)
-                self.addresses[av.h5_address] = av
-                addClasspath(av)
-            return v
-
-        obj = get_subject(parent, group)
-        parent = self.classpaths[obj.classpath][-1]
-        for item in group:
-            if utils.isHdf5Group(group[item]):
-                self._group_address_catalog_(parent, group[item])
-            else:
-                get_subject(parent, group[item])
+                register(av)
+                subjects.append(av)
+            return subjects  # the item, then its attributes
+
+        def get_alias(parent, o, items, original, path, attrs=None, fname=None):
+            subjects = get_subject(parent, o, items, path, attrs, fname)
+            catalog.aliases[subjects[0].index] = original
+            logger.log(INFORMATIVE, "(same HDF5 object as %s)", original)
+            return subjects
+
+        def object_key(info):
+            if info.rc > 1:
+                return (info.fileno, info.addr)
+            return None  # only one path to this object
+
+        def is_source_elsewhere(target, key, path):
+            """Is ``target`` another path to this object (a NeXus link source)?"""
+            if not isinstance(target, str) or target.encode("utf8") == path:
+                return False
+            try:
+                obj = root[target]
+            except (KeyError, ValueError):
+                return False
+            return object_key(h5py.h5o.get_info(obj.id)) == key
+
+        def is_waiting(index):
+            """Is a row after ``index`` an alias waiting for its ``@target`` path?"""
+            return any(aliases[-1] > index for _target, aliases in deferred.values())
+
+        def get_external(parent, group, name):
+            filename, target = group.id.links.get_val(name)
+            filename = os.fsdecode(filename)
+            target = target.decode("utf8")
+            item = self.resolver.get(filename, target, group.file.filename)
+            if item is None:
+                c = "not found: %s (file: %s, path: %s)" % (name.decode("utf8"), filename, target)
+                self.record_finding(parent, "external link", finding.WARN, c)
+            return item
+
+        def walk(stack):
+            while len(stack) > 0:
+                parent, group, path, names, fname = stack[-1]
+                name = next(names, None)
+                if name is None:
+                    stack.pop()  # all members of this group are done
+                    yield parent, True
+                    if keep is not None and not keep(parent) and not is_waiting(parent.index):
+                        catalog.truncate(parent.index + 1)  # forget its contents
+                    continue
+                if members is not None:
+                    members.setdefault(parent.index, {})[name] = None
+                if group.id.links.get_info(name).type == h5py.h5l.TYPE_EXTERNAL:
+                    item = get_external(parent, group, name)
+                    if item is None:
+                        continue
+                    item_fname = item.file.filename
+                else:
+                    item = group[name]
+                    item_fname = fname
+                item_path = path + b"/" + name
+                info = h5py.h5o.get_info(item.id)
+                key = object_key(info)
+                if info.num_attrs == 0:
+                    items = []
+                else:
+                    items = sorted(item.attrs.items())
+
+                subjects = None
+                if key in visited:
+                    original = visited[key]
+                    if not isinstance(original, str):  # (else, the row was removed)
+                        original = catalog.h5_address(original)
+                    subjects = get_alias(parent, item, items, original, item_path, fname=item_fname)
+                elif key in deferred:
+                    target, aliases = deferred[key]
+                    if item_path == target.encode("utf8"):
+                        del deferred[key]  # catalog it here, at the @target path
+                    else:
+                        subjects = get_alias(parent, item, items, target, item_path, fname=item_fname)
+                        aliases.append(subjects[0].index)
+                elif key is not None:
+                    attrs = utils.decode_attributes(items)
+                    target = attrs.get("target")
+                    if is_source_elsewhere(target, key, item_path):
+                        subjects = get_alias(
+                            parent, item, items, target, item_path, attrs, item_fname
+                        )
+                        deferred[key] = [target, [subjects[0].index]]
+                if subjects is not None:  # an alias: no members
+                    if members is not None:
+                        members[parent.index][name] = subjects[0].index
+                    for v in subjects:
+                        yield v, False
+                    continue
+
+                subjects = get_subject(parent, item, items, item_path, fname=item_fname)
+                if members is not None:
+                    members[parent.index][name] = subjects[0].index
+                if key is not None:
+                    visited[key] = subjects[0].index
+                if info.type == h5py.h5o.TYPE_DATASET:
+                    sources = self.resolver.virtual_sources(item)
+                    if sources is not None:
+                        catalog.virtual_sources[subjects[0].index] = sources
+                for v in subjects:
+                    yield v, False
+                if info.type == h5py.h5o.TYPE_GROUP:
+                    stack.append((subjects[0], item, item_path, iter(item.id), item_fname))
+
+        if names is None:
+            subjects = get_subject(parent, group, sorted(group.attrs.items()))
+            key = object_key(h5py.h5o.get_info(group.id))
+            if key is not None:
+                visited[key] = subjects[0].index
+            for v in subjects:
+                yield v, False
+            # members of each group are the children of this item
+            path = group.name.encode("utf8").rstrip(b"/")
+            yield from walk([(subjects[0], group, path, iter(group.id), None)])
+        else:
+            path = catalog.paths.get(parent.index, parent.h5_address.encode("utf8"))
+            fname = catalog.files.get(parent.index)
+            yield from walk([(parent, group, path.rstrip(b"/"), iter(names), fname)])
+
+        # objects not found at their @target path: catalog them at the first path
+        while len(deferred) > 0:
+            key, (target, aliases) = deferred.popitem()
+            v = catalog.item(aliases[0])
+            del catalog.aliases[v.index]
+            for i in aliases[1:]:
+                catalog.aliases[i] = v.h5_address
+            visited[key] = v.index
+            logger.log(INFORMATIVE, "HDF5 address: %s (not found at %s)", v.h5_address, target)
+            if v.is_group:
+                obj = v.h5_object
+                path = catalog.paths.get(v.index, v.h5_address.encode("utf8"))
+                yield from walk([(v, obj, path, iter(obj.id), catalog.files.get(v.index))])
+
+    def validate_hard_link(self, v_item):
+        """
+        report another hard link to an HDF5 object that is validated elsewhere
+        """
+        original = v_item.alias_of
+        if original is not None:
+            c = "same HDF5 object as: %s (validated there)"
+            self.record_finding(v_item, "HDF5 hard link", finding.OK, c, original)
+
+    def validate_virtual_dataset(self, v_item):
+        """
+        report the mapping of a virtual dataset to its source files
+        """
+        sources = self.catalog.virtual_sources.get(v_item.index)
+        if sources is not None:
+            status = finding.OK if len(sources.missing) == 0 else finding.WARN
+            self.record_finding(v_item, "virtual dataset", status, str(sources))
+
+    def _apply_rule_family_(self, scope, family, v_item, method):
+        """internal: check ``v_item`` with the rules of ``family`` (for deprecated ``method``)"""
+        warnings.warn(
+            "%s() is deprecated, use apply_rules() (rule family: '%s')" % (method, family),
+            DeprecationWarning,
+            stacklevel=3,
+        )
+        for rule in self.rules.select(scope, v_item):
+            if rule.family == family:
+                rule.check(self, v_item)
 
     def validate_item_name(self, v_item):
-        from .validations import item_name
+        """
+        validate the name of an item (deprecated: rule family ``item names``)
+        """
+        from . import rules
 
-        item_name.verify(self, v_item)
+        self._apply_rule_family_(rules.ITEM, "item names", v_item, "validate_item_name")
 
     def validate_attribute(self, v_item):
-        from .validations import attribute
+        """
+        validate an attribute (deprecated: rule family ``attributes``)
+        """
+        from . import rules
 
-        attribute.verify(self, v_item)
+        self._apply_rule_family_(rules.ITEM, "attributes", v_item, "validate_attribute")
 
     def validate_group(self, v_item):
         """
         validate the NeXus content of a HDF5 data file group
+        (deprecated: rule family ``base classes``)
         """
-        from .validations import hdf5_group_items_in_base_class
-        from .validations import base_class_items_in_hdf5_group
-
-        key = "NeXus_group"
-        if v_item.classpath == CLASSPATH_OF_NON_NEXUS_CONTENT:
-            self.record_finding(v_item, key, finding.OK, "not a NeXus group")
-            return
-
-        if v_item.classpath.startswith("/NX"):
-            nx_class = v_item.nx_class
-        elif v_item.classpath == "":
-            nx_class = "NXroot"  # handle as NXroot
-        else:
-            raise ValueError(f"unexpected: {v_item}")
-
-        # print(str(v_item), v_item.name, v_item.classpath)
-        self.validate_NX_class_attribute(v_item, nx_class)
-
-        base_class = self.manager.classes.get(nx_class)
-        if base_class is None:
-            c = "unknown NeXus base class: " + nx_class
-            self.record_finding(v_item, "NeXus base class", finding.ERROR, c)
-        else:
-            hdf5_group_items_in_base_class.verify(self, v_item, base_class)
-            base_class_items_in_hdf5_group.verify(self, v_item, base_class)
+        from . import rules
 
-            # TODO: validate attributes - both HDF5-supplied & NXDL-specified
-            # TODO: validate symbols - both HDF5-supplied & NXDL-specified
-            # TODO: validate fields - both HDF5-supplied & NXDL-specified
-            # TODO: validate links - both HDF5-supplied & NXDL-specified
-            c = nx_class + ": more validations needed"
-            self.record_finding(v_item, "NeXus base class", finding.TODO, c)
+        self._apply_rule_family_(rules.GROUP, "base classes", v_item, "validate_group")
 
     def validate_application_definition(self, v_item):
         """
         validate group as a NeXus application definition
+        (deprecated: rule family ``application definitions``)
         """
-        from .validations import application_definition
+        from . import rules
 
-        application_definition.verify(self, v_item)
+        self._apply_rule_family_(
+            rules.APPLICATION_DEFINITION,
+            "application definitions",
+            v_item,
+            "validate_application_definition",
+        )
 
     def validate_NX_class_attribute(self, v_item, nx_class):
+        """
+        validate the ``@NX_class`` attribute of a group
+        (deprecated: part of rule family ``base classes``)
+        """
         from .validations import nx_class_attribute
 
+        warnings.warn(
+            "validate_NX_class_attribute() is deprecated, use apply_rules() (rule family: 'base classes')",
+            DeprecationWarning,
+            stacklevel=2,
+        )
         nx_class_attribute.validate_NX_class_attribute(self, v_item, nx_class)
 
     def usedAsBaseClass(self, nx_class):
@@ -367,53 +802,192 @@ class Data_File_Validator(object):
         them is the presence of the `definition` field
         in the `NXentry` group of an application definition.
         This field is not present in base classes.
+
+        :see: :func:`punx.nxdl_manager.used_as_base_class()`
         """
-        nxdl_def = self.manager.classes.get(nx_class, None)
-        if nxdl_def is None:
-            return False
-        if nxdl_def.category == "applications":
-            return False
-        if nxdl_def.category == "base_classes":
-            return True
-        # now, need to work at it a bit
-        # *Should* only be one NXentry group but that is not a rule.
-        if (
-            len(nxdl_def.fields) == 0
-            and len(nxdl_def.links) == 0
-            and len(nxdl_def.groups) == 1
-        ):  # maybe ...
-            entry_group = nxdl_def.groups.values()[0]
-            # TODO: test entry_group.NX_class == "NXentry" but that attribute is not ready yet!
-            # assume OK
-            return "definition" not in entry_group.fields
-        return True
+        return self.manager.get_class_spec(nx_class).used_as_base_class
 
 
 class ValidationItem(object):
 
-    """HDF5 data file object for validation"""
+    """
+    HDF5 data file object for validation
+
+    A ``ValidationItem`` is a view of one row of an
+    :class:`Address_Catalog`, where everything about the object is kept
+    (except the open h5py object: ``h5_object`` is opened again when
+    needed).
+    Making a ``ValidationItem`` adds a row to the catalog of its parent
+    (or to ``catalog``, or to a new catalog if there is no parent).
+
+    The attributes of an HDF5 group or dataset are read once, when
+    the item is created, into the read-only mapping ``attrs``
+    (decoded by :func:`punx.utils.decode_byte_string`).
+    Validation rules use ``attrs`` (or, for an attribute item,
+    ``value``) rather than read the attributes again from the file.
+
+    PARAMETERS
+
+    parent obj :
+        ``ValidationItem`` of the parent, or None
+    obj obj :
+        h5py object (group, dataset) or the value of an attribute
+    attribute_name str :
+        name of the attribute (if ``obj`` is an attribute value)
+    attrs mapping :
+        decoded attributes of ``obj``, if already read
+        (default: read them from ``obj``)
+    catalog obj :
+        :class:`Address_Catalog` for an item without a parent
+    """
+
+    __slots__ = ("catalog", "index")
 
-    def __init__(self, parent, obj, attribute_name=None):
+    def __init__(self, parent, obj, attribute_name=None, attrs=None, catalog=None):
         assert isinstance(parent, (ValidationItem, type(None)))
-        self.parent = parent
-        self.validations = {}  # validation findings go here
-        self.h5_object = obj
+        if parent is not None:
+            catalog = parent.catalog
+        elif catalog is None:
+            catalog = Address_Catalog()
+        self.catalog = catalog
         if hasattr(obj, "name"):
-            self.h5_address = obj.name
+            if attrs is None:
+                attrs = utils.read_attributes(obj)
             if obj.name == SLASH:
-                self.name = SLASH
+                name = SLASH
             else:
-                self.name = obj.name.split(SLASH)[-1]
-            self.classpath = self.determine_NeXus_classpath()
+                name = obj.name.split(SLASH)[-1]
+            if isinstance(obj, h5py.Group):  # or file root
+                kind = Address_Catalog.HDF5_GROUP
+            else:
+                kind = Address_Catalog.HDF5_OBJECT
+            self.index = catalog.append(parent, kind, name, obj.name, obj, attrs)
+            catalog.set_classpath(self.index, self.determine_NeXus_classpath())
         else:
-            self.name = attribute_name
             if parent.classpath == CLASSPATH_OF_NON_NEXUS_CONTENT:
-                self.h5_address = None
-                self.classpath = CLASSPATH_OF_NON_NEXUS_CONTENT
+                classpath = CLASSPATH_OF_NON_NEXUS_CONTENT
             else:
-                self.h5_address = "%s@%s" % (parent.h5_address, self.name)
-                self.classpath = str(parent.classpath) + "@" + str(self.name)
-        self.object_type = self.identify_object_type()
+                classpath = str(parent.classpath) + "@" + str(attribute_name)
+            if attribute_name in parent.attrs or (
+                not parent.is_group and attribute_name in parent.h5_object.attrs
+            ):
+                kind = Address_Catalog.ATTRIBUTE  # can be read again
+            else:
+                kind = Address_Catalog.VALUE
+            self.index = catalog.append(
+                parent, kind, attribute_name, None, obj, utils.NO_ATTRIBUTES
+            )
+            catalog.set_classpath(self.index, classpath)
+        catalog.set_object_type(self.index, self.identify_object_type())
+
+    @classmethod
+    def view(cls, catalog, index):
+        """Return the item at row ``index`` of ``catalog``."""
+        item = cls.__new__(cls)
+        item.catalog = catalog
+        item.index = index
+        return item
+
+    def __eq__(self, other):
+        if not isinstance(other, ValidationItem):
+            return NotImplemented
+        return self.catalog is other.catalog and self.index == other.index
+
+    def __hash__(self):
+        return hash((id(self.catalog), self.index))
+
+    @property
+    def parent(self):
+        """``ValidationItem`` of the parent, or None"""
+        i = self.catalog.parents[self.index]
+        if i < 0:
+            return None
+        return ValidationItem.view(self.catalog, i)
+
+    @property
+    def name(self):
+        """name of the object (or attribute)"""
+        return self.catalog.names.values[self.catalog.name_ids[self.index]]
+
+    @property
+    def h5_address(self):
+        """HDF5 address (None for attributes of non-NeXus content)"""
+        return self.catalog.h5_address(self.index)
+
+    @property
+    def h5_object(self):
+        """h5py object (group, dataset) or the value of an attribute"""
+        return self.catalog.get_object(self.index)
+
+    @property
+    def classpath(self):
+        """NeXus class path"""
+        return self.catalog.classpaths.values[self.catalog.classpath_ids[self.index]]
+
+    @property
+    def object_type(self):
+        """type of the object, as from :meth:`identify_object_type`"""
+        return self.catalog.object_types.values[self.catalog.object_type_ids[self.index]]
+
+    @property
+    def attrs(self):
+        """
+        read-only mapping of the decoded attributes
+
+        All attributes of a group; of a dataset, only those of
+        ``Address_Catalog.KEPT_ATTRIBUTES`` (see :attr:`value`).
+        """
+        return self.catalog.attrs.get(self.index, utils.NO_ATTRIBUTES)
+
+    @property
+    def value(self):
+        """decoded value (attributes only, read again if not kept)"""
+        kind = self.catalog.kinds[self.index]
+        if kind in (Address_Catalog.HDF5_GROUP, Address_Catalog.HDF5_OBJECT):
+            raise AttributeError("only attribute items have a value")
+        elif kind == Address_Catalog.ATTRIBUTE:
+            name = self.name
+            attrs = self.parent.attrs
+            if name in attrs:
+                return attrs[name]
+            return utils.decode_attributes([(name, self.h5_object)])[name]
+        return utils.decode_byte_string(self.h5_object)
+
+    @property
+    def alias_of(self):
+        """
+        HDF5 address where the same HDF5 object is cataloged (None if here)
+
+        When an HDF5 object has several hard links, it is cataloged with
+        its attributes and members (and validated) at only one of them.
+        """
+        return self.catalog.aliases.get(self.index)
+
+    @property
+    def is_group(self):
+        """Is this an HDF5 group (or the file root)?  (Without opening it.)"""
+        return self.catalog.kinds[self.index] == Address_Catalog.HDF5_GROUP
+
+    @property
+    def is_hdf5_object(self):
+        """Is this an HDF5 group, dataset, ... (not an attribute)?  (Without opening it.)"""
+        return self.catalog.kinds[self.index] in (
+            Address_Catalog.HDF5_GROUP,
+            Address_Catalog.HDF5_OBJECT,
+        )
+
+    @property
+    def nx_class(self):
+        """NeXus base class (NeXus groups only)"""
+        try:
+            return self.catalog.nx_classes[self.index]
+        except KeyError:
+            raise AttributeError("not a NeXus group: %s" % self.h5_address)
+
+    @property
+    def validations(self):
+        """validation findings of this item, by test name (see :class:`Item_Findings`)"""
+        return Item_Findings(self.catalog, self.catalog.validations.get(self.index, {}))
 
     def __str__(self, *args, **kwargs):
         try:
@@ -438,7 +1012,8 @@ class ValidationItem(object):
         else:
             object_type = type(self.h5_object)
         if object_type in ("HDF5 file root", "HDF5 group", "HDF5 dataset"):
-            if utils.isNeXusLink(self.h5_object):
+            target = self.attrs.get("target", "")
+            if len(target) > 0 and target != self.h5_address:
                 object_type = "NeXus link"
         return object_type
 
@@ -480,11 +1055,10 @@ class ValidationItem(object):
             if not classpath.endswith(SLASH):
 
                 if utils.isHdf5Group(h5_obj):
-                    nx_class = utils.decode_byte_string(
-                        h5_obj.attrs.get("NX_class"))
+                    nx_class = self.attrs.get("NX_class")
 
                     if isinstance(nx_class, str) and nx_class.startswith("NX"):
-                        self.nx_class = nx_class  # only for groups
+                        self.catalog.nx_classes[self.index] = nx_class  # only for groups
                         logger.log(
                             INFORMATIVE,
                             "NeXus base class: " + nx_class,
@@ -501,3 +1075,712 @@ class ValidationItem(object):
                 classpath += SLASH + nx_class
 
             return classpath
+
+
+class Interned_Values(object):
+
+    """
+    Values (such as names or class paths) kept once, referred to by index
+
+    Attributes
+
+    values list :
+        the different values, in the order they were first added
+    """
+
+    __slots__ = ("values", "_index")
+
+    def __init__(self):
+        self.values = []
+        self._index = {}
+
+    def find(self, value):
+        """Return the index of ``value``, or None if not added."""
+        return self._index.get(value)
+
+    def add(self, value):
+        """Return the index of ``value``, adding it if new."""
+        i = self._index.get(value)
+        if i is None:
+            i = len(self.values)
+            self.values.append(value)
+            self._index[value] = i
+        return i
+
+
+class Read_Budget(object):
+
+    """
+    Byte budgets for reading the values of datasets during validation
+
+    Only scalar values (numbers or strings) are read, and only
+    if their size is within both budgets.  The size of a variable-length
+    value (such as a string) is known only once it is read (HDF5 keeps
+    it in the file's global heap), so such a (scalar) value is read,
+    then refused if it is too large.
+
+    PARAMETERS
+
+    max_read_bytes int :
+        largest value (in bytes) to read
+    max_file_bytes int :
+        most bytes to read from one file (see :meth:`reset`)
+
+    Attributes
+
+    bytes_read int :
+        bytes read since the last :meth:`reset`
+
+    .. autosummary::
+
+       ~check
+       ~value_size
+       ~read
+       ~reset
+    """
+
+    def __init__(self, max_read_bytes=DEFAULT_MAX_READ_BYTES, max_file_bytes=DEFAULT_MAX_FILE_BYTES):
+        self.max_read_bytes = max_read_bytes
+        self.max_file_bytes = max_file_bytes
+        self.bytes_read = 0
+
+    def check(self, h5_obj):
+        """
+        Return the reason not to read the value of ``h5_obj``, None if allowed.
+
+        (A variable-length value is allowed here, its size is checked once read.)
+        """
+        reason = self._review_shape_(h5_obj)
+        if reason is None:
+            reason = self._review_size_(self.value_size(h5_obj))
+        return reason
+
+    def _review_shape_(self, h5_obj):
+        """internal: return the reason not to read ``h5_obj`` (None if a scalar dataset)"""
+        if not isinstance(h5_obj, h5py.Dataset):
+            return "not a dataset"
+        if h5_obj.size > 1:
+            return "not a scalar: shape=%s" % str(h5_obj.shape)
+        return None
+
+    def _review_size_(self, nbytes):
+        """internal: return the reason not to keep a value of ``nbytes`` (None if allowed)"""
+        if nbytes is None:
+            return None  # not known yet
+        if nbytes > self.max_read_bytes:
+            return "%d bytes, more than %d bytes per value" % (nbytes, self.max_read_bytes)
+        if self.bytes_read + nbytes > self.max_file_bytes:
+            return "more than %d bytes read from this file" % self.max_file_bytes
+        return None
+
+    def value_size(self, h5_obj):
+        """
+        Return the size (bytes) of the value of (scalar) dataset ``h5_obj``.
+
+        Return None for a variable-length value (string or sequence):
+        its size is known only once it is read.
+        """
+        if h5py.check_vlen_dtype(h5_obj.dtype) is not None:
+            return None
+        return h5_obj.size * h5_obj.dtype.itemsize
+
+    def read(self, h5_obj):
+        """
+        Return the value of ``h5_obj``.
+
+        Raises :exc:`~punx.ValueNotInspected` (with the reason)
+        if the value is not allowed by :meth:`check` or (for a
+        variable-length value) by its size, once read.
+        """
+        reason = self.check(h5_obj)
+        if reason is not None:
+            raise ValueNotInspected(reason)
+        nbytes = self.value_size(h5_obj)
+        value = h5_obj[()]
+        if nbytes is None:
+            nbytes = len(value) if isinstance(value, (bytes, str)) else numpy.asarray(value).nbytes
+            reason = self._review_size_(nbytes)
+            if reason is not None:
+                raise ValueNotInspected(reason)
+        self.bytes_read += nbytes
+        return value
+
+    def reset(self):
+        """Start the budget of another file."""
+        self.bytes_read = 0
+
+
+class Handle_Cache(object):
+
+    """
+    Bounded cache of the open h5py objects of catalog rows
+
+    Objects are kept by row index.  The least recently used objects
+    are discarded (and so closed, once nothing else refers to them)
+    when there are more than ``max_handles``.
+
+    PARAMETERS
+
+    max_handles int :
+        Keep at most this many open objects (at least 1).
+
+    .. autosummary::
+
+       ~get
+       ~put
+       ~discard
+       ~set_max_handles
+       ~clear
+    """
+
+    def __init__(self, max_handles=DEFAULT_MAX_HANDLES):
+        self.max_handles = max(1, max_handles)
+        self._handles = collections.OrderedDict()
+
+    def __contains__(self, index):
+        return index in self._handles
+
+    def __len__(self):
+        return len(self._handles)
+
+    def _discard_extra_handles(self):
+        """internal: discard least recently used objects over the limit"""
+        while len(self._handles) > self.max_handles:
+            self._handles.popitem(last=False)
+
+    def get(self, index, opener):
+        """Return the object of row ``index``, opened by ``opener(index)`` if needed."""
+        obj = self._handles.get(index)
+        if obj is None:
+            obj = opener(index)
+            self.put(index, obj)
+        else:
+            self._handles.move_to_end(index)
+        return obj
+
+    def put(self, index, obj):
+        """Keep the (open) object of row ``index``."""
+        self._handles[index] = obj
+        self._handles.move_to_end(index)
+        self._discard_extra_handles()
+
+    def discard(self, index):
+        """Discard the object of row ``index`` (if kept)."""
+        self._handles.pop(index, None)
+
+    def set_max_handles(self, max_handles):
+        """Change the limit on the number of open objects."""
+        self.max_handles = max(1, max_handles)
+        self._discard_extra_handles()
+
+    def clear(self):
+        """Discard all objects."""
+        self._handles.clear()
+
+
+class Address_Catalog(object):
+
+    """
+    Catalog of the HDF5 objects (groups, datasets, attributes) of a data file
+
+    Each object is one row, identified by its (integer) index.
+    Columns are kept as arrays (or lists) indexed by row.
+    Names, class paths and object types repeat across many rows
+    so each row refers to them by index in an :class:`Interned_Values`
+    table.  Values that only a few rows have are kept in dictionaries
+    keyed by index.
+
+    Rows do not keep the h5py objects.  An object is opened
+    again (an attribute value is read again) when needed, from the
+    HDF5 file ``h5``, and kept in the bounded :class:`Handle_Cache`.
+    So the number of open HDF5 objects does not grow with the size
+    of the file.
+
+    Rows do not keep their HDF5 address either.  It is made when
+    needed (see :meth:`h5_address`) from the address of the parent
+    and the (interned) name.  Only a row with another address (such
+    as a row in the file of an external link) keeps it.
+    The decoded attributes are kept for groups (the rules read them,
+    such as ``@NX_class``, ``@default``, ``@signal``).  For other rows,
+    only those of ``KEPT_ATTRIBUTES`` are kept; the value of any
+    other attribute is read again from the file when needed.
+
+    Use :class:`ValidationItem` to view a row.
+
+    A catalog can be pickled (without the open file and objects),
+    such as to validate the file again later (see :mod:`punx.watch`).
+
+    PARAMETERS
+
+    h5 obj :
+        open h5py File (default: the file of the first object added)
+    max_handles int :
+        Keep at most this many objects open (see :class:`Handle_Cache`).
+    keep_findings bool :
+        Keep the rows of the findings of each row in ``validations``?
+        (default: True)
+    resolver obj :
+        :class:`~punx.external_links.External_Link_Resolver` that
+        opens the files of external links (default: a new one)
+
+    Attributes
+
+    parents array :
+        index of the parent (-1: no parent)
+    kinds array :
+        HDF5_GROUP (or file root), HDF5_OBJECT (dataset, ...), ATTRIBUTE,
+        or VALUE (a value that cannot be read again)
+    name_ids array :
+        index of the name in ``names``
+    classpath_ids array :
+        index of the NeXus class path in ``classpaths``
+    object_type_ids array :
+        index of the object type in ``object_types``
+    other_addresses dict :
+        HDF5 address of rows where it is not made from the parent's
+        address and the name (such as a row without a parent)
+    attrs dict :
+        read-only mapping of decoded attributes of rows that have
+        attributes (for rows that are not groups: of ``KEPT_ATTRIBUTES``)
+    paths dict :
+        path to open rows reached by a link that is not their HDF5 address
+    files dict :
+        (absolute) name of the file, for rows in the file of an external link
+    virtual_sources dict :
+        :class:`~punx.external_links.Virtual_Sources` of virtual datasets
+    aliases dict :
+        HDF5 address where the same HDF5 object is cataloged,
+        for rows that are other hard links to it
+    hard_links dict :
+        index of the row where each HDF5 object with several hard
+        links is cataloged, by (file number, address in the file)
+        (its HDF5 address, once the row is removed by :meth:`truncate`)
+    values dict :
+        objects of VALUE rows
+    nx_classes dict :
+        NeXus base class of rows that are NeXus groups
+    validations dict :
+        rows in ``findings`` of the findings (by test name)
+        of rows that have findings
+    findings obj :
+        :class:`~punx.finding.Finding_Store` with the findings
+        of ``validations`` (the validator's, ``None`` until a
+        finding is recorded)
+    handles obj :
+        :class:`Handle_Cache` of recently used objects
+    """
+
+    HDF5_GROUP = 0
+    HDF5_OBJECT = 1
+    ATTRIBUTE = 2
+    VALUE = 3
+    KEPT_ATTRIBUTES = ("target",)  # of rows that are not groups
+
+    def __init__(
+        self, h5=None, max_handles=DEFAULT_MAX_HANDLES, keep_findings=True, resolver=None
+    ):
+        self.h5 = h5
+        self.keep_findings = keep_findings
+        if resolver is None:
+            resolver = External_Link_Resolver()
+        self.resolver = resolver
+        self.parents = array.array("l")
+        self.kinds = array.array("b")
+        self.name_ids = array.array("l")
+        self.classpath_ids = array.array("l")
+        self.object_type_ids = array.array("l")
+        self.other_addresses = {}
+        self.attrs = {}
+        self.paths = {}
+        self.files = {}
+        self.virtual_sources = {}
+        self.aliases = {}
+        self.hard_links = {}
+        self.values = {}
+        self.nx_classes = {}
+        self.validations = {}
+        self.findings = None
+        self.handles = Handle_Cache(max_handles)
+
+        self.names = Interned_Values()
+        self.classpaths = Interned_Values()
+        self.object_types = Interned_Values()
+
+        # indices of the cataloged rows
+        self.address_index = {}  # by address key (see _address_key)
+        self.classpath_index = {}  # by NeXus class path, in order of discovery
+        self._last_address = (None, None)  # (index, HDF5 address) made last
+
+    def __len__(self):
+        return len(self.parents)
+
+    def __getstate__(self):
+        # not kept: the open file, objects, and files of external links
+        state = self.__dict__.copy()
+        state["attrs"] = {index: dict(attrs) for index, attrs in self.attrs.items()}
+        state["h5"] = None
+        state["handles"] = self.handles.max_handles
+        state["resolver"] = None
+        state["findings"] = None  # kept by the validator
+        state["validations"] = {}
+        return state
+
+    def __setstate__(self, state):
+        state["attrs"] = {
+            index: types.MappingProxyType(attrs) for index, attrs in state["attrs"].items()
+        }
+        state["handles"] = Handle_Cache(state["handles"])
+        state["resolver"] = External_Link_Resolver()
+        self.__dict__.update(state)
+
+    def append(self, parent, kind, name, h5_address, h5_object, attrs):
+        """
+        Add a row, return its index.  (Set its classpath & type next.)
+
+        ``h5_address`` : of a group or dataset (kept only if not
+        made from its parent's address and ``name``)
+        """
+        index = len(self.parents)
+        if parent is None:
+            self.parents.append(-1)
+        else:
+            self.parents.append(parent.index)
+        self.kinds.append(kind)
+        self.name_ids.append(self.names.add(name))
+        self.classpath_ids.append(-1)
+        self.object_type_ids.append(-1)
+        if kind in (self.HDF5_GROUP, self.HDF5_OBJECT):
+            if parent is None or h5_address != self._member_address(parent.index, name):
+                self.other_addresses[index] = h5_address
+        if kind != self.HDF5_GROUP and len(attrs) > 0:
+            kept = {k: attrs[k] for k in self.KEPT_ATTRIBUTES if k in attrs}
+            attrs = types.MappingProxyType(kept) if len(kept) > 0 else utils.NO_ATTRIBUTES
+        if len(attrs) > 0:
+            self.attrs[index] = attrs
+        if kind == self.VALUE:
+            self.values[index] = h5_object
+        else:
+            if self.h5 is None and kind != self.ATTRIBUTE:
+                self.h5 = h5_object.file
+            self.handles.put(index, h5_object)  # it is open now
+        return index
+
+    def set_classpath(self, index, classpath):
+        """Set the NeXus class path of row ``index``."""
+        self.classpath_ids[index] = self.classpaths.add(classpath)
+
+    def set_object_type(self, index, object_type):
+        """Set the object type of row ``index``."""
+        self.object_type_ids[index] = self.object_types.add(object_type)
+
+    def set_path(self, index, path):
+        """Set the path (bytes, from ``h5``) to open row ``index``, if not its address."""
+        if path != self.h5_address(index).encode("utf8"):
+            self.paths[index] = path
+
+    def h5_address(self, index):
+        """
+        Return the HDF5 address of row ``index``.
+
+        Made from the address of the parent (and its parent, ...) and
+        the name, unless the row keeps another address.  An attribute
+        of non-NeXus content has no address (None).
+        """
+        last_index, address = self._last_address
+        if last_index == index:
+            return address
+        kind = self.kinds[index]
+        if kind in (self.ATTRIBUTE, self.VALUE):
+            if self.classpath_ids[index] == self.classpaths.find(CLASSPATH_OF_NON_NEXUS_CONTENT):
+                return None
+            address = "%s@%s" % (
+                self.h5_address(self.parents[index]),
+                self.names.values[self.name_ids[index]],
+            )
+        else:
+            names = []
+            row = index
+            while row not in self.other_addresses:  # up to a row that keeps its address
+                names.append(self.names.values[self.name_ids[row]])
+                row = self.parents[row]
+            address = self.other_addresses[row]
+            if len(names) > 0:
+                names.reverse()
+                address = address.rstrip(SLASH) + SLASH + SLASH.join(names)
+        self._last_address = (index, address)
+        return address
+
+    def _member_address(self, parent, name):
+        """internal: HDF5 address of member ``name`` of row ``parent``"""
+        return self.h5_address(parent).rstrip(SLASH) + SLASH + name
+
+    def _address_key(self, index):
+        """
+        internal: key of row ``index`` in ``address_index``
+
+        The parent, name and kind (member or attribute) of the row,
+        as one integer.  (Its address, for a row that keeps its address.)
+        """
+        if index in self.other_addresses:
+            return self.other_addresses[index]
+        attribute = self.kinds[index] in (self.ATTRIBUTE, self.VALUE)
+        if attribute and self.classpath_ids[index] == self.classpaths.find(CLASSPATH_OF_NON_NEXUS_CONTENT):
+            return None
+        return self._key(self.parents[index], self.name_ids[index], attribute)
+
+    @staticmethod
+    def _key(parent, name_id, attribute):
+        """internal: key of a row in ``address_index``"""
+        return (((parent << 32) | name_id) << 1) | int(attribute)
+
+    def find(self, h5_address):
+        """Return the index of the (registered) row at ``h5_address``, or None."""
+        index = self.address_index.get(h5_address)  # a row that keeps its address
+        if index is not None or not isinstance(h5_address, str):
+            return index
+        names = []
+        head = h5_address
+        while index is None:  # up to a row that keeps its address
+            head, sep, name = head.rpartition(SLASH)
+            if sep == "":
+                return None
+            names.append(name)
+            index = self.address_index.get(head or SLASH)
+        last = names.pop(0)
+        for name in reversed(names):  # then down, by name
+            index = self._find_row(index, name, False)
+            if index is None:
+                return None
+        member = self._find_row(index, last, False)
+        if member is not None:
+            return member
+        # or an attribute (its name follows an "@")
+        start = len(h5_address) - len(last)
+        at = h5_address.find("@", start)
+        while at >= 0:
+            if at == start:
+                owner = index
+            else:
+                owner = self._find_row(index, h5_address[start:at], False)
+                if owner is None:
+                    owner = self.address_index.get(h5_address[:at])
+            if owner is not None:
+                row = self._find_row(owner, h5_address[at + 1:], True)
+                if row is not None:
+                    return row
+            at = h5_address.find("@", at + 1)
+        return None
+
+    def _find_row(self, parent, name, attribute):
+        """internal: index of the (registered) member or attribute ``name`` of row ``parent``"""
+        name_id = self.names.find(name)
+        if name_id is None:
+            return None
+        return self.address_index.get(self._key(parent, name_id, attribute))
+
+    def register(self, index):
+        """Add row ``index`` to the catalog's addresses and class paths."""
+        self.address_index[self._address_key(index)] = index
+        classpath_id = self.classpath_ids[index]
+        if classpath_id not in self.classpath_index:
+            self.classpath_index[classpath_id] = array.array("l")
+        self.classpath_index[classpath_id].append(index)
+
+    def remove(self, index):
+        """
+        Remove row ``index`` from the catalog's addresses and class paths.
+
+        What is kept about the row (its attributes, findings, ...) is
+        forgotten.  The row itself is kept (unused), so the index of
+        every other row is unchanged.
+        """
+        key = self._address_key(index)
+        if self.address_index.get(key) == index:
+            del self.address_index[key]
+        rows = self.classpath_index.get(self.classpath_ids[index])
+        if rows is not None and index in rows:
+            rows.remove(index)
+            if len(rows) == 0:
+                del self.classpath_index[self.classpath_ids[index]]
+        self._forget(index)
+
+    def truncate(self, length):
+        """
+        Remove the rows from index ``length`` on (the last ones cataloged).
+
+        As :meth:`remove` but the rows themselves are also forgotten
+        (their indices are used again by the next rows).
+        An object with several hard links, cataloged in one of these
+        rows, is known by its HDF5 address (in ``hard_links``) from now on.
+        """
+        if length >= len(self):
+            return
+        for key, index in self.hard_links.items():
+            if not isinstance(index, str) and index >= length:
+                self.hard_links[key] = self.h5_address(index)
+        for index in range(len(self) - 1, length - 1, -1):
+            key = self._address_key(index)
+            if self.address_index.get(key) == index:
+                del self.address_index[key]
+            classpath_id = self.classpath_ids[index]
+            rows = self.classpath_index.get(classpath_id)
+            if rows is not None and rows[-1] == index:  # rows are registered in order
+                rows.pop()
+                if len(rows) == 0:
+                    del self.classpath_index[classpath_id]
+            self._forget(index)
+            self.other_addresses.pop(index, None)
+        for column in (
+            self.parents,
+            self.kinds,
+            self.name_ids,
+            self.classpath_ids,
+            self.object_type_ids,
+        ):
+            del column[length:]
+        self._last_address = (None, None)
+
+    def _forget(self, index):
+        """internal: forget what is kept about row ``index`` (but the row)"""
+        for column in (
+            self.attrs,
+            self.paths,
+            self.files,
+            self.virtual_sources,
+            self.aliases,
+            self.values,
+            self.nx_classes,
+            self.validations,
+        ):
+            column.pop(index, None)
+        self.handles.discard(index)
+
+    def item(self, index):
+        """Return the :class:`ValidationItem` of row ``index``."""
+        return ValidationItem.view(self, index)
+
+    def get_object(self, index):
+        """Return the h5py object (or attribute value) of row ``index``."""
+        if self.kinds[index] == self.VALUE:
+            return self.values[index]
+        return self.handles.get(index, self._open)
+
+    def _open(self, index):
+        """internal: open the h5py object (read the attribute value) of row ``index``"""
+        if self.kinds[index] == self.ATTRIBUTE:
+            parent = self.get_object(self.parents[index])
+            return parent.attrs[self.names.values[self.name_ids[index]]]
+        if index in self.files:
+            return self.resolver.open(self.files[index])[self.h5_address(index)]
+        path = self.paths.get(index, self.h5_address(index))
+        if path == SLASH:
+            return self.h5
+        return self.h5[path]
+
+
+class Catalog_Address_Dict(collections.abc.Mapping):
+
+    """
+    Read-only dictionary of cataloged items, by HDF5 address
+
+    PARAMETERS
+
+    catalog obj :
+        instance of :class:`Address_Catalog`
+    """
+
+    def __init__(self, catalog):
+        self.catalog = catalog
+
+    def __getitem__(self, h5_address):
+        index = self.catalog.find(h5_address)
+        if index is None:
+            raise KeyError(h5_address)
+        return self.catalog.item(index)
+
+    def __contains__(self, h5_address):
+        return self.catalog.find(h5_address) is not None
+
+    def __iter__(self):
+        h5_address = self.catalog.h5_address
+        return (h5_address(index) for index in list(self.catalog.address_index.values()))
+
+    def __len__(self):
+        return len(self.catalog.address_index)
+
+    def items(self):
+        """(HDF5 address, item) of each cataloged item (without finding each address again)"""
+        catalog = self.catalog
+        for index in list(catalog.address_index.values()):
+            yield catalog.h5_address(index), catalog.item(index)
+
+    def values(self):
+        """each cataloged item"""
+        catalog = self.catalog
+        return (catalog.item(index) for index in list(catalog.address_index.values()))
+
+
+class Item_Findings(collections.abc.Mapping):
+
+    """
+    Read-only dictionary of the findings of a cataloged item, by test name
+
+    A view: each :class:`~punx.finding.Finding` is made (from its row in
+    the catalog's ``findings``) when used.
+
+    PARAMETERS
+
+    catalog obj :
+        instance of :class:`Address_Catalog`
+    rows dict :
+        row (in ``catalog.findings``) of each finding, by test name
+    """
+
+    def __init__(self, catalog, rows):
+        self.catalog = catalog
+        self.rows = rows
+
+    def __getitem__(self, test_name):
+        return self.catalog.findings.finding(self.rows[test_name])
+
+    def __contains__(self, test_name):
+        return test_name in self.rows
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def __len__(self):
+        return len(self.rows)
+
+
+class Catalog_Classpath_Dict(collections.abc.Mapping):
+
+    """
+    Read-only dictionary of lists of cataloged items, by NeXus class path
+
+    PARAMETERS
+
+    catalog obj :
+        instance of :class:`Address_Catalog`
+    """
+
+    def __init__(self, catalog):
+        self.catalog = catalog
+
+    def __getitem__(self, classpath):
+        catalog = self.catalog
+        classpath_id = catalog.classpaths.find(classpath)
+        if classpath_id not in catalog.classpath_index:
+            raise KeyError(classpath)
+        return [catalog.item(i) for i in catalog.classpath_index[classpath_id]]
+
+    def __contains__(self, classpath):
+        classpath_id = self.catalog.classpaths.find(classpath)
+        return classpath_id in self.catalog.classpath_index
+
+    def __iter__(self):
+        values = self.catalog.classpaths.values
+        return (values[i] for i in self.catalog.classpath_index)
+
+    def __len__(self):
+        return len(self.catalog.classpath_index)
@@ -8,6 +8,7 @@
 # The full license is in the file LICENSE.txt, distributed with this software.
 # -----------------------------------------------------------------------------
 
+from .. import ValueNotInspected
 from .. import finding
 from .. import utils
 from ..validate import ValidationItem
@@ -17,10 +18,17 @@ def verify(validator, v_item):
     """
     Verify items specified in application definition are present in HDF5 data file
     """
-    ad_name = str(utils.decode_byte_string(v_item.h5_object["definition"][()]))
     key = "NeXus application definition"
+    try:
+        ad_name = validator.read_value(v_item.h5_object["definition"])
+    except ValueNotInspected as exc:
+        c = "definition not inspected: %s" % exc
+        validator.record_finding(v_item, key, finding.TODO, c)
+        return
+    ad_name = str(utils.decode_byte_string(ad_name))
 
-    ad = validator.manager.classes.get(ad_name)
+    spec = validator.manager.get_class_spec(ad_name)
+    ad = spec.nxdl
     status = finding.TF_RESULT[ad is not None]
     msg = ad_name + f": {'un' if ad is None else ''}recognized NXDL specification"
     validator.record_finding(v_item, "known NXDL", status, msg)
@@ -41,10 +49,10 @@ def verify(validator, v_item):
     validator.record_finding(v_item, key, finding.TODO, c)
 
     # TODO: groups, attributes, links, type, ... in separate functions
-    ad_entry = list(ad.groups.values())[
-        0
-    ]  # only 1 at this level of the application definition (ad)
-    for field, spec in ad_entry.fields.items():
+    entry = spec.entry  # only 1 group at this level of the application definition
+    if entry is None:
+        return
+    for field in entry.field_names:
 
         msg = "%s:%s" % (ad_name, field)
         h5_obj = v_item.h5_object.get(field)
@@ -55,25 +63,28 @@ def verify(validator, v_item):
         v_obj = ValidationItem(v_item, h5_obj)
         validator.record_finding(v_obj, "NXDL field", status, msg)
 
-        if len(spec.enumerations) > 0:
-            found = False
-            for enum in spec.enumerations:
-                found = enum == utils.decode_byte_string(h5_obj[()])
-                if found:
-                    break
+        enumerations = entry.field_enumerations.get(field)
+        if enumerations is not None:
+            try:
+                value = utils.decode_byte_string(validator.read_value(h5_obj))
+            except ValueNotInspected as exc:
+                msg = "%s:%s not inspected: %s" % (ad_name, field, exc)
+                validator.record_finding(v_obj, "NXDL field enumerations", finding.TODO, msg)
+                continue
+            try:
+                found = value in enumerations
+            except TypeError:  # not hashable (such as an array)
+                found = False
             msg = "%s:%s" % (ad_name, field)
-            required = (
-                spec.xml_attributes["minOccurs"].default_value == 1
-            )  # TODO: is this right?
-            if required:
+            if field in entry.required_fields:
                 msg += " (required)"
             else:
                 msg += " (optional)"
             status = finding.TF_RESULT[found]
             if found:
-                msg += " has expected value: " + enum
+                msg += " has expected value: " + value
             else:
-                msg += " does not have value: " + " | ".join(spec.enumerations)
+                msg += " does not have value: " + " | ".join(entry.enumeration_lists[field])
             validator.record_finding(v_obj, "NXDL field enumerations", status, msg)
 
         # TODO: attributes, xml_attributes, dimensions, ...
@@ -9,6 +9,7 @@
 # -----------------------------------------------------------------------------
 
 from .. import finding
+from .. import nxdl_manager
 from .. import utils
 from . import item_name
 
@@ -52,18 +53,10 @@ def isBaseClassNXDL(nxdl):
        definition = nxdl name (such as NXspecdata)
 
     If any of that structure is missing, report it as a base class.
+
+    :see: :func:`punx.nxdl_manager.is_base_class()`
     """
-    if nxdl.category == "base_classes":
-        return True
-    elif nxdl.category == "applications":
-        return False
-    elif nxdl.category == "contributed_definitions":
-        nxentry = nxdl.groups.get("entry")
-        if nxentry is None:
-            return True
-        definition = nxentry.fields.get("definition")
-        return definition is None
-    return False
+    return nxdl_manager.is_base_class(nxdl)
 
 
 def axes_handler(validator, v_item):
@@ -82,12 +75,12 @@ def axes_handler(validator, v_item):
 
 def nxclass_handler(validator, v_item):
     """validate @NX_class"""
-    nx_class = utils.decode_byte_string(v_item.h5_object)
-    nxdl = validator.manager.classes.get(nx_class)
-    if nxdl is None:
+    nx_class = v_item.value
+    spec = validator.manager.get_class_spec(nx_class)
+    if not spec.known:
         c = "not a recognized NXDL class: " + nx_class
         status = finding.ERROR
-    elif isBaseClassNXDL(nxdl):
+    elif spec.is_base_class:
         c = "recognized NXDL base class: " + nx_class
         status = finding.OK
     else:
@@ -106,7 +99,7 @@ def signal_handler(validator, v_item):
     (to mark the field as plottable data) or a group (to name
     the child field that is the plottable data).
     """
-    signal = utils.decode_byte_string(v_item.h5_object)
+    signal = v_item.value
     if utils.isNeXusDataset(v_item.parent.h5_object):
         if (
             str(signal).isdigit() and int(signal) == 1
@@ -141,7 +134,7 @@ def signal_handler(validator, v_item):
 
 def target_handler(validator, v_item):
     """validate @target"""
-    target = utils.decode_byte_string(v_item.h5_object)
+    target = v_item.value
 
     if not target.startswith("/"):
         status = finding.ERROR
@@ -18,7 +18,11 @@ def verify(validator, v_item, base_class):
     Verify items specified in base class NXDL with data file
     """
     # TODO: need to match up NXDL objects with flexible names with the HDF5 file counterparts
-    for field_name in sorted(base_class.fields.keys()):
+    spec = validator.manager.get_class_spec(base_class.title)
+    group_address = v_item.h5_address
+    if not group_address.endswith("/"):
+        group_address += "/"
+    for field_name in sorted(spec.fields):
         test = "NXDL field in data file"
         f = finding.OK
         found = field_name in v_item.h5_object
@@ -28,13 +32,9 @@ def verify(validator, v_item, base_class):
             # TODO: check if name is flexible
             c = "not found"
             f = finding.OPTIONAL
-        c += ": " + v_item.h5_address
-        if not c.endswith("/"):
-            c += "/"
-        c += field_name
-        validator.record_finding(v_item, test, f, c)
+        validator.record_finding(v_item, test, f, "%s: %s%s", c, group_address, field_name)
 
-    for group_name, group_object in sorted(base_class.groups.items()):
+    for group_name in sorted(spec.groups):
         test = "NXDL group in data file"
         f = finding.OK
         found = group_name in v_item.h5_object
@@ -44,16 +44,8 @@ def verify(validator, v_item, base_class):
             # TODO: check if name is flexible
             t = "not found: "
             f = finding.OPTIONAL
-        t += " in " + v_item.h5_address + "/" + group_name
-        validator.record_finding(v_item, test, f, t)
+        validator.record_finding(v_item, test, f, "%s in %s/%s", t, v_item.h5_address, group_name)
 
-        # ---------- this code is in the wrong place: to nxdl_manager -----
-        minOccurs = 0
-        if hasattr(base_class, "definition"):  # application definition
-            minOccurs = 1
-        minOccurs = int(group_object.attributes.get("minOccurs", minOccurs))
-        group_object.minOccurs = minOccurs
-        # ---------------------------------------------------------
         # FIXME: report if required item is present, name could be flexible
 
     for link_name, link_obj in base_class.links.items():  # noqa
@@ -37,7 +37,8 @@ def verify(validator):
     if status is None:
         c = "no default plot described"
         data_group = validator.manager.classes["NXentry"].groups["data"]
-        if hasattr(data_group, "minOccurs"):
+        has_entry = any(cp.endswith("/NXentry") for cp in validator.classpaths)
+        if has_entry and hasattr(data_group, "minOccurs"):
             minOccurs = data_group.minOccurs
         else:
             minOccurs = 1
@@ -69,12 +70,12 @@ def default_plot_v3(validator):
             addr = v_item.h5_object.name
         if not addr.endswith("/"):
             addr += "/"
-        addr += utils.decode_byte_string(pointer)
+        addr += pointer
         return addr
 
     def attribute_points_at_target(v_item, attribute_name, v_target):
         "test if attribute value actually points at target"
-        pointer = v_item.h5_object.attrs.get(attribute_name)
+        pointer = v_item.attrs.get(attribute_name)
         if pointer is None:
             return False
         addr = build_h5_address(v_item, pointer)
@@ -94,7 +95,7 @@ def default_plot_v3(validator):
         nxdata = validator.addresses["/" + entry + "/" + data]
         nxentry = validator.addresses["/" + entry]
         nxroot = validator.addresses["/"]
-        signal_h5_addr = build_h5_address(nxdata, nxdata.h5_object.attrs["signal"])
+        signal_h5_addr = build_h5_address(nxdata, nxdata.attrs["signal"])
         t1 = attribute_points_at_target(nxroot, "default", nxentry.h5_address)
         t2 = attribute_points_at_target(nxentry, "default", nxdata.h5_address)
         t3 = attribute_points_at_target(nxdata, "signal", signal_h5_addr)
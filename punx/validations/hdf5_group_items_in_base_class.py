@@ -48,32 +48,29 @@ def verify_group_attributes(validator, v_item, base_class):
         Instance of :class:`~punx.nxdl_manager.NXDL__definition`
         (a class that represents one of the NXDL specifications)
     """
-    for k, v in sorted(v_item.h5_object.attrs.items()):
-        k = utils.decode_byte_string(k)
-        v = utils.decode_byte_string(v)
-        known = k in base_class.attributes
+    spec = validator.manager.get_class_spec(base_class.title)
+    for k, v in v_item.attrs.items():
+        known = k in spec.attributes
         status = finding.OK
         c = "known"
         if not known and k != "NX_class":
             # NX_class is a special case since it is not defined in the nxdl.xsd Schema
             c = "unknown"
-        c += ": " + base_class.title + "@" + k
         a_item = validator.addresses[v_item.h5_address + "@" + k]
-        validator.record_finding(a_item, "known attribute", status, c)
+        validator.record_finding(a_item, "known attribute", status, "%s: %s@%s", c, base_class.title, k)
 
         if not known:  # ignore details of the unknown
             continue
 
-        spec = base_class.attributes[k]
-
-        if len(spec.enumerations) > 0:
-            match = v in spec.enumerations
+        enumerations = spec.attribute_enumerations.get(k)
+        if enumerations is not None:
+            match = isinstance(v, str) and v in enumerations
             status = finding.TF_RESULT[match]
             if match:
                 c = "found"
             else:
                 c = "not found"
-            c += ": " + v
+            c += ": " + str(v)
             test_name = "attribute value enumeration"
             validator.record_finding(a_item, test_name, status, c)
             # TODO: ...
@@ -118,26 +115,32 @@ def verify_group_attributes(validator, v_item, base_class):
 
 def verify_group_children(validator, v_item, base_class):
     """verify the group's children (groups, fields)"""
-    for child_name in v_item.h5_object:
-        obj = v_item.h5_object[child_name]
+    spec = validator.manager.get_class_spec(base_class.title)
+    group = v_item.h5_object
+    for child_name in group:
+        obj = validator.resolver.get_member(group, child_name)
+        if obj is None:
+            continue  # not available (reported when cataloged)
         v_sub_item = validator.addresses[obj.name]
         # TODO: need an algorithm to know if v_item is defined in base class
 
         if utils.isNeXusDataset(obj):
-            if child_name in base_class.fields:
+            if child_name in spec.fields:
                 t = "defined: "
             else:
                 t = "not defined: "
-            t += base_class.title + "/" + child_name
-            validator.record_finding(v_sub_item, "field in base class", finding.OK, t)
+            validator.record_finding(
+                v_sub_item, "field in base class", finding.OK, "%s%s/%s", t, base_class.title, child_name
+            )
 
         elif utils.isHdf5Group(obj):
-            if child_name in base_class.groups:
+            if child_name in spec.groups:
                 t = "defined: "
             else:
                 t = "not defined: "
-            t += base_class.title + "/" + child_name
-            validator.record_finding(v_sub_item, "group in base class", finding.OK, t)
+            validator.record_finding(
+                v_sub_item, "group in base class", finding.OK, "%s%s/%s", t, base_class.title, child_name
+            )
 
         else:
             validator.record_finding(
@@ -9,7 +9,6 @@
 # -----------------------------------------------------------------------------
 
 
-import re
 import collections
 
 from .. import finding
@@ -33,9 +32,9 @@ def isNeXusLinkTarget(v_item):
     It is a "target" if its HDF5 address does not match the target value.
     It is a "source" if its HDF5 address matches the target attribute value.
     """
-    if "target" in v_item.h5_object.attrs:
+    if "target" in v_item.attrs:
         source_name = utils.decode_byte_string(v_item.h5_address)
-        target_name = utils.decode_byte_string(v_item.h5_object.attrs["target"])
+        target_name = v_item.attrs["target"]
         return target_name != source_name
     return False  # no @target attribute at all
 
@@ -82,12 +81,7 @@ def verify(validator, v_item):
     elif v_item.classpath.find("@") > -1:
         handle_any_attribute(validator, v_item)
 
-    elif (
-        utils.isHdf5Dataset(v_item.h5_object)
-        or utils.isHdf5Group(v_item.h5_object)
-        or utils.isHdf5Link(v_item.h5_object)
-        or utils.isHdf5ExternalLink(v_item.parent, v_item.name)
-    ):
+    elif v_item.is_hdf5_object:  # group, dataset, or link to either
         handle_groups_and_fields(validator, v_item)
 
     elif v_item.classpath == CLASSPATH_OF_NON_NEXUS_CONTENT:
@@ -99,38 +93,39 @@ def verify(validator, v_item):
         validator.record_finding(v_item, TEST_NAME, status, c)
 
 
-def handle_NX_class(validator, v_item):
-    """validate the value of the NX_class attribute"""
-    nxdl = validator.manager.nxdl_file_set.schema_manager.nxdl
+def getValidNXClassNamePatterns(validator):
+    """get regular expression patterns for validNXClassName"""
     key = "validNXClassName"
     patterns = collections.OrderedDict()
+    nxdl = validator.manager.nxdl_file_set.schema_manager.nxdl
     for i, p in enumerate(nxdl.patterns[key].re_list):
         patterns[key + "-" + str(i)] = p
+    return patterns
 
-    status = finding.ERROR
-    for k, p in patterns.items():
-        if k not in validator.regexp_cache:
-            validator.regexp_cache[k] = re.compile("^" + p + "$")
-        s = utils.decode_byte_string(v_item.h5_object)
-        m = validator.regexp_cache[k].match(s)
-        matches = m is not None and m.string == s
-        msg = "checking %s with %s: %s" % (v_item.h5_address, k, str(matches))
-        logger.debug(msg)
-        if matches:
-            status = finding.OK
-            break
+
+def handle_NX_class(validator, v_item):
+    """validate the value of the NX_class attribute"""
+    classifier = validator.manager.get_name_classifier(
+        "validNXClassName", lambda: getValidNXClassNamePatterns(validator)
+    )
+    s = v_item.value
+    k = classifier.classify(s)
+    logger.debug("checking %s: %s", v_item.h5_address, k)
+    if k is None:
+        status = finding.ERROR
+        p = list(classifier.patterns.values())[-1]  # the last one tried
+    else:
+        status = finding.OK
+        p = classifier.patterns[k]
     validator.record_finding(v_item, TEST_NAME, status, "pattern: " + p)
 
 
-def handle_any_attribute(validator, v_item, key=None):
+def handle_any_attribute(validator, v_item):
     """validate the names of attributes"""
     k = validItemName_match_key(validator, v_item.name)
     status = finding.TF_RESULT[k is not None]
     k = k or "no matching pattern found"
-    key = key or "validItemName"
-    f = finding.Finding(v_item.h5_address, TEST_NAME, status, k)  # noqa
-    validator.validations.append(f)
-    v_item.validations[key] = f
+    validator.record_finding(v_item, TEST_NAME, status, k)
 
 
 def getValidItemNamePatterns(validator, key=None):
@@ -149,19 +144,25 @@ def getValidItemNamePatterns(validator, key=None):
     return patterns
 
 
+def get_name_classifier(validator, key=None):
+    """
+    Return the classifier of names by validItemName patterns.
+
+    The classifier is kept by the NXDL manager, so names already
+    classified (in this or another file) are not matched again.
+    """
+    key = key or "validItemName"
+    return validator.manager.get_name_classifier(
+        key, lambda: getValidItemNamePatterns(validator, key)
+    )
+
+
 def validItemName_match_key(validator, text):
     """Return the validItemName key that matches text, or None"""
-    patterns = getValidItemNamePatterns(validator)
-    for k, p in patterns.items():
-        if k not in validator.regexp_cache:
-            validator.regexp_cache[k] = re.compile("^" + p + "$")
-
-        s = utils.decode_byte_string(text)
-        m = validator.regexp_cache[k].match(s)
-        matches = m is not None and m.string == s
-        logger.debug("checking %s with %s: %s", s, k, str(matches))
-        if matches:
-            return k
+    s = utils.decode_byte_string(text)
+    k = get_name_classifier(validator).classify(s)
+    logger.debug("checking %s: %s", s, k)
+    return k
 
 
 def handle_groups_and_fields(validator, v_item):
@@ -0,0 +1,49 @@
+# -----------------------------------------------------------------------------
+# :author:    Pete R. Jemian
+# :email:     prjemian@gmail.com
+# :copyright: (c) 2014-2022, Pete R. Jemian
+#
+# Distributed under the terms of the Creative Commons Attribution 4.0 International Public License.
+#
+# The full license is in the file LICENSE.txt, distributed with this software.
+# -----------------------------------------------------------------------------
+
+from .. import finding
+from ..validate import CLASSPATH_OF_NON_NEXUS_CONTENT
+from . import base_class_items_in_hdf5_group
+from . import hdf5_group_items_in_base_class
+from . import nx_class_attribute
+
+
+def verify(validator, v_item):
+    """
+    validate the NeXus content of a HDF5 data file group
+    """
+    key = "NeXus_group"
+    if v_item.classpath == CLASSPATH_OF_NON_NEXUS_CONTENT:
+        validator.record_finding(v_item, key, finding.OK, "not a NeXus group")
+        return
+
+    if v_item.classpath.startswith("/NX"):
+        nx_class = v_item.nx_class
+    elif v_item.classpath == "":
+        nx_class = "NXroot"  # handle as NXroot
+    else:
+        raise ValueError(f"unexpected: {v_item}")
+
+    nx_class_attribute.validate_NX_class_attribute(validator, v_item, nx_class)
+
+    base_class = validator.manager.get_class_spec(nx_class).nxdl
+    if base_class is None:
+        c = "unknown NeXus base class: " + nx_class
+        validator.record_finding(v_item, "NeXus base class", finding.ERROR, c)
+    else:
+        hdf5_group_items_in_base_class.verify(validator, v_item, base_class)
+        base_class_items_in_hdf5_group.verify(validator, v_item, base_class)
+
+        # TODO: validate attributes - both HDF5-supplied & NXDL-specified
+        # TODO: validate symbols - both HDF5-supplied & NXDL-specified
+        # TODO: validate fields - both HDF5-supplied & NXDL-specified
+        # TODO: validate links - both HDF5-supplied & NXDL-specified
+        c = nx_class + ": more validations needed"
+        validator.record_finding(v_item, "NeXus base class", finding.TODO, c)
@@ -22,17 +22,17 @@ def validate_NX_class_attribute(validator, v_item, nx_class):
     on a parent NXentry or NXsubentry group, and declared in the
     `definition` field of that parent group.
     """
-    known = nx_class in validator.manager.classes
+    spec = validator.manager.get_class_spec(nx_class)
+    known = spec.known
     status = finding.TF_RESULT[known]
     msg = nx_class + ": recognized NXDL specification"
     validator.record_finding(v_item, "known NXDL", status, msg)
 
     if known:
-        as_base = validator.usedAsBaseClass(nx_class)
+        as_base = spec.used_as_base_class
         status = finding.TF_RESULT[as_base]
-        # ??? validator.manager.classes[nx_class].category
         msg = nx_class
-        if validator.manager.classes[nx_class].category == "base_classes":
+        if spec.category == "base_classes":
             msg += ": known NeXus base class"
         else:
             msg += ": known NeXus contributed definition used as base class"
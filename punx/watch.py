@@ -0,0 +1,652 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# -----------------------------------------------------------------------------
+# :author:    Pete R. Jemian
+# :email:     prjemian@gmail.com
+# :copyright: (c) 2014-2022, Pete R. Jemian
+#
+# Distributed under the terms of the Creative Commons Attribution 4.0 International Public License.
+#
+# The full license is in the file LICENSE.txt, distributed with this software.
+# -----------------------------------------------------------------------------
+
+"""
+validate a data file again, only what changed
+
+.. autosummary::
+
+   ~Validation_Watcher
+   ~Watch_Pass
+   ~validate_incremental
+   ~default_state_directory
+
+A data file written during acquisition (such as in SWMR mode, single
+writer & multiple readers) is validated once, then refreshed
+periodically.  Each refresh (a *pass*) opens the file again (as a
+SWMR reader), catalogs only the objects added (or removed) since the
+last pass and validates only those objects and the groups that changed.
+The file is not read if its size and modification time are unchanged.
+
+To find what changed, a pass learns the HDF5 address (in the file)
+and the number of links and attributes of each cataloged group
+(without opening its members).  Only groups where these changed are
+walked, and only for their new (or removed) members.  A group now at
+another address (replaced) is cataloged again, with its members.
+So a pass costs little more than one call per group, plus the cost
+of cataloging and validating what changed.
+
+The state of a watcher (its catalog and findings) can be saved to a
+file and loaded again later, such as by another process.  So a file
+that is validated again and again (such as after each scan appended
+to it) is validated each time only for what changed since the last
+time (see :func:`validate_incremental`).
+
+What is not seen by a pass:
+
+* a value (or shape) of a dataset that changed (not validated)
+* changes to the attributes of datasets
+* changed values of group attributes (same number of attributes)
+* a member replaced by another of the same name (except a group
+  now at another address in the file)
+* changes to the files of external links
+
+EXAMPLE::
+
+    validator = punx.validate.Data_File_Validator()
+    watcher = punx.watch.Validation_Watcher(validator, hdf5_file_name)
+    for watch_pass in watcher.watch(interval=5):
+        for f in watch_pass.findings:
+            print(f)
+"""
+
+import hashlib
+import h5py
+import logging
+import os
+import pickle
+import tempfile
+import time
+
+from . import __version__
+from . import HDF5_Open_Error
+from . import finding
+from . import rules
+from . import utils
+from . import validate
+
+
+DEFAULT_INTERVAL = 5.0  # seconds between passes
+STATE_FORMAT = 2  # increment when the content of a saved state changes
+STATE_SUBDIR = "validation_state"  # in the user cache directory
+logger = logging.getLogger(__name__)
+
+
+def default_state_directory():
+    """Return the directory for saved states (in the user cache directory)."""
+    from . import cache_manager
+
+    return os.path.join(cache_manager.UserCache().path, STATE_SUBDIR)
+
+
+class Watch_Pass(object):
+
+    """
+    What one pass of a :class:`Validation_Watcher` found
+
+    PARAMETERS
+
+    number int :
+        number of this pass (the first pass is 1)
+    new_items int :
+        items (groups, datasets, attributes) cataloged in this pass
+    changed_groups int :
+        cataloged groups with new (or removed) members or attributes
+    removed_items int :
+        cataloged items no longer in the file
+    findings list :
+        findings made in this pass (these replace the findings
+        from earlier passes of the same groups)
+    read bool :
+        Was the file read in this pass?
+    """
+
+    __slots__ = ("number", "new_items", "changed_groups", "removed_items", "findings", "read")
+
+    def __init__(self, number, new_items=0, changed_groups=0, findings=None):
+        self.number = number
+        self.new_items = new_items
+        self.changed_groups = changed_groups
+        self.removed_items = 0
+        self.findings = findings or []
+        self.read = False
+
+    def __str__(self):
+        s = "pass %d: %d new item(s), %d changed group(s)" % (
+            self.number,
+            self.new_items,
+            self.changed_groups,
+        )
+        if self.removed_items > 0:
+            s += ", %d removed item(s)" % self.removed_items
+        return s + ", %d finding(s)" % len(self.findings)
+
+
+class Watch_Origin(object):
+
+    """
+    names of the checks whose findings are kept by a :class:`Validation_Watcher`
+
+    Findings of ``ITEM`` are made once.  Findings of the other
+    checks are replaced when the check is made again.
+    """
+
+    ITEM = "item"  # item name, attributes, ... (and when cataloged)
+    GROUP = "group"  # NeXus group
+    APPLICATION_DEFINITION = "application definition"
+    DEFAULT_PLOT = "default plot"
+
+    ALL = (ITEM, GROUP, APPLICATION_DEFINITION, DEFAULT_PLOT)
+
+
+class Validation_Watcher(object):
+
+    """
+    Validate a data file, then refresh the validation as the file changes
+
+    The first pass validates the whole file (as
+    :meth:`~punx.validate.Data_File_Validator.validate`).
+    Each later pass validates only what changed (see
+    :mod:`punx.watch`).  After each pass, the validator's
+    ``validations`` (and ``addresses``, ``classpaths``) are those
+    of the whole file, so
+    :meth:`~punx.validate.Data_File_Validator.print_report`
+    reports on the whole file.
+
+    The file is open only during a pass (so a writer that is not
+    in SWMR mode can open it between passes).  Between passes, the
+    ``h5_object`` of cataloged items is not available.
+
+    PARAMETERS
+
+    validator obj :
+        :class:`~punx.validate.Data_File_Validator` to use
+    fname str :
+        name of the HDF5 data file
+
+    Attributes
+
+    passes int :
+        number of passes made
+
+    .. autosummary::
+
+       ~refresh
+       ~watch
+       ~close
+       ~state_file
+       ~state_key
+       ~save_state
+       ~load_state
+    """
+
+    def __init__(self, validator, fname):
+        self.validator = validator
+        self.fname = fname
+        self.passes = 0
+        self._stat = None  # (size, mtime) of the file at the last pass
+        self._fileno = None  # HDF5 file number of the open file
+        self._forget()
+
+    def _forget(self):
+        """internal: forget what was cataloged & found"""
+        self._groups = {}  # HDF5 address (in its file) of cataloged groups (not aliases), by index
+        self._members = {}  # index of each member (by link name) of each group walked, by index
+        self._attributes = {}  # index of each attribute (by name) of each group, by index
+        self._application_definitions = set()  # indices of groups
+        self._findings = {}  # findings, by (origin, index)
+        self._start_again = False  # Must the whole file be cataloged again?
+
+    def _file_stat(self):
+        """internal: (size, modification time) of the file"""
+        st = os.stat(self.fname)
+        return st.st_size, st.st_mtime_ns
+
+    def _open(self):
+        """internal: open the file (again), as a SWMR reader"""
+        validator = self.validator
+        validator._open_file_(self.fname, swmr=True)
+        catalog = validator.catalog
+        catalog.h5 = validator.h5
+        catalog.handles.clear()  # objects of the file opened before
+        fileno = h5py.h5o.get_info(validator.h5.id).fileno
+        if self._fileno is not None:
+            # HDF5 numbers a file each time it is opened
+            catalog.hard_links = {
+                (fileno, addr): i
+                for (n, addr), i in catalog.hard_links.items()
+                if n == self._fileno  # others are in files of external links
+            }
+        self._fileno = fileno
+
+    def _close(self):
+        """internal: close the file (until the next pass)"""
+        self.validator.catalog.handles.clear()
+        self.validator.close()
+
+    def _keep(self, origin, index, findings):
+        """internal: keep the findings of a check"""
+        if len(findings) > 0:
+            self._findings.setdefault((origin, index), []).extend(findings)
+
+    def _walk(self, parent, group, names, result):
+        """
+        internal: catalog (new members of) a group, check each new item
+
+        Returns the indices of the (cataloged) groups to validate.
+        """
+        validator = self.validator
+        groups = []
+        events = validator._walk_address_catalog_(parent, group, names, self._members)
+        for v_item, group_done in events:
+            if group_done:
+                if v_item.alias_of is None:
+                    groups.append(v_item.index)
+                    self._groups[v_item.index] = h5py.h5o.get_info(v_item.h5_object.id).addr
+            else:
+                result.new_items += 1
+                self._add_attribute(v_item)
+                validator.apply_rules(rules.ITEM, v_item)
+                if v_item.classpath in validate.APPLICATION_DEFINITION_CLASSPATHS:
+                    self._application_definitions.add(v_item.parent.index)
+            # and the findings made while cataloging (such as a missing external file)
+            findings = validator._take_findings_()
+            self._keep(Watch_Origin.ITEM, v_item.index, findings)
+            result.findings += findings
+        return groups
+
+    def _add_attribute(self, v_item):
+        """internal: remember the row of ``v_item`` if it is an attribute of a group"""
+        catalog = self.validator.catalog
+        parent = catalog.parents[v_item.index]
+        if catalog.kinds[v_item.index] in (catalog.ATTRIBUTE, catalog.VALUE):
+            if catalog.kinds[parent] == catalog.HDF5_GROUP:
+                self._attributes.setdefault(parent, {})[v_item.name] = v_item.index
+
+    def _changed_groups(self):
+        """
+        internal: find the groups that changed
+
+        Returns the (indices of) groups with other links or attributes,
+        and of groups no longer in the file (or now at another address).
+        Groups in the files of external links are checked only for
+        other links or attributes.
+        """
+        catalog = self.validator.catalog
+        changed, gone = [], []
+        for index, addr in self._groups.items():
+            external = index in catalog.files
+            try:
+                group = catalog.get_object(index)
+            except (KeyError, ValueError, OSError):
+                if not external:
+                    gone.append(index)
+                continue
+            info = h5py.h5o.get_info(group.id)
+            if info.addr != addr and not external:
+                gone.append(index)
+            elif group.id.get_num_objs() != len(self._members.get(index, ())):
+                changed.append(index)
+            elif info.num_attrs != len(catalog.attrs.get(index, ())):
+                changed.append(index)
+        return changed, gone
+
+    def _remove(self, indices, result):
+        """internal: remove these rows (and all rows below them) from the catalog"""
+        if len(indices) == 0:
+            return
+        catalog = self.validator.catalog
+        removed = set(indices)
+        parents = catalog.parents
+        for index in range(min(removed) + 1, len(catalog)):  # rows below are cataloged later
+            if parents[index] in removed:
+                removed.add(index)
+
+        originals = {i for i in catalog.hard_links.values() if i in removed}
+        for index in originals:
+            h5_address = catalog.h5_address(index)
+            if any(i not in removed for i, a in catalog.aliases.items() if a == h5_address):
+                # another path to this object is cataloged as an alias of it
+                self._start_again = True
+
+        for index in removed:
+            if catalog.item(index).classpath in validate.APPLICATION_DEFINITION_CLASSPATHS:
+                parent = parents[index]  # (no longer) an application definition
+                self._application_definitions.discard(parent)
+                self._findings.pop((Watch_Origin.APPLICATION_DEFINITION, parent), None)
+            catalog.remove(index)
+            self._groups.pop(index, None)
+            self._members.pop(index, None)
+            self._attributes.pop(index, None)
+            self._application_definitions.discard(index)
+            for origin in Watch_Origin.ALL:
+                self._findings.pop((origin, index), None)
+        catalog.hard_links = {k: i for k, i in catalog.hard_links.items() if i not in removed}
+        result.removed_items += len(removed)
+
+    def _update_attributes(self, index, result):
+        """
+        internal: catalog (and check) new attributes of group ``index``, remove others
+
+        The other attributes of the group are checked again (their
+        findings can depend on the members of the group, such as ``@signal``).
+        """
+        validator = self.validator
+        catalog = validator.catalog
+        known = self._attributes.setdefault(index, {})
+        attrs = utils.read_attributes(catalog.get_object(index))
+        self._remove([known.pop(k) for k in list(known) if k not in attrs], result)
+        catalog.attrs[index] = attrs
+        v_group = catalog.item(index)
+        for k, value in attrs.items():
+            if k in known:
+                v = catalog.item(known[k])
+                self._findings.pop((Watch_Origin.ITEM, v.index), None)
+            else:
+                v = validate.ValidationItem(v_group, value, attribute_name=k)
+                catalog.register(v.index)
+                self._add_attribute(v)
+                result.new_items += 1
+            validator.apply_rules(rules.ITEM, v)
+            findings = validator._take_findings_()
+            self._keep(Watch_Origin.ITEM, v.index, findings)
+            result.findings += findings
+
+    def _update_members(self, index, result, forget=()):
+        """
+        internal: catalog (and check) new members of group ``index``, remove others
+
+        Members named in ``forget`` (link names, bytes) are removed
+        (then cataloged again, if still in the group).
+        Returns the indices of the (cataloged) groups to validate.
+        """
+        catalog = self.validator.catalog
+        group = catalog.get_object(index)
+        names = list(group.id)
+        known = self._members.setdefault(index, {})
+        gone = (set(known) - set(names)) | set(forget)
+        rows = [known.pop(name) for name in gone if name in known]
+        rows = [i for i in rows if i is not None]
+        if len(rows) > 0:
+            self._remove(rows, result)
+        names = [name for name in names if name not in known]
+        if len(names) == 0:
+            return []
+        return self._walk(catalog.item(index), group, names, result)
+
+    def _affected_application_definitions(self, indices):
+        """internal: groups of application definitions at (or above) ``indices``"""
+        parents = self.validator.catalog.parents
+        found = {}
+        for index in indices:
+            while index >= 0:
+                if index in self._application_definitions:
+                    found[index] = None
+                index = parents[index]
+        return list(found)
+
+    def refresh(self, force=False):
+        """
+        Make a pass: validate what changed since the last pass.
+
+        Returns a :class:`Watch_Pass`.  If the file did not change
+        (same size and modification time), the file is not read
+        (unless ``force``).  If the file cannot be opened (such as
+        while the writer has it locked), this pass is skipped
+        (except the first pass: raises
+        :exc:`~punx.HDF5_Open_Error`).
+        """
+        stat = self._file_stat()
+        self.passes += 1
+        result = Watch_Pass(self.passes)
+        if stat == self._stat and not force:
+            return result
+
+        first_pass = self._stat is None
+        try:
+            self._open()
+        except HDF5_Open_Error:
+            if first_pass:
+                raise
+            logger.warning("pass %d: could not open (try again next pass): %s", self.passes, self.fname)
+            return result
+        try:
+            self._validate_pass(result, first_pass)
+        finally:
+            # all findings kept, for the report of the whole file
+            self.validator.validations = finding.Finding_Store(
+                f for kept in self._findings.values() for f in kept
+            )
+            self.validator._index_findings_()
+            self._close()  # so a writer can open the file
+        self._stat = stat
+        result.read = True
+        return result
+
+    def _validate_pass(self, result, first_pass):
+        """internal: catalog & validate what changed (all, if ``first_pass``)"""
+        validator = self.validator
+        validator.validations = finding.Finding_Store()  # findings of this pass
+        if not first_pass:
+            groups = self._validate_changes(result)
+            if self._start_again:
+                logger.debug("pass %d: catalog the whole file again", result.number)
+                first_pass = True
+            elif result.new_items == 0 and result.removed_items == 0:
+                return
+        if first_pass:  # the whole file
+            self._forget()
+            validator.validations = finding.Finding_Store()
+            validator.__init_local__()
+            validator.catalog.h5 = validator.h5
+            result.new_items = result.changed_groups = result.removed_items = 0
+            result.findings = []
+            groups = self._walk(None, validator.h5, None, result)
+        catalog = validator.catalog
+
+        # validate the new & changed groups (each once) and what depends on them
+        groups = [i for i in dict.fromkeys(groups) if i in self._groups]
+        checks = [(Watch_Origin.GROUP, rules.GROUP, i) for i in groups]
+        checks += [
+            (Watch_Origin.APPLICATION_DEFINITION, rules.APPLICATION_DEFINITION, i)
+            for i in self._affected_application_definitions(groups)
+        ]
+        checks.append((Watch_Origin.DEFAULT_PLOT, rules.FILE, 0))
+        for origin, scope, index in checks:
+            self._findings.pop((origin, index), None)
+            validator.apply_rules(scope, catalog.item(index))
+            findings = validator._take_findings_()
+            self._keep(origin, index, findings)
+            result.findings += findings
+
+    def _validate_changes(self, result):
+        """
+        internal: catalog (and check) the changes in each changed group
+
+        Returns the indices of the (cataloged) groups to validate.
+        """
+        catalog = self.validator.catalog
+        changed, gone = self._changed_groups()
+        if 0 in gone:  # another file now
+            self._start_again = True
+            return []
+        forget = {}  # link names of the groups gone, by index of their parent
+        for index in gone:
+            parent = catalog.parents[index]
+            for name, i in self._members.get(parent, {}).items():
+                if i == index:
+                    forget.setdefault(parent, set()).add(name)
+        groups = []
+        for index in sorted(set(changed) | set(forget)):
+            if index not in self._groups:
+                continue  # removed (a group above it is gone)
+            result.changed_groups += 1
+            groups.append(index)
+            self._update_attributes(index, result)
+            groups += self._update_members(index, result, forget.get(index, ()))
+        return groups
+
+    def watch(self, interval=DEFAULT_INTERVAL, passes=None):
+        """
+        Yield a :class:`Watch_Pass` for each pass, one each ``interval`` seconds.
+
+        Stops after ``passes`` passes (default: never).
+        """
+        while passes is None or self.passes < passes:
+            t0 = time.time()
+            yield self.refresh()
+            if passes is None or self.passes < passes:
+                time.sleep(max(0, interval - (time.time() - t0)))
+
+    def close(self):
+        """close the file"""
+        self.validator.close()
+
+    def state_file(self, state_dir=None):
+        """
+        Return the name of the file for the saved state of this data file.
+
+        The file is in ``state_dir`` (default: :func:`default_state_directory`),
+        named for the absolute path of the data file.
+        """
+        if state_dir is None:
+            state_dir = default_state_directory()
+        path = os.fsencode(os.path.abspath(self.fname))
+        return os.path.join(state_dir, hashlib.sha1(path).hexdigest() + ".pickle")
+
+    def state_key(self):
+        """
+        Return what a saved state must match to be used.
+
+        The punx version, the data file, the NXDL file set (its ``sha``)
+        and the validator's settings (and rules) that change the findings.
+        """
+        validator = self.validator
+        return dict(
+            format=STATE_FORMAT,
+            punx_version=__version__,
+            fname=os.path.abspath(self.fname),
+            sha=validator.manager.nxdl_file_set.sha,
+            read_virtual_datasets=validator.read_virtual_datasets,
+            max_read_bytes=validator.read_budget.max_read_bytes,
+            max_file_bytes=validator.read_budget.max_file_bytes,
+            rules=[rule.name for rule in validator.enabled_rules()],
+        )
+
+    def save_state(self, path):
+        """
+        Save the state (catalog & findings) in file ``path``.
+
+        The file is written as a temporary file, then renamed.
+        Return ``True`` if successful.
+        """
+        content = dict(
+            passes=self.passes,
+            stat=self._stat,
+            fileno=self._fileno,
+            groups=self._groups,
+            members=self._members,
+            attributes=self._attributes,
+            application_definitions=self._application_definitions,
+            findings=self._findings,
+            catalog=self.validator.catalog,
+        )
+        tmp_name = None
+        try:
+            state_dir = os.path.dirname(os.path.abspath(path))
+            os.makedirs(state_dir, exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(dir=state_dir, suffix=".tmp")
+            with os.fdopen(fd, "wb") as fp:
+                pickle.dump(self.state_key(), fp, pickle.HIGHEST_PROTOCOL)
+                pickle.dump(content, fp, pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_name, path)
+        except Exception as exc:
+            logger.debug("could not save validation state %s: %s", path, exc)
+            if tmp_name is not None and os.path.exists(tmp_name):
+                os.remove(tmp_name)
+            return False
+        logger.debug("saved validation state: %s", path)
+        return True
+
+    def load_state(self, path):
+        """
+        Load the state (catalog & findings) from file ``path``.
+
+        Return ``True`` if successful, ``False`` if the file is missing,
+        cannot be read, or does not match (see :meth:`state_key`).
+        """
+        if not os.path.exists(path):
+            return False
+        try:
+            with open(path, "rb") as fp:
+                if pickle.load(fp) != self.state_key():
+                    logger.debug("validation state does not match: %s", path)
+                    return False
+                content = pickle.load(fp)
+        except Exception as exc:
+            logger.debug("could not load validation state %s: %s", path, exc)
+            return False
+
+        validator = self.validator
+        validator.close()
+        catalog = content["catalog"]
+        catalog.resolver = validator.resolver
+        catalog.handles.set_max_handles(validator.max_handles)
+        validator.catalog = catalog
+        validator.addresses = validate.Catalog_Address_Dict(catalog)
+        validator.classpaths = validate.Catalog_Classpath_Dict(catalog)
+        validator.fname = self.fname
+        self._forget()
+        self.passes = content["passes"]
+        self._stat = content["stat"]
+        self._fileno = content["fileno"]
+        self._groups = content["groups"]
+        self._members = content["members"]
+        self._attributes = content["attributes"]
+        self._application_definitions = content["application_definitions"]
+        self._findings = content["findings"]
+        validator.validations = finding.Finding_Store(
+            f for kept in self._findings.values() for f in kept
+        )
+        validator._index_findings_()
+        logger.debug("loaded validation state: %s", path)
+        return True
+
+
+def validate_incremental(validator, fname, state_dir=None):
+    """
+    Validate ``fname``, only what changed since it was last validated so.
+
+    The state (catalog & findings) saved by the last validation of
+    ``fname`` is loaded from ``state_dir`` (default:
+    :func:`default_state_directory`).  Only what changed since then
+    is validated (see :mod:`punx.watch`), then the state is saved
+    for the next time.  Without a saved state, the whole file is
+    validated.
+
+    Returns the :class:`Watch_Pass`.  The validator's ``validations``
+    are the findings of the whole file.
+
+    EXAMPLE::
+
+        validator = punx.validate.Data_File_Validator()
+        punx.watch.validate_incremental(validator, hdf5_file_name)
+        validator.print_report()
+    """
+    watcher = Validation_Watcher(validator, fname)
+    path = watcher.state_file(state_dir)
+    watcher.load_state(path)
+    result = watcher.refresh()
+    if result.read:
+        watcher.save_state(path)
+    return result